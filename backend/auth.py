@@ -4,11 +4,11 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-
+from sqlalchemy import select
 from config import settings
-from database import get_db
+from database import AsyncSessionLocal
 from models.user import User
+from services.principal_cache import Principal, principal_cache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -25,33 +25,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str, credentials_exception):
-    """Verify JWT token"""
+def decode_token(token: str, credentials_exception) -> dict:
+    """Verify a JWT and return its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise credentials_exception
-        return user_id
+        return payload
     except JWTError:
         raise credentials_exception
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+def user_id_from_claims(claims: dict, credentials_exception) -> int:
+    # The subject is the user id as a string; JWT requires "sub" to be a string
+    try:
+        return int(claims["sub"])
+    except ValueError:
+        raise credentials_exception
+
+def verify_token(token: str, credentials_exception):
+    """Verify JWT token"""
+    return user_id_from_claims(decode_token(token, credentials_exception), credentials_exception)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Get current authenticated user.
+
+    Tokens and users seen recently come from the principal cache, so most
+    requests skip both the signature check and the database query.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    user_id = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.id == user_id).first()
-    
+    user_id = principal_cache.get_token(token)
+    if user_id is None:
+        claims = decode_token(token, credentials_exception)
+        user_id = user_id_from_claims(claims, credentials_exception)
+        principal_cache.put_token(token, user_id, float(claims["exp"]))
+
+    user = principal_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+            if row is None:
+                raise credentials_exception
+            user = Principal.from_user(row)
+        principal_cache.put(user)
     
     if not user.is_active:
         raise HTTPException(
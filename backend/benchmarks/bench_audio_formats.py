@@ -0,0 +1,58 @@
+"""
+Payload size and time on the wire per output format over slow links.
+
+Synthesizes replies of several lengths through generate_speech with the fake
+Fish Audio. Fish Audio's WAV is 44.1 kHz 16-bit mono. MP3 and Opus are sized at
+their nominal bitrate. The benchmark reports the bytes shipped and the transfer
+time on a few typical mobile link speeds.
+
+    python benchmarks/bench_audio_formats.py --durations 3 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import FakeFishAudio, make_wav
+from routers import practice
+from schemas.tts import TTSRequest
+from services.vendor_clients import VendorClients, install_vendor_clients
+
+FORMATS = [("wav", None), ("mp3", 128), ("mp3", 64), ("opus", 32), ("opus", 24)]
+
+# Downlink throughput in kbit/s
+LINKS = {"2G": 250, "slow 3G": 400, "3G": 1600, "4G": 9000}
+
+
+async def payload_size(duration: float, audio_format: str, bitrate) -> int:
+    install_vendor_clients(VendorClients(fish_audio=FakeFishAudio(audio=make_wav(duration, sample_rate=44100))))
+    audio = await practice.generate_speech(TTSRequest(
+        transcript=f"Frase de {duration} segundos", model_id="bench-voice",
+        audio_format=audio_format, bitrate=bitrate
+    ))
+    return len(audio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10], help="Reply length (seconds)")
+    args = parser.parse_args()
+
+    header = f"{'audio':>6} {'format':>10} {'KiB':>8}" + "".join(f" {name + ' s':>10}" for name in LINKS)
+    print(header)
+    for duration in args.durations:
+        for audio_format, bitrate in FORMATS:
+            size = asyncio.run(payload_size(duration, audio_format, bitrate))
+            label = audio_format + (f"@{bitrate}" if bitrate else "")
+            transfer = "".join(f" {size * 8 / 1000 / kbps:>10.2f}" for kbps in LINKS.values())
+            print(f"{duration:>5.0f}s {label:>10} {size / 1024:>8.0f}{transfer}")
+
+
+if __name__ == "__main__":
+    main()
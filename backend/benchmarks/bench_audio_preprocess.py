@@ -0,0 +1,75 @@
+"""
+Cost and payoff of the pre-STT preprocessing stage on synthetic recordings.
+
+Each recording imitates a browser capture: 48 kHz stereo 16-bit WAV with a
+second of room noise before the learner speaks and two seconds after, around a
+stretch of syllable-like modulated tones. The benchmark reports the CPU time
+prepare_for_stt takes per second of input, and how much smaller and shorter the
+audio sent to Deepgram becomes.
+
+    python benchmarks/bench_audio_preprocess.py --durations 3 10 30 --repeat 20
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.audio_preprocess import prepare_for_stt
+
+SAMPLE_RATE = 48000
+LEADING_SILENCE = 1.0
+TRAILING_SILENCE = 2.0
+
+
+def synthetic_recording(speech_seconds: float, seed: int = 0) -> bytes:
+    """Noise, then speech-like tones at four syllables a second, then noise; as stereo WAV"""
+    rng = np.random.default_rng(seed)
+    total = LEADING_SILENCE + speech_seconds + TRAILING_SILENCE
+    t = np.arange(int(total * SAMPLE_RATE)) / SAMPLE_RATE
+    speaking = (t >= LEADING_SILENCE) & (t < LEADING_SILENCE + speech_seconds)
+    pitch = 140 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    voice = 0.3 * syllables * (np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+                               + 0.3 * np.sin(2 * np.pi * 3 * np.cumsum(pitch) / SAMPLE_RATE))
+    mono = np.where(speaking, voice, 0) + rng.normal(0, 0.002, len(t))
+    stereo = np.repeat(mono, 2)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        writer.writeframes((np.clip(stereo, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30], help="Speech length (seconds)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per recording")
+    args = parser.parse_args()
+
+    print(f"{'speech':>7} {'input s':>8} {'output s':>9} {'input KiB':>10} {'output KiB':>11} "
+          f"{'median ms':>10} {'ms per s':>9}")
+    for speech_seconds in args.durations:
+        recording = synthetic_recording(speech_seconds)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            prepared = prepare_for_stt(recording)
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings) * 1000
+        print(f"{speech_seconds:>6.0f}s {prepared.original_duration:>8.1f} {prepared.duration:>9.1f} "
+              f"{len(recording) / 1024:>10.0f} {len(prepared.wav) / 1024:>11.0f} "
+              f"{median:>10.1f} {median / prepared.original_duration:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
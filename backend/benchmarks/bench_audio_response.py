@@ -0,0 +1,61 @@
+"""
+Response size and server CPU per request for each audio response mode.
+
+Builds the /practice response for WAV replies of several lengths as JSON with
+base64 (the default), as a raw audio body and as multipart/mixed, and reports
+the body size and the CPU time spent building it.
+
+    python benchmarks/bench_audio_response.py --durations 2 5 10 --rounds 200
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import make_wav
+from routers.practice import audio_response
+
+MODES = {
+    "json+base64": "application/json",
+    "audio body": "audio/*",
+    "multipart": "multipart/mixed",
+}
+
+
+def cpu_ms_per_response(accept: str, audio: bytes, rounds: int):
+    content = {
+        "success": True,
+        "corrected_text": "Yo soy estudiante de español.",
+        "audio_format": "wav",
+        "initial_text": "Yo es estudiante de español.",
+    }
+    started = time.process_time()
+    for _ in range(rounds):
+        response = audio_response(accept, content, audio, audio_field="audio_base64")
+    elapsed = time.process_time() - started
+    return elapsed / rounds * 1000, len(response.body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[2, 5, 10], help="Reply length (seconds)")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'audio':>8} {'mode':>12} {'body KiB':>10} {'vs wav':>8} {'cpu ms':>8}")
+    for duration in args.durations:
+        audio = make_wav(duration=duration, sample_rate=args.sample_rate)
+        for mode, accept in MODES.items():
+            cpu_ms, size = cpu_ms_per_response(accept, audio, args.rounds)
+            print(f"{duration:>7.0f}s {mode:>12} {size / 1024:>10.0f} {size / len(audio):>7.2f}x {cpu_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
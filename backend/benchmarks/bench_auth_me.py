@@ -0,0 +1,91 @@
+"""
+/auth/me throughput with and without the principal cache.
+
+Serves the auth router in-process against a throwaway SQLite database. It
+drives authenticated requests with a handful of users' tokens and reports
+requests per second and how many database sessions were opened.
+
+    python benchmarks/bench_auth_me.py --requests 2000 --users 10
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import auth
+from auth import create_access_token
+from database import Base
+from models.user import User
+from routers import auth as auth_router
+from services.principal_cache import principal_cache
+
+
+async def run_load(app, tokens, total_requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request(i):
+            async with semaphore:
+                response = await client.get("/auth/me", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(total_requests)))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        with factory() as db:
+            db.add_all(User(email=f"user{i}@example.com", google_id=f"g-{i}") for i in range(args.users))
+            db.commit()
+
+        # Each measurement runs in its own event loop, so connections are not pooled across them
+        async_factory = async_sessionmaker(
+            create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db", poolclass=NullPool)
+        )
+        opened = [0]
+
+        def counting_session():
+            opened[0] += 1
+            return async_factory()
+
+        auth.AsyncSessionLocal = counting_session
+        app = FastAPI()
+        app.include_router(auth_router.router)
+        tokens = [create_access_token({"sub": str(i + 1)}) for i in range(args.users)]
+
+        print(f"requests={args.requests} users={args.users} concurrency={args.concurrency}")
+        print(f"{'cache':>8} {'req/s':>10} {'db sessions':>12}")
+        for label, ttl in (("off", 0), ("on", 30)):
+            principal_cache.clear()
+            principal_cache.ttl_seconds = ttl
+            opened[0] = 0
+            elapsed = asyncio.run(run_load(app, tokens, args.requests, args.concurrency))
+            print(f"{label:>8} {args.requests / elapsed:>10.0f} {opened[0]:>12}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+TTS cache hit rate as uvicorn workers are added, per shared cache backend.
+
+Replays one Zipf-distributed stream of phrase lookups, split round-robin across
+N worker processes. Each worker has its own TTSCache with a small in-process
+memory tier in front of the shared tier, and stores the audio on a miss as
+generate_speech would. The "private" rows have no shared tier but a memory tier
+big enough for every phrase: each worker then has to synthesize each phrase for
+itself, so the hit rate falls as N grows. With SQLite (one host) or a
+Redis-protocol server it should stay flat. The Redis runs use the stand-in
+server from fake_resp_server.py unless --redis-url points at a real one.
+
+    python benchmarks/bench_cache_backends.py --workers 1 2 4 8 --lookups 4000 --phrases 500
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ["TTS_CACHE_DIR"] = ""
+
+
+def zipf_stream(lookups: int, phrases: int, exponent: float, seed: int = 7) -> list:
+    weights = [1 / (rank ** exponent) for rank in range(1, phrases + 1)]
+    return random.Random(seed).choices(range(phrases), weights=weights, k=lookups)
+
+
+def run_worker(url: str, stream: list, audio_bytes: int, memory_bytes: int) -> tuple:
+    """One worker's share of the stream; returns (hits, lookups, hit latencies)"""
+    from services.cache_backend import create_cache_backend
+    from services.tts_cache import TTSCache
+
+    backend = create_cache_backend(url, 1 << 30) if url else None
+    cache = TTSCache(memory_max_bytes=memory_bytes, backend=backend)
+    audio = bytes(audio_bytes)
+
+    async def replay():
+        hit_latencies = []
+        for phrase in stream:
+            started = time.perf_counter()
+            if await cache.get(f"phrase-{phrase}") is not None:
+                hit_latencies.append(time.perf_counter() - started)
+            else:
+                await cache.put(f"phrase-{phrase}", audio)
+        return hit_latencies
+
+    hit_latencies = asyncio.run(replay())
+    if backend:
+        backend.close()
+    return len(hit_latencies), len(stream), hit_latencies
+
+
+def measure(url: str, stream: list, workers: int, args) -> tuple:
+    # Without a shared tier, give memory the whole budget so only sharing differs
+    memory_bytes = args.memory_kib * 1024 if url else 1 << 30
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers) as pool:
+        results = pool.starmap(run_worker, [
+            (url, stream[worker::workers], args.audio_kib * 1024, memory_bytes)
+            for worker in range(workers)
+        ])
+    hits = sum(result[0] for result in results)
+    lookups = sum(result[1] for result in results)
+    latencies = [latency for result in results for latency in result[2]]
+    return hits / lookups, statistics.median(latencies) * 1000 if latencies else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--lookups", type=int, default=4000)
+    parser.add_argument("--phrases", type=int, default=500, help="Distinct phrases in the stream")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent of phrase popularity")
+    parser.add_argument("--audio-kib", type=int, default=40, help="Size of each cached clip")
+    parser.add_argument("--memory-kib", type=int, default=2048, help="In-process tier per worker")
+    parser.add_argument("--redis-url", default=None, help="A real Redis instead of the stand-in")
+    args = parser.parse_args()
+
+    from benchmarks.fake_resp_server import running_server
+    from services.cache_backend import create_cache_backend
+
+    stream = zipf_stream(args.lookups, args.phrases, args.zipf)
+    print(f"{args.lookups} lookups of {args.phrases} phrases (zipf {args.zipf}), "
+          f"{args.audio_kib} KiB clips, {args.memory_kib} KiB memory tier per worker")
+    print(f"{'backend':<8} {'workers':>7} {'hit rate':>9} {'p50 hit ms':>11}")
+
+    with tempfile.TemporaryDirectory() as scratch, running_server() as (_, port):
+        redis_url = args.redis_url or f"redis://127.0.0.1:{port}/0"
+        for name in ("private", "sqlite", "redis"):
+            for workers in args.workers:
+                if name == "private":
+                    url = None
+                elif name == "sqlite":
+                    url = f"sqlite:///{Path(scratch) / f'cache-{workers}.db'}"
+                else:
+                    url = redis_url
+                    create_cache_backend(url, 0).clear()
+                hit_rate, p50 = measure(url, stream, workers, args)
+                print(f"{name:<8} {workers:>7} {hit_rate:>9.1%} {p50:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
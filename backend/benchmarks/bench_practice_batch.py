@@ -0,0 +1,96 @@
+"""
+Wall-clock time to grade a set of recordings: one /practice call per clip vs /practice/batch.
+
+Sequential runs the /practice pipeline (transcribe, correct, synthesize) clip by
+clip, as a client looping over the set would. Batch runs the /practice/batch
+event stream: concurrent transcription, one Gemini request for every
+correction, and synthesis fanned out under PRACTICE_BATCH_TTS_CONCURRENCY.
+Every transcript and correction is unique, so the caches don't help either side.
+
+    python benchmarks/bench_practice_batch.py --clips 30 --stt-latency 0.3 --llm-latency 0.5 --tts-latency 0.4
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DEEPGRAM_API_KEY", "benchmark")
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from config import settings
+from fastapi import UploadFile
+from routers import practice
+from schemas.tts import TTSRequest
+from services.llm_cache import llm_cache
+from services.tts_cache import tts_cache
+from services.vendor_clients import VendorClients, install_vendor_clients
+
+
+async def sequential(clips: list) -> int:
+    for clip in clips:
+        transcription = await practice.transcribe_audio(clip, "es")
+        correction = await practice.get_correction(text=transcription['text'], language="es")
+        await practice.generate_speech(TTSRequest(transcript=correction['corrected_text'], model_id="bench-voice"))
+    return len(clips)
+
+
+async def batch(clips: list) -> int:
+    succeeded = 0
+    uploads = [UploadFile(io.BytesIO(clip), size=len(clip), filename=f"clip{index}.wav")
+               for index, clip in enumerate(clips)]
+    async for event in practice.practice_batch_events(uploads, "es", "bench-voice", "wav", None):
+        if event.startswith("event: done"):
+            succeeded = int(event.split('"succeeded": ')[1].split(",")[0])
+    return succeeded
+
+
+def measure(run, clips: list, vendors: VendorClients) -> tuple:
+    """Seconds to grade the set, clips graded, and Gemini calls made"""
+    llm_cache.clear()
+    tts_cache.clear()
+    gemini_calls = vendors.gemini.calls
+    started = time.perf_counter()
+    graded = asyncio.run(run(clips))
+    return time.perf_counter() - started, graded, vendors.gemini.calls - gemini_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=30)
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="Deepgram time per clip (seconds)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Gemini time to first token (seconds)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Gemini time per word (seconds)")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="Fish Audio fixed cost per call (seconds)")
+    parser.add_argument("--stt-concurrency", type=int, default=settings.PRACTICE_BATCH_STT_CONCURRENCY)
+    parser.add_argument("--tts-concurrency", type=int, default=settings.PRACTICE_BATCH_TTS_CONCURRENCY)
+    args = parser.parse_args()
+
+    settings.PRACTICE_BATCH_STT_CONCURRENCY = args.stt_concurrency
+    settings.PRACTICE_BATCH_TTS_CONCURRENCY = args.tts_concurrency
+    vendors = VendorClients(
+        deepgram=FakeDeepgramClient(latency=args.stt_latency, vary=True),
+        gemini=FakeGenAIClient(latency=args.llm_latency, token_latency=args.token_latency, vary=True),
+        fish_audio=FakeFishAudio(latency=args.tts_latency)
+    )
+    install_vendor_clients(vendors)
+    clips = [make_wav(duration=1.0, frequency=220.0 + index) for index in range(args.clips)]
+
+    print(f"{args.clips} clips; stt {args.stt_concurrency} and tts {args.tts_concurrency} at a time in the batch")
+    print(f"{'path':>12} {'wall s':>8} {'graded':>7} {'llm calls':>10}")
+    results = {}
+    for name, run in (("sequential", sequential), ("batch", batch)):
+        results[name] = measure(run, clips, vendors)
+        elapsed, graded, llm_calls = results[name]
+        print(f"{name:>12} {elapsed:>8.2f} {graded:>7} {llm_calls:>10}")
+    print(f"speedup: {results['sequential'][0] / results['batch'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
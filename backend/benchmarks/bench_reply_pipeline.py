@@ -0,0 +1,90 @@
+"""
+End-to-end latency of the reply path: sequential vs sentence-pipelined.
+
+Sequential waits for the whole Gemini reply and then synthesizes it in one call.
+Pipelined streams the reply, cuts it into sentences and starts Fish Audio on
+each sentence while the rest is still generating. Both use fake vendors with
+per-token and per-character latency so the stage costs scale with reply length.
+
+    python benchmarks/bench_reply_pipeline.py --token-latency 0.03 --tts-latency 0.4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import FakeFishAudio, FakeGenAIClient
+from routers import conversation, practice
+from schemas.tts import TTSRequest
+from services.audio import concat_wav
+from services.llm_cache import llm_cache
+from services.sentence_pipeline import synthesize_sentences
+from services.tts_cache import tts_cache
+from services.vendor_clients import VendorClients, install_vendor_clients
+
+REPLY = (
+    "¡Qué interesante que estés aprendiendo español! "
+    "Yo también estudié idiomas durante muchos años y sé que al principio cuesta un poco. "
+    "¿Qué es lo que más te gusta de practicar conmigo cada día?"
+)
+
+
+async def sequential(model_id: str):
+    reply = await conversation.get_reply("Hola", [], "es")
+    return await practice.generate_speech(TTSRequest(transcript=reply['reply'], model_id=model_id))
+
+
+async def pipelined(model_id: str):
+    segments = [audio async for _, audio in synthesize_sentences(
+        conversation.stream_reply("Hola", [], "es"),
+        conversation.speech_synthesizer(model_id)
+    )]
+    return concat_wav(segments)
+
+
+def measure(run, rounds: int):
+    latencies = []
+    for _ in range(rounds):
+        # Every round must pay the full vendor cost
+        llm_cache.clear()
+        tts_cache.clear()
+        started = time.perf_counter()
+        asyncio.run(run("bench-voice"))
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token", type=float, default=0.3, help="Gemini time to first token (seconds)")
+    parser.add_argument("--token-latency", type=float, default=0.03, help="Gemini time per word (seconds)")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="Fish Audio fixed cost per call (seconds)")
+    parser.add_argument("--tts-per-char", type=float, default=0.008, help="Fish Audio cost per character (seconds)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    install_vendor_clients(VendorClients(
+        gemini=FakeGenAIClient(latency=args.first_token, token_latency=args.token_latency, reply=REPLY),
+        fish_audio=FakeFishAudio(latency=args.tts_latency, latency_per_char=args.tts_per_char)
+    ))
+
+    sequential_p50 = measure(sequential, args.rounds)
+    pipelined_p50 = measure(pipelined, args.rounds)
+
+    print(f"reply: {len(REPLY.split())} words, {len(REPLY)} chars")
+    print(f"{'path':>12} {'p50 s':>8}")
+    print(f"{'sequential':>12} {sequential_p50:>8.2f}")
+    print(f"{'pipelined':>12} {pipelined_p50:>8.2f}")
+    print(f"speedup: {sequential_p50 / pipelined_p50:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
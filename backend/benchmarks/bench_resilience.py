@@ -0,0 +1,93 @@
+"""
+Tail latency of vendor calls with and without deadlines and hedging.
+
+Sends a stream of calls to a fake vendor whose latency is log-normal with a long
+tail (median and p99 set below) and reports p50/p95/p99/max as the caller sees
+them for three set-ups:
+
+    raw       run_vendor_call, no timeout: the tail passes straight through
+    hedged    call_vendor without a deadline: slow calls get a duplicate
+    deadline  call_vendor within a per-call budget: hedged, and nothing takes
+              longer than the budget (those calls fail with a 504 instead)
+
+    python benchmarks/bench_resilience.py --calls 400 --median-ms 200 --p99-ms 4000 --budget 1.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import Latency
+from benchmarks.load_test import percentile
+from fastapi import HTTPException
+from services.resilience import call_stats, call_vendor, request_deadline, reset_resilience
+from services.vendor_pool import GEMINI, configure_vendor_pools, run_vendor_call, shutdown_vendor_pools
+
+
+async def replay(mode: str, latency: Latency, calls: int, concurrency: int, budget: float) -> tuple:
+    """Latencies of the calls that succeeded, and how many failed"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failed = 0
+
+    def vendor_call():
+        time.sleep(latency.sample())
+        return "ok"
+
+    async def one():
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if mode == "raw":
+                    await run_vendor_call(GEMINI, vendor_call)
+                elif mode == "hedged":
+                    await call_vendor(GEMINI, "llm", vendor_call)
+                else:
+                    with request_deadline(budget, {"llm": 1}):
+                        await call_vendor(GEMINI, "llm", vendor_call)
+            except HTTPException:
+                failed += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(latencies), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight at once")
+    parser.add_argument("--median-ms", type=float, default=200)
+    parser.add_argument("--p99-ms", type=float, default=4000)
+    parser.add_argument("--budget", type=float, default=1.5, help="Deadline per call in the deadline mode (s)")
+    parser.add_argument("--hedge-ratio", type=float, default=0.1, help="Max hedges per call")
+    args = parser.parse_args()
+
+    from config import settings
+    settings.HEDGE_MAX_RATIO = args.hedge_ratio
+    # Room for the hedges next to the calls themselves
+    configure_vendor_pools({GEMINI: args.concurrency * 4})
+
+    print(f"{args.calls} calls, {args.concurrency} at a time, vendor latency median {args.median_ms:.0f} ms, "
+          f"p99 {args.p99_ms:.0f} ms")
+    print(f"{'mode':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'failed':>7} {'hedges':>7} {'won':>5}")
+    for mode in ("raw", "hedged", "deadline"):
+        reset_resilience()
+        latency = Latency(args.median_ms / 1000, args.p99_ms / 1000, seed=11)
+        latencies, failed = asyncio.run(replay(mode, latency, args.calls, args.concurrency, args.budget))
+        stats = call_stats[GEMINI]
+        row = [percentile(latencies, q) * 1000 for q in (0.5, 0.95, 0.99)] + [latencies[-1] * 1000]
+        print(f"{mode:<9} " + " ".join(f"{value:>8.0f}" for value in row)
+              + f" {failed:>7} {stats.hedges:>7} {stats.hedge_wins:>5}")
+    shutdown_vendor_pools(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start cost of a worker: how long `import main` takes, and what it loads.
+
+Each run starts a fresh interpreter with `python -X importtime -c "import main"`
+against a throwaway SQLite database, parses the import log from stderr and
+reports the median self-inclusive time of the app import, the slowest top-level
+modules, and whether any vendor SDK (deepgram, google.genai, fishaudio) was
+imported. Those should only load in the lifespan hook or on first use. With
+--lifespan the startup hook is timed as well, in a separate interpreter.
+
+    python benchmarks/bench_startup.py --runs 5 --top 10 --lifespan
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+VENDOR_SDKS = ("deepgram", "google.genai", "fishaudio")
+
+LIFESPAN_SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def start():
+    async with main.lifespan(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(f"{(imported - started) * 1000:.1f} {(ready - imported) * 1000:.1f}")
+"""
+
+
+def run_python(args, database: Path) -> subprocess.CompletedProcess:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run([sys.executable, *args], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(log: str) -> dict:
+    """Cumulative microseconds per module, keyed by name, with its nesting depth"""
+    modules = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(cumulative), depth)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports under main to list")
+    parser.add_argument("--lifespan", action="store_true", help="Also time the lifespan startup hook")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database = Path(scratch) / "startup.db"
+        totals = []
+        per_module = defaultdict(list)
+        loaded_sdks = set()
+        for _ in range(args.runs):
+            modules = parse_importtime(run_python(["-X", "importtime", "-c", "import main"], database).stderr)
+            totals.append(modules["main"][0] / 1000)
+            for name, (cumulative, depth) in modules.items():
+                if depth == 1:
+                    per_module[name].append(cumulative / 1000)
+            loaded_sdks.update(sdk for sdk in VENDOR_SDKS if sdk in modules)
+
+        print(f"import main: median {statistics.median(totals):.0f} ms "
+              f"(min {min(totals):.0f}, max {max(totals):.0f}) over {args.runs} runs")
+        print(f"\n{'module':<40} {'median ms':>10}")
+        slowest = sorted(per_module.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for name, timings in slowest[:args.top]:
+            print(f"{name:<40} {statistics.median(timings):>10.1f}")
+        print(f"\nvendor SDKs imported by `import main`: {', '.join(sorted(loaded_sdks)) or 'none'}")
+
+        if args.lifespan:
+            imports, startups = [], []
+            for _ in range(args.runs):
+                imported, started = run_python(["-c", LIFESPAN_SCRIPT], database).stdout.split()
+                imports.append(float(imported))
+                startups.append(float(started))
+            print(f"\nimport + lifespan startup: median {statistics.median(imports):.0f} ms + "
+                  f"{statistics.median(startups):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
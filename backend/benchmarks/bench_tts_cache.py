@@ -0,0 +1,83 @@
+"""
+Latency benchmark for the TTS cache.
+
+Calls generate_speech against a fake Fish Audio with an injected synthesis
+latency and reports p50 latency for misses, memory hits and disk hits.
+
+    python benchmarks/bench_tts_cache.py --latency 1.0 --phrases 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("TTS_CACHE_DIR", "")
+
+from benchmarks.fake_vendors import FakeFishAudio
+from routers import practice
+from schemas.tts import TTSRequest
+from services import tts_cache as tts_cache_module
+from services.tts_cache import TTSCache
+from services.vendor_clients import VendorClients, install_vendor_clients
+
+
+async def timed_calls(phrases):
+    latencies = []
+    for phrase in phrases:
+        started = time.perf_counter()
+        await practice.generate_speech(TTSRequest(transcript=phrase, model_id="adam"))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def use_cache(cache: TTSCache) -> None:
+    tts_cache_module.tts_cache = cache
+    practice.tts_cache = cache
+
+
+def p50_ms(latencies):
+    return statistics.median(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="Injected Fish Audio latency (seconds)")
+    parser.add_argument("--phrases", type=int, default=20)
+    args = parser.parse_args()
+
+    fish_audio = FakeFishAudio(latency=args.latency)
+    install_vendor_clients(VendorClients(fish_audio=fish_audio))
+    phrases = [f"Hola, ¿cómo estás? Frase número {i}." for i in range(args.phrases)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def new_cache():
+            return TTSCache(memory_max_bytes=64 * 1024 * 1024, disk_dir=Path(cache_dir),
+                            disk_max_bytes=1024 * 1024 * 1024)
+
+        use_cache(new_cache())
+        misses = asyncio.run(timed_calls(phrases))
+        memory_hits = asyncio.run(timed_calls(phrases))
+
+        # A fresh instance on the same directory simulates a restarted worker
+        use_cache(new_cache())
+        disk_hits = asyncio.run(timed_calls(phrases))
+        stats = practice.tts_cache.stats()
+
+    print(f"synthesis latency={args.latency * 1000:.0f}ms phrases={args.phrases} "
+          f"audio={len(fish_audio.audio) / 1024:.0f}KiB")
+    print(f"{'path':>12} {'p50 ms':>10}")
+    print(f"{'miss':>12} {p50_ms(misses):>10.2f}")
+    print(f"{'memory hit':>12} {p50_ms(memory_hits):>10.3f}")
+    print(f"{'disk hit':>12} {p50_ms(disk_hits):>10.3f}")
+    print(f"disk-tier stats after restart: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Concurrency benchmark for the per-vendor thread pools.
+
+Drives /api/practice in-process with fake vendors that block for a fixed latency
+and reports requests per second for each pool size. With the SDK calls on the
+event loop throughput is pinned at one request per (STT + LLM + TTS) latency; with
+the pools it should scale roughly linearly until the pool size reaches the
+client concurrency.
+
+    python benchmarks/bench_vendor_pool.py --latency 0.05 --pool-sizes 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("DEEPGRAM_API_KEY", "benchmark")
+# Every request is identical, so the response caches would hide the vendor cost
+os.environ["TTS_CACHE_MEMORY_MB"] = "0"
+os.environ["TTS_CACHE_DIR"] = ""
+os.environ["LLM_CACHE_MAX_ENTRIES"] = "0"
+
+import httpx
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from main import app
+from services.vendor_clients import VendorClients, install_vendor_clients
+from services.vendor_pool import VENDORS, configure_vendor_pools, shutdown_vendor_pools
+
+
+def install_fakes(latency: float) -> None:
+    install_vendor_clients(VendorClients(
+        deepgram=FakeDeepgramClient(latency=latency),
+        gemini=FakeGenAIClient(latency=latency),
+        fish_audio=FakeFishAudio(latency=latency)
+    ))
+
+
+async def run_load(total_requests: int, concurrency: int) -> float:
+    upload = make_wav(duration=0.5)
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request():
+            async with semaphore:
+                response = await client.post(
+                    "/api/practice",
+                    files={"file": ("audio.wav", upload, "audio/wav")},
+                    data={"target_lang": "es", "model_id": "bench-voice"},
+                )
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total_requests)))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected latency per vendor call (seconds)")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per pool size")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client requests")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    install_fakes(args.latency)
+
+    print(f"latency/call={args.latency * 1000:.0f}ms requests={args.requests} concurrency={args.concurrency}")
+    print(f"{'pool size':>10} {'seconds':>10} {'req/s':>10}")
+    for size in args.pool_sizes:
+        configure_vendor_pools({vendor: size for vendor in VENDORS})
+        elapsed = asyncio.run(run_load(args.requests, args.concurrency))
+        print(f"{size:>10} {elapsed:>10.2f} {args.requests / elapsed:>10.1f}")
+    shutdown_vendor_pools()
+
+
+if __name__ == "__main__":
+    main()
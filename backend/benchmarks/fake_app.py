@@ -0,0 +1,75 @@
+"""
+The real app, with Deepgram, Gemini and Fish Audio replaced by the in-process
+fakes, so a worker can be load-tested with no network and no vendor bill.
+
+    FAKE_STT_LATENCY=300,900 FAKE_ERROR_RATE=0.01 uvicorn benchmarks.fake_app:app --workers 2
+
+Everything from the router down is the production code path: admission control,
+vendor pools, caches, single-flight and the clone job queue. The fakes are
+configured from the environment (latencies as "median" or "median,p99" in ms):
+
+    FAKE_STT_LATENCY     Deepgram transcription       default 300,900
+    FAKE_LLM_LATENCY     Gemini time to first token   default 500,1500
+    FAKE_LLM_TOKEN_MS    Gemini time per word         default 20
+    FAKE_TTS_LATENCY     Fish Audio synthesis         default 700,2000
+    FAKE_CLONE_LATENCY   Fish Audio voice cloning     default 3000,8000
+    FAKE_TTS_CHUNK_SIZE  streamed TTS chunk bytes     default 8192
+    FAKE_ERROR_RATE      share of failing calls       default 0
+    FAKE_VARY            unique transcripts and       default 1
+                         replies (1) or identical (0)
+"""
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# The routers check for a key before using a client; the fakes need none
+os.environ.setdefault("FISH_AUDIO_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("DEEPGRAM_API_KEY", "benchmark")
+# Warm-up syntheses would compete with the measured requests; opt in with PREWARM_ENABLED=true
+os.environ.setdefault("PREWARM_ENABLED", "false")
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, Latency
+from main import app, lifespan as app_lifespan
+from services.vendor_clients import VendorClients, install_vendor_clients
+
+
+def _latency(name: str, default: str) -> Latency:
+    # Each worker draws its own sequence; a shared seed would synchronise them
+    return Latency.parse(os.getenv(name, default))
+
+
+def fake_vendor_clients() -> VendorClients:
+    error_rate = float(os.getenv("FAKE_ERROR_RATE", "0"))
+    return VendorClients(
+        deepgram=FakeDeepgramClient(
+            latency=_latency("FAKE_STT_LATENCY", "300,900"),
+            error_rate=error_rate,
+            vary=os.getenv("FAKE_VARY", "1") == "1"
+        ),
+        gemini=FakeGenAIClient(
+            latency=_latency("FAKE_LLM_LATENCY", "500,1500"),
+            token_latency=float(os.getenv("FAKE_LLM_TOKEN_MS", "20")) / 1000,
+            error_rate=error_rate,
+            vary=os.getenv("FAKE_VARY", "1") == "1"
+        ),
+        fish_audio=FakeFishAudio(
+            latency=_latency("FAKE_TTS_LATENCY", "700,2000"),
+            clone_latency=_latency("FAKE_CLONE_LATENCY", "3000,8000"),
+            chunk_size=int(os.getenv("FAKE_TTS_CHUNK_SIZE", "8192")),
+            error_rate=error_rate
+        )
+    )
+
+
+@asynccontextmanager
+async def lifespan(application):
+    async with app_lifespan(application):
+        # Replaces whatever real clients the app opened from the keys in the environment
+        install_vendor_clients(fake_vendor_clients())
+        yield
+
+
+app.router.lifespan_context = lifespan
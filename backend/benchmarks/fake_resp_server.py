@@ -0,0 +1,173 @@
+"""
+A small in-memory server speaking the Redis protocol (RESP2), standing in for
+Redis when testing or benchmarking the shared cache tier without one installed.
+
+It implements the commands services.cache_backend.RedisBackend uses (PING, AUTH,
+SELECT, GET, SET with EX/PX, DEL, EXISTS, SCAN with MATCH, DBSIZE, FLUSHDB) with
+key expiry, over asyncio on one thread. It has no persistence and no eviction.
+
+    python benchmarks/fake_resp_server.py --port 6380
+    CACHE_BACKEND_URL=redis://127.0.0.1:6380/0 uvicorn main:app --workers 4
+"""
+import argparse
+import asyncio
+import fnmatch
+import threading
+import time
+from contextlib import contextmanager
+
+
+class FakeRespServer:
+    def __init__(self, password: str = None):
+        self.password = password
+        self.databases = {}  # db -> {key: (value, expires_at)}
+        self.commands = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        db = 0
+        authenticated = self.password is None
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                self.commands += 1
+                name = args[0].upper()
+                if name == b"QUIT":
+                    writer.write(b"+OK\r\n")
+                    break
+                if name == b"AUTH":
+                    authenticated = args[-1].decode() == self.password
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name == b"SELECT":
+                    db = int(args[1])
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(self.execute(self.databases.setdefault(db, {}), name, args[1:]))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def execute(self, data: dict, name: bytes, args: list) -> bytes:
+        now = time.time()
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"GET":
+            value = self._live(data, args[0], now)
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            expires_at = None
+            options = [arg.upper() for arg in args[2:]]
+            if b"PX" in options:
+                expires_at = now + int(args[2 + options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                expires_at = now + int(args[2 + options.index(b"EX") + 1])
+            data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name in (b"DEL", b"EXISTS"):
+            found = [key for key in args if self._live(data, key, now) is not None]
+            if name == b"DEL":
+                for key in found:
+                    del data[key]
+            return b":%d\r\n" % len(found)
+        if name == b"SCAN":
+            # One pass over everything; the cursor always comes back as 0
+            options = [arg.upper() for arg in args[1:]]
+            pattern = args[1 + options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+            keys = [key for key in list(data) if self._live(data, key, now) is not None
+                    and fnmatch.fnmatchcase(key.decode("utf-8", "replace"), pattern.decode("utf-8", "replace"))]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(
+                b"$%d\r\n%s\r\n" % (len(key), key) for key in keys)
+        if name == b"DBSIZE":
+            return b":%d\r\n" % sum(1 for key in list(data) if self._live(data, key, now) is not None)
+        if name == b"FLUSHDB":
+            data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    @staticmethod
+    def _live(data: dict, key: bytes, now: float):
+        entry = data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del data[key]
+            return None
+        return value
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+
+@contextmanager
+def running_server(host: str = "127.0.0.1", port: int = 0, password: str = None):
+    """Serve on a background thread; yields (server, port)"""
+    server = FakeRespServer(password)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    listening = {}
+
+    async def serve():
+        listener = await asyncio.start_server(server.handle, host, port)
+        listening["port"] = listener.sockets[0].getsockname()[1]
+        listening["listener"] = listener
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, name="fake-resp-server", daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(serve(), loop)
+    started.wait(timeout=5)
+
+    async def shutdown():
+        listening["listener"].close()
+        connections = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    try:
+        yield server, listening["port"]
+    finally:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--password", default=None)
+    args = parser.parse_args()
+
+    async def serve():
+        listener = await asyncio.start_server(FakeRespServer(args.password).handle, args.host, args.port)
+        print(f"listening on {args.host}:{args.port}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+In-process stand-ins for the Deepgram (batch and streaming), Gemini and Fish
+Audio SDK clients.
+
+They mimic the parts of each SDK that the routers touch and block the calling
+thread for a configurable latency, just like the real synchronous clients do
+while waiting on the network. A latency is either a fixed number of seconds or a
+Latency distribution, and `error_rate` makes that fraction of calls raise
+FakeVendorError, as a vendor outage or timeout would.
+"""
+import asyncio
+import io
+import json
+import math
+import random
+import re
+import struct
+import time
+import wave
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from services.stt import StreamingTranscriber, StreamingTranscription, TranscriptEvent
+
+
+def make_wav(duration: float = 1.0, sample_rate: int = 16000, frequency: float = 220.0) -> bytes:
+    """Build a mono 16-bit WAV containing a sine tone"""
+    frame_count = int(duration * sample_rate)
+    samples = (
+        int(12000 * math.sin(2 * math.pi * frequency * i / sample_rate))
+        for i in range(frame_count)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(struct.pack(f"<{frame_count}h", *samples))
+    return buffer.getvalue()
+
+
+def wav_duration(wav: bytes) -> float:
+    with wave.open(io.BytesIO(wav), 'rb') as reader:
+        return reader.getnframes() / reader.getframerate()
+
+
+def make_encoded_audio(audio_format: str, duration: float, bitrate: int) -> bytes:
+    """
+    Placeholder MP3/Opus bytes: the right magic bytes and the size a real encoder
+    would produce at `bitrate` kbps, without actually encoding anything.
+    """
+    magic = b"ID3\x04\x00\x00\x00\x00\x00\x00" if audio_format == "mp3" else b"OggS\x00\x02"
+    size = int(duration * bitrate * 1000 / 8)
+    return magic + bytes(max(0, size - len(magic)))
+
+
+class Latency:
+    """
+    A log-normal latency distribution given by its median and 99th percentile
+    (seconds), the long-tailed shape vendor APIs show. Without p99 it is fixed.
+    """
+
+    def __init__(self, median: float, p99: float = None, seed: int = None):
+        if p99 is not None and p99 < median:
+            raise ValueError("p99 must be at least the median")
+        self.median = median
+        self.p99 = p99
+        # z-score of the 99th percentile of a standard normal
+        self.sigma = math.log(p99 / median) / 2.326 if p99 and median > 0 else 0.0
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = None) -> "Latency":
+        """From "median" or "median,p99" in milliseconds, e.g. "300,900" """
+        values = [float(value) / 1000 for value in spec.split(",")]
+        return cls(values[0], values[1] if len(values) > 1 else None, seed=seed)
+
+    def sample(self) -> float:
+        if self.sigma == 0.0:
+            return self.median
+        return self._random.lognormvariate(math.log(self.median), self.sigma)
+
+
+class FakeVendorError(Exception):
+    """Raised by a fake vendor for the `error_rate` share of its calls, as a 503 would be"""
+    status_code = 503
+
+
+class _FakeVendor:
+    def __init__(self, latency=0.0, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        """One draw from the latency (seconds)"""
+        return self.latency.sample() if isinstance(self.latency, Latency) else self.latency
+
+    def _call(self, extra: float = 0.0) -> None:
+        """Count a call, block for its latency, and fail it at the error rate"""
+        self.calls += 1
+        time.sleep(self._delay() + extra)
+        self._maybe_fail()
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.failures += 1
+            raise FakeVendorError(f"{type(self).__name__}: simulated vendor error")
+
+
+class FakeDeepgramClient(_FakeVendor):
+    """
+    Mimics `DeepgramClient().listen.v1.media.transcribe_file`. With `vary` every
+    transcript is made unique, so load tests aren't flattered by the response
+    caches and request coalescing.
+    """
+
+    def __init__(self, latency=0.0, transcript: str = "Yo es estudiante de español.",
+                 error_rate: float = 0.0, vary: bool = False, seed: int = None):
+        super().__init__(latency, error_rate, seed)
+        self.transcript = transcript
+        self.vary = vary
+        self.listen = SimpleNamespace(
+            v1=SimpleNamespace(media=SimpleNamespace(transcribe_file=self.transcribe_file))
+        )
+
+    def transcribe_file(self, *, request, **options):
+        self._call()
+        transcript = f"{self.transcript} ({self.calls})" if self.vary else self.transcript
+        alternative = SimpleNamespace(transcript=transcript, confidence=0.98)
+        channel = SimpleNamespace(alternatives=[alternative])
+        return SimpleNamespace(results=SimpleNamespace(channels=[channel]))
+
+
+class FakeGenAIClient(_FakeVendor):
+    """
+    Mimics `genai.Client().models.generate_content` for the correction, batch
+    correction, reply and conversation summary prompts, and
+    `generate_content_stream` for the streamed reply.
+
+    `latency` is the time to first token and `token_latency` the time per word
+    after that, so a full response takes latency + token_latency * words. With
+    `vary` every correction and reply is unique, so their speech isn't cached.
+    """
+
+    def __init__(self, latency=0.0, corrected_text: str = "Yo soy estudiante de español.",
+                 reply: str = "¡Qué bien! ¿Cuánto tiempo llevas estudiando?", token_latency: float = 0.0,
+                 summary: str = "El usuario está practicando español.", error_rate: float = 0.0,
+                 vary: bool = False, seed: int = None):
+        super().__init__(latency, error_rate, seed)
+        self.vary = vary
+        self.token_latency = token_latency
+        self.corrected_text = corrected_text
+        self.reply = reply
+        self.summary = summary
+        self.models = SimpleNamespace(
+            generate_content=self.generate_content,
+            generate_content_stream=self.generate_content_stream
+        )
+
+    def generate_content(self, *, model, contents, config=None):
+        if "Summary so far:" in contents:
+            self._call(self.token_latency * len(self.summary.split()))
+            return SimpleNamespace(text=self.summary)
+        if '"corrections"' in contents:
+            # One correction per sentence id listed in the prompt
+            corrections = [{"id": int(sentence_id), "corrected_text": self._text(self.corrected_text)}
+                           for sentence_id in re.findall(r'"id": (\d+)', contents)]
+            text = " ".join(correction["corrected_text"] for correction in corrections)
+            payload = {"corrections": corrections}
+        elif '"reply"' in contents:
+            text = self._text(self.reply)
+            payload = {"reply": text}
+        else:
+            text = self._text(self.corrected_text)
+            payload = {"corrected_text": text}
+        self._call(self.token_latency * len(text.split()))
+        return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
+
+    def _text(self, text: str) -> str:
+        return f"{text} ({self.calls + 1})" if self.vary else text
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        """Streams the plain-text reply word by word"""
+        self._call()
+        for index, word in enumerate(self._text(self.reply).split(" ")):
+            time.sleep(self.token_latency)
+            yield SimpleNamespace(text=word if index == 0 else " " + word)
+
+
+class FakeFishAudio(_FakeVendor):
+    """
+    Mimics `FishAudio().tts.convert`, `.tts.stream` and `.voices.create`.
+
+    WAV requests get `audio`; MP3 and Opus requests get placeholder bytes sized
+    for the same duration at the requested bitrate.
+    """
+
+    def __init__(self, latency=0.0, audio: bytes = None, chunk_size: int = 8192,
+                 latency_per_char: float = 0.0, error_rate: float = 0.0, clone_latency=None,
+                 seed: int = None):
+        super().__init__(latency, error_rate, seed)
+        self.latency_per_char = latency_per_char
+        self.clone_latency = clone_latency
+        self.audio = audio if audio is not None else make_wav(duration=1.0)
+        self.chunk_size = chunk_size
+        self.tts = SimpleNamespace(convert=self.convert, stream=self.stream)
+        self.voices = SimpleNamespace(create=self.create_voice)
+
+    def render(self, format=None, config=None) -> bytes:
+        if format in ("mp3", "opus"):
+            bitrate = getattr(config, f"{format}_bitrate", None) or (128 if format == "mp3" else 32)
+            return make_encoded_audio(format, wav_duration(self.audio), bitrate)
+        return self.audio
+
+    def convert(self, *, text, reference_id=None, format=None, latency=None, config=None, **options):
+        self._call(self.latency_per_char * len(text))
+        return self.render(format, config)
+
+    def stream(self, *, text, reference_id=None, format=None, latency=None, config=None, **options):
+        """Yields the audio in chunks, spreading the latency across them; an error ends the stream early"""
+        self.calls += 1
+        audio = self.render(format, config)
+        chunks = [audio[i:i + self.chunk_size] for i in range(0, len(audio), self.chunk_size)]
+        total = self._delay() + self.latency_per_char * len(text)
+        failing_at = self._random.randrange(len(chunks)) if self.error_rate else None
+        for index, chunk in enumerate(chunks):
+            time.sleep(total / len(chunks))
+            if index == failing_at:
+                self._maybe_fail()
+            yield chunk
+
+    def create_voice(self, *, title, voices, description=None, **options):
+        self.calls += 1
+        clone_latency = self.clone_latency if self.clone_latency is not None else self.latency
+        time.sleep(clone_latency.sample() if isinstance(clone_latency, Latency) else clone_latency)
+        self._maybe_fail()
+        return SimpleNamespace(id=f"fake-voice-{abs(hash(title)) % 10**8}", title=title)
+
+
+class FakeStreamingTranscriber(StreamingTranscriber):
+    """
+    Offline streaming STT. Every audio frame is read as UTF-8 text and comes back as
+    a final segment; an empty frame or finalize() ends the utterance.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.opened = 0
+
+    @asynccontextmanager
+    async def open(self, language: str):
+        self.opened += 1
+        yield _FakeTranscription(self.latency)
+
+
+class _FakeTranscription(StreamingTranscription):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._events = asyncio.Queue()
+
+    async def send(self, frame: bytes) -> None:
+        await asyncio.sleep(self.latency)
+        if frame:
+            await self._events.put(TranscriptEvent(text=frame.decode('utf-8'), is_final=True))
+        else:
+            await self.finalize()
+
+    async def finalize(self) -> None:
+        await self._events.put(TranscriptEvent(text="", is_final=True, speech_final=True))
+
+    async def close(self) -> None:
+        await self._events.put(None)
+
+    async def __aiter__(self):
+        while (event := await self._events.get()) is not None:
+            yield event
@@ -0,0 +1,332 @@
+"""
+Open-loop load test of the voice pipeline against fake vendors, with no network.
+
+Starts uvicorn workers serving benchmarks/fake_app.py (the real app with fake
+Deepgram, Gemini and Fish Audio clients) on a scratch database, then sends
+/api/practice, /api/reply and /api/create_clone requests at a fixed arrival rate
+regardless of how fast they complete. That way a slowdown shows up as queueing
+and shed load, not as a politely lower request rate. Reports p50/p95/p99 latency
+of the successful requests per endpoint, throughput, shed (429/503) and failed
+requests, and the resident memory of every worker before and at peak.
+
+    python benchmarks/load_test.py --rps 20 --duration 30 --workers 2 --save before.json
+    python benchmarks/load_test.py --rps 20 --duration 30 --workers 2 --baseline before.json
+
+Vendor latencies are "median" or "median,p99" in milliseconds; see fake_app.py.
+Per-user admission limits are lifted by default, because every request comes
+from one address and one account; pass --per-user-limit to keep them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+
+ENDPOINTS = {
+    "practice": "/api/practice",
+    "reply": "/api/reply",
+    "clone": "/api/create_clone",
+}
+SHED_STATUSES = (429, 503)
+
+
+def parse_mix(spec: str) -> list:
+    """ "practice=4,reply=4,clone=1" -> an arrival order with those proportions"""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        weights[name] = int(weight or 1)
+    # Interleave rather than send each endpoint's share in a burst
+    order, credit = [], dict.fromkeys(weights, 0.0)
+    for _ in range(sum(weights.values())):
+        for name, weight in weights.items():
+            credit[name] += weight
+        chosen = max(credit, key=credit.get)
+        credit[chosen] -= sum(weights.values())
+        order.append(chosen)
+    return order
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def prepare_database(scratch: Path) -> str:
+    """Create the schema and a load-test user in a scratch database; return that user's bearer token"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch / 'load_test.db'}"
+    os.environ["SECRET_KEY"] = secrets.token_urlsafe(32)
+    from auth import create_access_token
+    from database import Base, SessionLocal, engine
+    from models.user import User
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email="load-test@example.com", name="Load test")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    return create_access_token({"sub": str(user_id)}, expires_delta=timedelta(days=1))
+
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        TTS_CACHE_DIR="",
+        FAKE_STT_LATENCY=args.stt_latency,
+        FAKE_LLM_LATENCY=args.llm_latency,
+        FAKE_TTS_LATENCY=args.tts_latency,
+        FAKE_CLONE_LATENCY=args.clone_latency,
+        FAKE_ERROR_RATE=str(args.error_rate),
+        FAKE_VARY="0" if args.identical else "1",
+    )
+    if args.per_user_limit is None:
+        env["ADMISSION_PER_USER_CONCURRENCY"] = "1000000"
+    else:
+        env["ADMISSION_PER_USER_CONCURRENCY"] = str(args.per_user_limit)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND, env=env
+    )
+
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise SystemExit(f"server exited with status {server.returncode}")
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("server did not become ready")
+
+
+def worker_pids(server_pid: int, workers: int) -> list:
+    """The uvicorn processes serving requests: the server itself, or its worker children"""
+    if workers == 1:
+        return [server_pid]
+    pids = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        parent = int(stat.rsplit(")", 1)[1].split()[1])
+        if parent == server_pid and b"resource_tracker" not in cmdline:
+            pids.append(int(entry.name))
+    return sorted(pids)
+
+
+def resident_memory(pid: int) -> int:
+    """VmRSS in bytes; 0 where /proc is unavailable"""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+async def sample_memory(pids: list, peaks: dict, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        for pid in pids:
+            peaks[pid] = max(peaks.get(pid, 0), resident_memory(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+def make_request_body(endpoint: str, index: int, upload: bytes, model_id: str) -> dict:
+    if endpoint == "clone":
+        # A distinct sample each time, so the clone queue's deduplication doesn't absorb them
+        sample = upload[:-4] + index.to_bytes(4, "little")
+        return {"files": {"file": ("sample.wav", sample, "audio/wav")}, "data": {"voice_name": f"Load {index}"}}
+    return {"files": {"file": ("audio.wav", upload, "audio/wav")},
+            "data": {"target_lang": "es", "model_id": model_id}}
+
+
+async def run_load(base_url: str, token: str, args) -> tuple:
+    from benchmarks.fake_vendors import make_wav
+
+    upload = make_wav(duration=1.5)
+    order = parse_mix(args.mix)
+    total = int(args.rps * args.duration)
+    results = []
+    in_flight = set()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout,
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        async def send(endpoint: str, index: int):
+            started = time.perf_counter()
+            try:
+                response = await client.post(ENDPOINTS[endpoint],
+                                             **make_request_body(endpoint, index, upload, args.model_id))
+                await response.aread()
+                outcome = response.status_code
+            except httpx.HTTPError as error:
+                outcome = type(error).__name__
+            results.append((endpoint, outcome, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        for index in range(total):
+            # Open loop: request i leaves at i / rps, however the earlier ones are doing
+            delay = started + index / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = order[index % len(order)]
+            if len(in_flight) >= args.max_in_flight:
+                results.append((endpoint, "client_overloaded", 0.0))
+                continue
+            task = asyncio.create_task(send(endpoint, index))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        sending = time.perf_counter() - started
+        if in_flight:
+            await asyncio.wait(set(in_flight))
+        elapsed = time.perf_counter() - started
+    return results, sending, elapsed
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    summary = {}
+    for endpoint in [*ENDPOINTS, "all"]:
+        rows = [row for row in results if endpoint == "all" or row[0] == endpoint]
+        if not rows:
+            continue
+        ok = sorted(latency for _, outcome, latency in rows if isinstance(outcome, int) and outcome < 400)
+        shed = sum(1 for _, outcome, _ in rows if outcome in SHED_STATUSES)
+        summary[endpoint] = {
+            "sent": len(rows),
+            "ok": len(ok),
+            "shed": shed,
+            "failed": len(rows) - len(ok) - shed,
+            "p50_ms": percentile(ok, 0.50) * 1000,
+            "p95_ms": percentile(ok, 0.95) * 1000,
+            "p99_ms": percentile(ok, 0.99) * 1000,
+            "throughput_rps": len(ok) / elapsed,
+        }
+    return summary
+
+
+def print_summary(summary: dict, baseline: dict = None) -> None:
+    print(f"\n{'endpoint':<10} {'sent':>6} {'ok':>6} {'shed':>6} {'failed':>7} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ok/s':>8}")
+    for endpoint, row in summary.items():
+        print(f"{endpoint:<10} {row['sent']:>6} {row['ok']:>6} {row['shed']:>6} {row['failed']:>7} "
+              f"{row['p50_ms']:>9.0f} {row['p95_ms']:>9.0f} {row['p99_ms']:>9.0f} {row['throughput_rps']:>8.2f}")
+        if baseline and endpoint in baseline:
+            before = baseline[endpoint]
+            changes = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                if before[key] and before[key] == before[key]:
+                    changes.append(f"{(row[key] / before[key] - 1) * 100:>+8.1f}%")
+                else:
+                    changes.append(f"{'n/a':>9}")
+            print(f"{'  vs base':<10} {'':>6} {'':>6} {'':>6} {'':>7} {' '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=10, help="Arrival rate across all endpoints")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of arrivals")
+    parser.add_argument("--mix", default="practice=4,reply=4,clone=1", help="Endpoint weights")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--stt-latency", default="300,900", help="Deepgram latency, ms")
+    parser.add_argument("--llm-latency", default="500,1500", help="Gemini time to first token, ms")
+    parser.add_argument("--tts-latency", default="700,2000", help="Fish Audio synthesis latency, ms")
+    parser.add_argument("--clone-latency", default="3000,8000", help="Fish Audio cloning latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of vendor calls that fail")
+    parser.add_argument("--identical", action="store_true",
+                        help="Same transcript every time, so caches and coalescing absorb the load")
+    parser.add_argument("--per-user-limit", type=int, default=None, help="Keep per-user admission at this limit")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Client-side cap on open requests")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout, seconds")
+    parser.add_argument("--model-id", default="load-test-voice", help="Voice model id for TTS")
+    parser.add_argument("--save", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare against results saved with --save")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        token = prepare_database(Path(scratch))
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(args, port)
+        try:
+            asyncio.run(wait_until_ready(base_url, server))
+            pids = worker_pids(server.pid, args.workers)
+            idle = {pid: resident_memory(pid) for pid in pids}
+            peaks = dict(idle)
+
+            async def measured_run():
+                stop = asyncio.Event()
+                sampler = asyncio.create_task(sample_memory(pids, peaks, stop))
+                try:
+                    return await run_load(base_url, token, args)
+                finally:
+                    stop.set()
+                    await sampler
+
+            print(f"{args.rps:g} requests/s for {args.duration:g}s ({args.mix}) against {args.workers} worker(s)")
+            results, sending, elapsed = asyncio.run(measured_run())
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary = summarize(results, elapsed)
+    baseline = json.loads(args.baseline.read_text())["endpoints"] if args.baseline else None
+    print(f"sent for {sending:.1f}s, drained after {elapsed:.1f}s")
+    print_summary(summary, baseline)
+
+    outcomes = {}
+    for _, outcome, _ in results:
+        outcomes[str(outcome)] = outcomes.get(str(outcome), 0) + 1
+    print("\noutcomes: " + ", ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+
+    memory = {pid: {"idle_mb": idle[pid] / 2**20, "peak_mb": peaks[pid] / 2**20} for pid in pids}
+    print("\nworker memory (RSS): " + ", ".join(
+        f"pid {pid} {row['idle_mb']:.0f} -> {row['peak_mb']:.0f} MB" for pid, row in memory.items()))
+    if memory:
+        print(f"median peak per worker: {statistics.median(row['peak_mb'] for row in memory.values()):.0f} MB")
+
+    if args.save:
+        args.save.write_text(json.dumps({"args": {key: str(value) for key, value in vars(args).items()},
+                                         "endpoints": summary, "memory": memory, "outcomes": outcomes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+
+# Importing this module has no output; Settings.validate() reports problems once,
+# from the app's lifespan hook. DOTENV_STATUS records what happened here for it.
+DOTENV_STATUS: Optional[str] = None
 
 # Try to load .env file if python-dotenv is available
 try:
@@ -9,15 +13,15 @@ try:
     env_path = Path(__file__).parent / '.env'
     if env_path.exists():
         load_dotenv(env_path, override=True)
-        print(f"✅ Loaded .env from: {env_path}")
     else:
         # Fallback to current directory
         load_dotenv(override=True)
-        print(f"✅ Loaded .env from current directory")
 except ImportError:
-    print("⚠️ python-dotenv not installed, using system environment variables only")
+    DOTENV_STATUS = "python-dotenv not installed, using system environment variables only"
 except Exception as e:
-    print(f"⚠️ Error loading .env file: {e}")
+    DOTENV_STATUS = f"Error loading .env file: {e}"
+
+DEFAULT_SECRET_KEY = "your-secret-key-change-this-in-production"
 
 class Settings:
     # Google OAuth Configuration
@@ -26,13 +30,133 @@ class Settings:
     GOOGLE_REDIRECT_URI: str = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/callback")
     
     # JWT Configuration
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
+    SECRET_KEY: str = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # Server Configuration
     SERVER_URL: str = os.getenv("SERVER_URL", "http://localhost:8000")
 
+    # Vendor call pools: max concurrent blocking SDK calls per vendor and worker
+    DEEPGRAM_POOL_SIZE: int = int(os.getenv("DEEPGRAM_POOL_SIZE", "8"))
+    GEMINI_POOL_SIZE: int = int(os.getenv("GEMINI_POOL_SIZE", "8"))
+    FISH_AUDIO_POOL_SIZE: int = int(os.getenv("FISH_AUDIO_POOL_SIZE", "8"))
+
+    # Decode, trim silence from and downsample recordings before speech-to-text
+    STT_PREPROCESS: bool = os.getenv("STT_PREPROCESS", "true").lower() in ("1", "true", "yes")
+
+    # Admission control for the voice pipeline endpoints: concurrent requests per
+    # endpoint and per user, plus a bounded wait queue with a deadline. Requests past
+    # the limits are rejected with 429/503 and Retry-After. Requests without a token
+    # can be limited per client address too, but that is off (0) by default, since
+    # many users can share one address behind a NAT or proxy.
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADMISSION_PRACTICE_CONCURRENCY: int = int(os.getenv("ADMISSION_PRACTICE_CONCURRENCY", "16"))
+    ADMISSION_REPLY_CONCURRENCY: int = int(os.getenv("ADMISSION_REPLY_CONCURRENCY", "16"))
+    ADMISSION_CLONE_CONCURRENCY: int = int(os.getenv("ADMISSION_CLONE_CONCURRENCY", "2"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+    ADMISSION_PER_USER_CONCURRENCY: int = int(os.getenv("ADMISSION_PER_USER_CONCURRENCY", "2"))
+    ADMISSION_PER_ADDRESS_CONCURRENCY: int = int(os.getenv("ADMISSION_PER_ADDRESS_CONCURRENCY", "0"))
+
+    # Background voice-clone jobs: worker threads, max queued or running jobs, and
+    # how long finished jobs stay available to the status endpoint
+    CLONE_WORKERS: int = int(os.getenv("CLONE_WORKERS", "2"))
+    CLONE_QUEUE_SIZE: int = int(os.getenv("CLONE_QUEUE_SIZE", "50"))
+    CLONE_JOB_TTL_SECONDS: int = int(os.getenv("CLONE_JOB_TTL_SECONDS", str(60 * 60)))
+
+    # /api/practice/batch: clips and total upload size per request, and how many
+    # clips are transcribed and synthesized at once. Its vendor-call budget
+    # covers the whole set.
+    PRACTICE_BATCH_MAX_ITEMS: int = int(os.getenv("PRACTICE_BATCH_MAX_ITEMS", "50"))
+    PRACTICE_BATCH_MAX_MB: float = float(os.getenv("PRACTICE_BATCH_MAX_MB", "32"))
+    PRACTICE_BATCH_STT_CONCURRENCY: int = int(os.getenv("PRACTICE_BATCH_STT_CONCURRENCY", "8"))
+    PRACTICE_BATCH_TTS_CONCURRENCY: int = int(os.getenv("PRACTICE_BATCH_TTS_CONCURRENCY", "4"))
+    PRACTICE_BATCH_DEADLINE_SECONDS: float = float(os.getenv("PRACTICE_BATCH_DEADLINE_SECONDS", "90"))
+
+    # Largest audio upload accepted, per recording (see services/uploads.py).
+    # Bodies over the size are cut off while they arrive; recordings over the
+    # duration are rejected before they are transcribed or cloned.
+    UPLOAD_MAX_MB: float = float(os.getenv("UPLOAD_MAX_MB", "16"))
+    UPLOAD_MAX_SECONDS: float = float(os.getenv("UPLOAD_MAX_SECONDS", "120"))
+
+    # Deadlines, hedging, retries and circuit breakers for vendor calls (see
+    # services/resilience.py). Practice and reply requests get a budget for their
+    # vendor calls, split between stages by DEADLINE_STAGE_WEIGHTS; any other call
+    # gets VENDOR_CALL_TIMEOUT, which also caps every stage.
+    PRACTICE_DEADLINE_SECONDS: float = float(os.getenv("PRACTICE_DEADLINE_SECONDS", "20"))
+    REPLY_DEADLINE_SECONDS: float = float(os.getenv("REPLY_DEADLINE_SECONDS", "25"))
+    DEADLINE_STAGE_WEIGHTS: str = os.getenv("DEADLINE_STAGE_WEIGHTS", "stt=1,llm=1,tts=2")
+    VENDOR_CALL_TIMEOUT: float = float(os.getenv("VENDOR_CALL_TIMEOUT", "30"))
+    VENDOR_RETRIES: int = int(os.getenv("VENDOR_RETRIES", "1"))
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+    HEDGE_MAX_RATIO: float = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+    # Keep-alive HTTP connection pool shared by each vendor client
+    VENDOR_HTTP_MAX_CONNECTIONS: int = int(os.getenv("VENDOR_HTTP_MAX_CONNECTIONS", "16"))
+    VENDOR_HTTP_MAX_KEEPALIVE: int = int(os.getenv("VENDOR_HTTP_MAX_KEEPALIVE", "8"))
+    VENDOR_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("VENDOR_HTTP_KEEPALIVE_EXPIRY", "60"))
+    VENDOR_HTTP_TIMEOUT: float = float(os.getenv("VENDOR_HTTP_TIMEOUT", "240"))
+
+    # TTS audio cache (set TTS_CACHE_DIR to an empty string to keep it in memory only)
+    TTS_CACHE_MEMORY_MB: int = int(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", str(Path(__file__).parent / ".cache" / "tts"))
+    TTS_CACHE_DISK_MB: int = int(os.getenv("TTS_CACHE_DISK_MB", "1024"))
+
+    # Preset voices served by /api/preset-voices and warmed by the prewarm job.
+    # The file ships with the frontend.
+    PRESET_VOICES_PATH: str = os.getenv(
+        "PRESET_VOICES_PATH", str(Path(__file__).parent.parent / "frontend" / "preset_voices.json")
+    )
+
+    # Background TTS cache warm-up for the preset voices (see services/prewarm.py).
+    # Phrases come from PREWARM_PHRASES_PATH for PREWARM_LANGUAGES (empty for all)
+    # plus the PREWARM_OBSERVED_TOP phrases synthesized at least
+    # PREWARM_OBSERVED_MIN_COUNT times since startup; each is synthesized for
+    # PREWARM_VOICES (preset keys, empty for all) in PREWARM_FORMATS. An interval
+    # of 0 runs it once.
+    # Off by default because every synthesis is billed by Fish Audio: on a cold
+    # cache the shipped list alone is 5 languages x 10 phrases x 6 voices = 300
+    # syntheses per format. Each worker runs its own job, and workers starting
+    # together can synthesize the same phrase, so enable it in a single process
+    # (e.g. one single-worker instance) rather than across a multi-worker server.
+    PREWARM_ENABLED: bool = os.getenv("PREWARM_ENABLED", "false").lower() in ("1", "true", "yes")
+    PREWARM_PHRASES_PATH: str = os.getenv("PREWARM_PHRASES_PATH", str(Path(__file__).parent / "prewarm_phrases.json"))
+    PREWARM_LANGUAGES: str = os.getenv("PREWARM_LANGUAGES", "")
+    PREWARM_VOICES: str = os.getenv("PREWARM_VOICES", "")
+    PREWARM_FORMATS: str = os.getenv("PREWARM_FORMATS", "wav")
+    PREWARM_DELAY_SECONDS: float = float(os.getenv("PREWARM_DELAY_SECONDS", "30"))
+    PREWARM_INTERVAL_SECONDS: float = float(os.getenv("PREWARM_INTERVAL_SECONDS", str(60 * 60)))
+    PREWARM_CONCURRENCY: int = int(os.getenv("PREWARM_CONCURRENCY", "1"))
+    PREWARM_OBSERVED_TOP: int = int(os.getenv("PREWARM_OBSERVED_TOP", "50"))
+    PREWARM_OBSERVED_MIN_COUNT: int = int(os.getenv("PREWARM_OBSERVED_MIN_COUNT", "3"))
+
+    # Shared second tier for the TTS and LLM caches, so every worker sees every
+    # entry: "memory", "sqlite:///path/cache.db" (one host) or "redis://host:6379/0".
+    # Empty keeps TTS audio in TTS_CACHE_DIR and LLM results in the database.
+    CACHE_BACKEND_URL: str = os.getenv("CACHE_BACKEND_URL", "")
+    CACHE_BACKEND_MAX_MB: int = int(os.getenv("CACHE_BACKEND_MAX_MB", "1024"))
+
+    # Gemini correction/reply cache
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+    LLM_CACHE_PERSIST: bool = os.getenv("LLM_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+    # Server-side conversation history. Each session keeps its recent turns within a
+    # token budget (overridable per language, e.g. "ja=1500,zh=1500"); older turns are
+    # folded into a running summary.
+    CONVERSATION_MAX_SESSIONS: int = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+    CONVERSATION_TTL_SECONDS: int = int(os.getenv("CONVERSATION_TTL_SECONDS", str(24 * 60 * 60)))
+    CONVERSATION_PERSIST: bool = os.getenv("CONVERSATION_PERSIST", "false").lower() in ("1", "true", "yes")
+    CONVERSATION_TOKEN_BUDGET: int = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1000"))
+    CONVERSATION_TOKEN_BUDGETS: str = os.getenv("CONVERSATION_TOKEN_BUDGETS", "")
+
+    # Authenticated principal cache (a TTL of 0 disables it)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
     # Get keys for the models to run
     # Use getenv with explicit None check and strip whitespace
     _deepgram_key = os.getenv("DEEPGRAM_API_KEY")
@@ -43,22 +167,32 @@ class Settings:
     
     _fish_key = os.getenv("FISH_AUDIO_API_KEY")
     FISH_AUDIO_API_KEY = _fish_key.strip() if _fish_key else ""
-    
-    # Debug: Check if keys are loaded (without exposing full keys)
-    if DEEPGRAM_API_KEY:
-        print(f"✅ DEEPGRAM_ENV_KEY loaded (length: {len(DEEPGRAM_API_KEY)})")
-    else:
-        print("⚠️ DEEPGRAM_ENV_KEY is empty or not set")
-    
-    if GOOGLE_API_KEY:
-        print(f"✅ GOOGLE_API_KEY loaded (length: {len(GOOGLE_API_KEY)})")
-    else:
-        print("⚠️ GOOGLE_API_KEY is empty or not set")
-    
-    if FISH_AUDIO_API_KEY:
-        print(f"✅ FISH_AUDIO_API_KEY loaded (length: {len(FISH_AUDIO_API_KEY)})")
-    else:
-        print("⚠️ FISH_AUDIO_API_KEY is empty or not set")
+
+    def validate(self) -> List[str]:
+        """
+        Problems with the configuration, as warnings (without exposing any key).
+        Called once at startup; the features that need a missing key fail with
+        their own error when used.
+        """
+        problems = [DOTENV_STATUS] if DOTENV_STATUS else []
+        for name in ("DEEPGRAM_API_KEY", "GOOGLE_API_KEY", "FISH_AUDIO_API_KEY"):
+            if not getattr(self, name):
+                problems.append(f"{name} is empty or not set")
+        if self.SECRET_KEY == DEFAULT_SECRET_KEY:
+            problems.append("SECRET_KEY is the development default; set a random one in production")
+        for name in ("DEEPGRAM_POOL_SIZE", "GEMINI_POOL_SIZE", "FISH_AUDIO_POOL_SIZE", "CLONE_WORKERS",
+                     "ADMISSION_PRACTICE_CONCURRENCY", "ADMISSION_REPLY_CONCURRENCY", "ADMISSION_CLONE_CONCURRENCY",
+                     "CIRCUIT_FAILURE_THRESHOLD", "PRACTICE_BATCH_STT_CONCURRENCY", "PRACTICE_BATCH_TTS_CONCURRENCY"):
+            if getattr(self, name) < 1:
+                problems.append(f"{name} must be at least 1")
+        for name in ("PRACTICE_DEADLINE_SECONDS", "REPLY_DEADLINE_SECONDS", "VENDOR_CALL_TIMEOUT",
+                     "UPLOAD_MAX_MB", "UPLOAD_MAX_SECONDS", "PRACTICE_BATCH_MAX_MB"):
+            if getattr(self, name) <= 0:
+                problems.append(f"{name} must be positive")
+        for audio_format in self.PREWARM_FORMATS.split(","):
+            if audio_format.strip() not in ("", "wav", "mp3", "opus"):
+                problems.append(f"PREWARM_FORMATS has an unsupported format: {audio_format.strip()}")
+        return problems
 
 settings = Settings()
 
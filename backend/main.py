@@ -1,16 +1,52 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, practice, voice_clone, conversation
+from config import settings
+from database import DB_CREATE_SCHEMA_ON_STARTUP, close_db, init_db
+from routers import auth, practice, voice_clone, conversation, conversation_ws, metrics
+from services.admission import AdmissionMiddleware
+from services.clone_jobs import clone_jobs
+from services.metrics import ServerTimingMiddleware
+from services.prewarm import prewarm_job
+from services.resilience import DeadlineMiddleware
+from services.uploads import UploadLimitMiddleware
+from services.vendor_clients import close_vendor_clients, open_vendor_clients
+from services.vendor_pool import configure_vendor_pools, shutdown_vendor_pools
+from utils.preset_voices import preset_voice_registry
+
+logger = logging.getLogger(__name__)
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Configuration is checked once here; importing config has no output
+    for problem in settings.validate():
+        logger.warning("Configuration: %s", problem)
+    # Schema creation is an explicit startup step (or `python database.py`), not
+    # a side effect of importing the app
+    if DB_CREATE_SCHEMA_ON_STARTUP:
+        await init_db()
+    # Per-vendor thread pools for the blocking SDK calls
+    configure_vendor_pools()
+    # One set of vendor clients with keep-alive connection pools
+    open_vendor_clients()
+    preset_voice_registry.load()
+    # Synthesizes common phrases for the preset voices once startup traffic settles
+    prewarm_job.start()
+    yield
+    await prewarm_job.stop()
+    clone_jobs.shutdown()
+    shutdown_vendor_pools()
+    close_vendor_clients()
+    await close_db()
 
 app = FastAPI(
     title="Language Conversation API",
     description="API with Google OAuth authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -23,19 +59,38 @@ origins = [
     'http://127.0.0.1:5500',
 ]
 
+# Vendor-call budgets for the voice endpoints. Inside admission control, so time
+# spent queueing for a slot doesn't count against the budget.
+app.add_middleware(DeadlineMiddleware)
+
+# Concurrency caps and load shedding for the vendor-bound endpoints. Added before
+# CORS so that 429/503 responses still carry the CORS headers.
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# Oversized uploads are turned away before they take an admission slot or are
+# spooled to disk in full
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware, 
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Audio-Metadata", "Retry-After"]
 )
 
+# Per-stage timings of every request, readable in the browser's network panel
+app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(practice.router)
 app.include_router(voice_clone.router)
 app.include_router(conversation.router)
+app.include_router(conversation_ws.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -1,4 +1,6 @@
 from .user import User
+from .llm_cache import LLMCacheEntry
+from .conversation import ConversationRecord
 
-__all__ = ["User"]
+__all__ = ["User", "LLMCacheEntry", "ConversationRecord"]
 
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Text, Float
+from database import Base
+
+class ConversationRecord(Base):
+    __tablename__ = "conversations"
+
+    session_id = Column(String, primary_key=True)
+    language = Column(String, nullable=False)
+    summary = Column(Text, nullable=False, default="")
+    turns = Column(Text, nullable=False)
+    updated_at = Column(Float, index=True, nullable=False)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Text, Float
+from database import Base
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String, primary_key=True)
+    namespace = Column(String, index=True, nullable=False)
+    value = Column(Text, nullable=False)
+    expires_at = Column(Float, index=True, nullable=False)
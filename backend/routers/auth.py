@@ -1,22 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
-from authlib.integrations.starlette_client import OAuth, OAuthError
-from starlette.config import Config
-from database import get_db
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models.user import User
 from schemas.user import UserResponse, Token
 from auth import create_access_token, get_current_user
+from services.principal_cache import Principal, principal_cache
 from config import settings
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Configure OAuth
-config = Config()
-oauth = OAuth(config)
-
-# Google OAuth client - will be registered lazily
+# Google OAuth client - will be registered lazily, along with the authlib import
 google = None
 
 def get_google_oauth():
@@ -28,7 +24,9 @@ def get_google_oauth():
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Google OAuth not configured. Please set GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET environment variables."
             )
-        google = oauth.register(
+        from authlib.integrations.starlette_client import OAuth
+        from starlette.config import Config
+        google = OAuth(Config()).register(
             name='google',
             client_id=settings.GOOGLE_CLIENT_ID,
             client_secret=settings.GOOGLE_CLIENT_SECRET,
@@ -54,9 +52,10 @@ async def login(request: Request):
     return await google_oauth.authorize_redirect(request, redirect_uri)
 
 @router.get("/callback", name="auth_callback")
-async def auth_callback(request: Request, db: Session = Depends(get_db)):
+async def auth_callback(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle Google OAuth callback"""
     google_oauth = get_google_oauth()
+    from authlib.integrations.starlette_client import OAuthError
     
     try:
         token = await google_oauth.authorize_access_token(request)
@@ -85,9 +84,9 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
         )
     
     # Check if user exists
-    user = db.query(User).filter(
-        (User.email == email) | (User.google_id == google_id)
-    ).first()
+    user = (await db.execute(
+        select(User).where(or_(User.email == email, User.google_id == google_id))
+    )).scalars().first()
     
     if user:
         # Update user info if needed
@@ -107,12 +106,14 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
         )
         db.add(user)
     
-    db.commit()
-    db.refresh(user)
-    
+    await db.commit()
+    await db.refresh(user)
+    # Requests holding an older copy of this user must see the update
+    principal_cache.invalidate(user.id)
+
     # Create JWT token
     access_token = create_access_token(
-        data={"sub": user.id},
+        data={"sub": str(user.id)},
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
@@ -124,7 +125,7 @@ async def auth_callback(request: Request, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """Get current user information"""
     return current_user
 
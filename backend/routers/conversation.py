@@ -1,74 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form, Header
 import json
-import base64
-import os
-from google import genai
-from google.genai import types
-from routers.practice import transcribe_audio, generate_speech
+import logging
+from typing import Optional
+import time
+import uuid
+from routers.practice import STREAM_CHUNK_SIZE, transcribe_audio, generate_speech, audio_response, read_upload
 from schemas.tts import TTSRequest
 from schemas.conversation import Message
-from config import settings
+from services.vendor_clients import gemini_config, get_vendor_clients
+from services.vendor_pool import GEMINI
+from services.resilience import call_vendor, stream_vendor
+from services.streaming import audio_chunk_event, error_event, sse_event, sse_response
+from services.llm_cache import llm_cache
+from services.conversation_store import MAX_SESSION_ID_LENGTH, Conversation, conversation_store
+from services.sentence_pipeline import synthesize_sentences
+from services.audio import concat_wav, resolve_audio_format, resolve_bitrate
+from services.metrics import observe_stage, stage_timer
 
-# Configure Google GenAI API key
-# The new SDK reads from GEMINI_API_KEY environment variable
-if settings.GOOGLE_API_KEY:
-    os.environ['GEMINI_API_KEY'] = settings.GOOGLE_API_KEY
-    print(f"GEMINI_API_KEY set (length: {len(settings.GOOGLE_API_KEY)})")
-else:
-    print("GOOGLE_API_KEY is empty! Check your .env file.")
+router = APIRouter(prefix="/api", tags=['api'])
+logger = logging.getLogger(__name__)
 
-# Create a single client object (reused across requests)
-client = genai.Client()
+# Bump whenever the reply prompt changes so cached replies are not reused
+REPLY_PROMPT_VERSION = "2"
+SUMMARY_PROMPT_VERSION = "1"
 
-router = APIRouter(prefix="/api", tags=['api'])
+LANG_NAMES = {
+    'es': 'Spanish',
+    'fr': 'French',
+    'en': 'English',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ja': 'Japanese',
+    'zh': 'Chinese',
+    'ko': 'Korean'
+}
 
-async def get_reply(user_message: str, conversation_history: list, language: str):
+def render_turns(turns: list) -> list:
+    """One "User: ..." / "Assistant: ..." line per message"""
+    lines = []
+    for msg in turns:
+        role = msg.get('role', 'user') if isinstance(msg, dict) else msg.role
+        content = msg.get('content', '') if isinstance(msg, dict) else msg.content
+        if role == 'user':
+            lines.append(f"User: {content}")
+        elif role == 'assistant':
+            lines.append(f"Assistant: {content}")
+    return lines
+
+def build_conversation_context(user_message: str, conversation_history: list, summary: str = "") -> str:
     """
-    Generate a conversational reply using Gemini AI.
-    
-    Args:
-        user_message: The current user message
-        conversation_history: List of previous messages (last few for context)
-        language: Target language code (e.g., 'es', 'fr', 'en')
-    
-    Returns:
-        dict with 'reply' key containing the AI's response
+    Render the prompt's transcript: the summary of earlier turns, if any, then the
+    recent history and the new message. The history is expected to be within the
+    token budget already (see services.conversation_store).
     """
-    try:
-        print("2 here?")
-        # Build conversation context from recent messages (last 5-10 messages)
-        # Limit to last 10 messages to avoid token limits
-        recent_messages = conversation_history[-10:] if len(conversation_history) > 10 else conversation_history
-        
-        # Build conversation context string
-        conversation_context = ""
-        for msg in recent_messages:
-            role = msg.get('role', 'user') if isinstance(msg, dict) else msg.role
-            content = msg.get('content', '') if isinstance(msg, dict) else msg.content
-            if role == 'user':
-                conversation_context += f"User: {content}\n"
-            elif role == 'assistant':
-                conversation_context += f"Assistant: {content}\n"
-        
-        # Add current user message
-        conversation_context += f"User: {user_message}\n"
-        print(conversation_context)
-        
-        # Language name mapping
-        lang_names = {
-            'es': 'Spanish',
-            'fr': 'French',
-            'en': 'English',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ja': 'Japanese',
-            'zh': 'Chinese',
-            'ko': 'Korean'
-        }
-        lang_name = lang_names.get(language, language)
-        
-        prompt = f"""You are a friendly and engaging conversation partner helping someone practice {lang_name}. 
+    lines = [f"(Summary of earlier conversation: {summary})"] if summary else []
+    lines.extend(render_turns(conversation_history))
+    lines.append(f"User: {user_message}")
+    return "\n".join(lines) + "\n"
+
+def build_reply_prompt(conversation_context: str, language: str, json_output: bool = True) -> str:
+    """
+    The reply prompt. get_reply asks for a JSON object; stream_reply asks for plain
+    text so the reply can be split into sentences while it is still generating.
+    """
+    lang_name = LANG_NAMES.get(language, language)
+    
+    prompt = f"""You are a friendly and engaging conversation partner helping someone practice {lang_name}. 
 You are having a natural, back-and-forth conversation with them in {lang_name}.
 
 Previous conversation:
@@ -83,21 +81,56 @@ Your task:
 - If they ask a question, answer it naturally
 - If they make a statement, respond appropriately (agree, ask follow-up, share related thought, etc.)
 
-Return ONLY a JSON object with this exact format:
+"""
+    if json_output:
+        prompt += f"""Return ONLY a JSON object with this exact format:
 {{"reply": "your response in {lang_name}"}}
 
 Do not include any markdown, explanations, or extra text. Only return the JSON."""
+    else:
+        prompt += f"""Return ONLY your response in {lang_name} as plain text.
+
+Do not include any markdown, JSON, explanations, or extra text."""
+    return prompt
+
+async def get_reply(user_message: str, conversation_history: list, language: str, summary: str = ""):
+    """
+    Generate a conversational reply using Gemini AI.
+    
+    Args:
+        user_message: The current user message
+        conversation_history: List of previous messages (last few for context)
+        language: Target language code (e.g., 'es', 'fr', 'en')
+        summary: Running summary of the turns older than conversation_history
+    
+    Returns:
+        dict with 'reply' key containing the AI's response
+    """
+    try:
+        conversation_context = build_conversation_context(user_message, conversation_history, summary)
+
+        # The prompt is fully determined by the context, so an identical exchange
+        # (typically an opening line with no history) can reuse an earlier reply
+        cached_reply = await llm_cache.get("reply", language, conversation_context, REPLY_PROMPT_VERSION)
+        if cached_reply is not None:
+            return cached_reply
+        
+        prompt = build_reply_prompt(conversation_context, language)
 
         # Use the new SDK format
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.8,
-                max_output_tokens=200,
-                response_mime_type='application/json'
+        with stage_timer("llm"):
+            response = await call_vendor(
+                GEMINI,
+                "llm",
+                get_vendor_clients().require('gemini').models.generate_content,
+                model='gemini-2.0-flash',
+                contents=prompt,
+                config=gemini_config(
+                    temperature=0.8,
+                    max_output_tokens=200,
+                    response_mime_type='application/json'
+                )
             )
-        )
         
         generated_text = response.text.strip()
         
@@ -110,6 +143,7 @@ Do not include any markdown, explanations, or extra text. Only return the JSON."
             generated_text = generated_text[:-3]
         
         reply_data = json.loads(generated_text.strip())
+        await llm_cache.put("reply", language, conversation_context, REPLY_PROMPT_VERSION, reply_data)
         return reply_data
         
     except json.JSONDecodeError as e:
@@ -117,24 +151,185 @@ Do not include any markdown, explanations, or extra text. Only return the JSON."
             status_code=500,
             detail=f"Error parsing reply from model: {str(e)}"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the full error for debugging
         error_msg = str(e)
         error_type = type(e).__name__
-        print(f"❌ Gemini API Error: {error_type}: {error_msg}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Gemini API error: %s: %s", error_type, error_msg)
         raise HTTPException(
             status_code=500,
             detail=f"Error generating reply: {error_type}: {error_msg}"
         )
 
+async def stream_reply(user_message: str, conversation_history: list, language: str, summary: str = ""):
+    """
+    Like get_reply, but yields the reply text as Gemini generates it.
+
+    Shares the reply cache with get_reply: a cached reply is yielded in one piece,
+    and a freshly streamed one is cached once complete.
+    """
+    conversation_context = build_conversation_context(user_message, conversation_history, summary)
+
+    cached_reply = await llm_cache.get("reply", language, conversation_context, REPLY_PROMPT_VERSION)
+    if cached_reply is not None:
+        yield cached_reply['reply']
+        return
+
+    reply_parts = []
+    started = time.perf_counter()
+    try:
+        async for chunk in stream_vendor(
+            GEMINI,
+            "llm",
+            get_vendor_clients().require('gemini').models.generate_content_stream,
+            model='gemini-2.0-flash',
+            contents=build_reply_prompt(conversation_context, language, json_output=False),
+            config=gemini_config(
+                temperature=0.8,
+                max_output_tokens=200
+            )
+        ):
+            if chunk.text:
+                if not reply_parts:
+                    observe_stage("llm_first_token", time.perf_counter() - started)
+                reply_parts.append(chunk.text)
+                yield chunk.text
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_type = type(e).__name__
+        logger.exception("Gemini API error: %s: %s", error_type, e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating reply: {error_type}: {str(e)}"
+        )
+
+    observe_stage("llm", time.perf_counter() - started)
+
+    reply = "".join(reply_parts).strip()
+    if not reply:
+        raise HTTPException(status_code=500, detail="Error generating reply: the model returned no text")
+    await llm_cache.put("reply", language, conversation_context, REPLY_PROMPT_VERSION, {"reply": reply})
+
+async def summarize_turns(summary: str, turns: list, language: str, max_tokens: int) -> str:
+    """
+    Extend a running conversation summary with the turns being folded out of the
+    context window. Summarizer for ConversationStore.compact; errors propagate.
+    """
+    lang_name = LANG_NAMES.get(language, language)
+    transcript = "\n".join(render_turns(turns))
+    cache_text = f"{summary}\n{transcript}"
+
+    cached = await llm_cache.get("summary", language, cache_text, SUMMARY_PROMPT_VERSION)
+    if cached is not None:
+        return cached['summary']
+
+    prompt = f"""You are keeping notes on a {lang_name} practice conversation between a learner (User) and a conversation partner (Assistant).
+
+Summary so far:
+{summary or "(none)"}
+
+Newer conversation:
+{transcript}
+
+Rewrite the summary so it also covers the newer conversation. Keep the facts the learner shared, the topics discussed and any open questions.
+Write it in {lang_name}, in at most {max_tokens // 2} words, as plain text without markdown."""
+
+    with stage_timer("summary"):
+        response = await call_vendor(
+            GEMINI,
+            "summary",
+            get_vendor_clients().require('gemini').models.generate_content,
+            model='gemini-2.0-flash',
+            contents=prompt,
+            config=gemini_config(
+                temperature=0.2,
+                max_output_tokens=max_tokens
+            )
+        )
+
+    new_summary = (response.text or "").strip()
+    if not new_summary:
+        raise ValueError("the model returned an empty summary")
+    await llm_cache.put("summary", language, cache_text, SUMMARY_PROMPT_VERSION, {"summary": new_summary})
+    return new_summary
+
+async def load_conversation(session_id: str, language: str) -> Conversation:
+    """The stored conversation for a session, with its older turns folded into the summary"""
+    conversation = await conversation_store.open(session_id, language)
+    await conversation_store.compact(conversation, summarize_turns)
+    return conversation
+
+async def resolve_history(session_id: Optional[str], chat_history: Optional[str], language: str):
+    """
+    The context for a turn as (conversation, history, summary).
+
+    A turn with a session_id, or with neither field, uses the server-side store; a
+    new session id is issued in the latter case. Older clients that still send
+    chat_history without a session_id get that history trimmed to the language's
+    token budget, and conversation is None.
+    """
+    if not session_id and chat_history:
+        return None, conversation_store.recent(parse_chat_history(chat_history), language), ""
+
+    if not session_id:
+        session_id = uuid.uuid4().hex
+    elif len(session_id) > MAX_SESSION_ID_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"session_id must be at most {MAX_SESSION_ID_LENGTH} characters"
+        )
+    conversation = await load_conversation(session_id, language)
+    return conversation, list(conversation.turns), conversation.summary
+
+def parse_chat_history(chat_history: str) -> list:
+    """Parse the chat_history form field; invalid or missing history means a fresh conversation"""
+    conversation_history = []
+    if chat_history:
+        try:
+            history_data = json.loads(chat_history)
+            # Convert to list of Message objects or dicts
+            if isinstance(history_data, list):
+                conversation_history = history_data
+            elif isinstance(history_data, dict) and 'messages' in history_data:
+                conversation_history = history_data['messages']
+        except json.JSONDecodeError:
+            # If chat_history is invalid JSON, start with empty history
+            conversation_history = []
+    return conversation_history
+
+async def collect_text(text_stream, parts: list):
+    """Pass a text stream through while keeping every piece in `parts`"""
+    async for delta in text_stream:
+        parts.append(delta)
+        yield delta
+
+async def aenumerate(iterable, start: int = 0):
+    index = start
+    async for item in iterable:
+        yield index, item
+        index += 1
+
+def speech_synthesizer(model_id: str, audio_format: str = 'wav', bitrate: Optional[int] = None):
+    """Per-sentence TTS callable for synthesize_sentences"""
+    async def synthesize(sentence: str) -> bytes:
+        return await generate_speech(request=TTSRequest(
+            transcript=sentence, model_id=model_id, audio_format=audio_format, bitrate=bitrate
+        ))
+    return synthesize
+
 @router.post('/reply')
 async def conversation_reply(
     file: UploadFile = File(...),
     target_lang: str = Form(...),
     model_id: str = Form(...),
-    chat_history: str = Form(None)  # JSON string of conversation history
+    session_id: Optional[str] = Form(None),
+    chat_history: str = Form(None),  # JSON string of conversation history (legacy clients)
+    audio_format: Optional[str] = Form(None),
+    bitrate: Optional[int] = Form(None),
+    accept: Optional[str] = Header(None)
 ):
     """
     Handle conversation reply endpoint.
@@ -143,13 +338,19 @@ async def conversation_reply(
     - file: Audio file with user's speech
     - target_lang: Language code (e.g., 'es', 'fr')
     - model_id: Voice model ID (preset or user's cloned voice)
-    - chat_history: JSON string of recent conversation history from frontend
+    - session_id: Conversation to continue; omit it on the first turn and reuse the
+      `session_id` from the response. The history is kept server-side.
+    - chat_history: JSON string of recent conversation history, for clients that
+      keep their own; only used without a session_id
+    - audio_format, bitrate: Optional output format (wav, mp3, opus) and kbps
+
+    Returns JSON with the audio base64-encoded in `reply_audio` by default; send
+    `Accept: audio/*` or `Accept: multipart/mixed` to get raw audio bytes instead.
     """
     try:
-        audio_data = await file.read()
-
-        if len(audio_data) < 1000:
-            raise HTTPException(status_code=400, detail="Audio file is too small or empty")
+        audio_data = await read_upload(file)
+        output_format = resolve_audio_format(audio_format, accept)
+        resolve_bitrate(output_format, bitrate)
 
         # Step 1: Transcribe audio to text
         transcription = await transcribe_audio(audio_data, target_lang)
@@ -159,42 +360,100 @@ async def conversation_reply(
         
         user_message = transcription['text']
         
-        # Step 2: Parse chat history if provided
-        conversation_history = []
-        if chat_history:
-            try:
-                history_data = json.loads(chat_history)
-                # Convert to list of Message objects or dicts
-                if isinstance(history_data, list):
-                    conversation_history = history_data
-                elif isinstance(history_data, dict) and 'messages' in history_data:
-                    conversation_history = history_data['messages']
-            except json.JSONDecodeError:
-                # If chat_history is invalid JSON, start with empty history
-                conversation_history = []
+        # Step 2: Load the conversation so far
+        conversation, conversation_history, summary = await resolve_history(session_id, chat_history, target_lang)
         
-        # Step 3: Generate conversational reply using Gemini
-        reply = await get_reply(
-            user_message=user_message,
-            conversation_history=conversation_history,
-            language=target_lang
-        )
+        # Steps 3 and 4: Stream the reply out of Gemini and synthesize it with Fish Audio
+        reply_parts = []
+        reply_stream = collect_text(stream_reply(user_message, conversation_history, target_lang, summary), reply_parts)
+        synthesize = speech_synthesizer(model_id, output_format, bitrate)
+        if output_format == "wav":
+            # PCM segments join cleanly, so each sentence is synthesized as soon as it
+            # is complete, overlapping TTS with generation
+            audio_segments = []
+            async for _, audio in synthesize_sentences(reply_stream, synthesize):
+                audio_segments.append(audio)
+            reply_audio = concat_wav(audio_segments)
+            reply_text = "".join(reply_parts).strip()
+        else:
+            # Back-to-back MP3 or Ogg files don't decode as one stream, so compressed
+            # replies are synthesized in one piece
+            async for _ in reply_stream:
+                pass
+            reply_text = "".join(reply_parts).strip()
+            reply_audio = await synthesize(reply_text)
+        if conversation is not None:
+            await conversation_store.append(conversation, user_message, reply_text)
 
-        # Step 4: Convert reply to speech using Fish Audio
-        request = TTSRequest(transcript=reply['reply'], model_id=model_id)
-        reply_audio = await generate_speech(request=request)
-
-        # Step 5: Convert audio bytes to base64 for frontend
-        audio_base64 = base64.b64encode(reply_audio).decode('utf-8')
-
-        return {
+        # Step 5: Send the audio back in the form the client asked for
+        content = {
             "success": True,
             "user_message": user_message,
-            "reply_text": reply['reply'],
-            "reply_audio": audio_base64,
-            "audio_format": "wav"
+            "reply_text": reply_text,
+            "audio_format": output_format
         }
+        if conversation is not None:
+            content["session_id"] = conversation.session_id
+        return audio_response(accept, content, reply_audio, audio_field="reply_audio")
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating a response: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating a response: {str(e)}")
+
+@router.post('/reply/stream')
+async def conversation_reply_stream(
+    file: UploadFile = File(...),
+    target_lang: str = Form(...),
+    model_id: str = Form(...),
+    session_id: Optional[str] = Form(None),
+    chat_history: str = Form(None),
+    audio_format: Optional[str] = Form(None),
+    bitrate: Optional[int] = Form(None)
+):
+    """
+    Streaming variant of /reply as server-sent events.
+
+    Events, in order: `transcript` (with the `session_id`), then for each reply sentence a `reply_sentence`
+    event followed by the `audio` events of that sentence's audio segment in the
+    requested format, then `reply` with the full text and `done`. Failures after
+    the stream has started are sent as an `error` event.
+    """
+    audio_data = await read_upload(file)
+    output_format = resolve_audio_format(audio_format)
+    resolve_bitrate(output_format, bitrate)
+
+    async def events():
+        try:
+            transcription = await transcribe_audio(audio_data, target_lang)
+
+            if not transcription['text'].strip():
+                raise HTTPException(status_code=400, detail="No speech was detected")
+
+            user_message = transcription['text']
+            conversation, conversation_history, summary = await resolve_history(session_id, chat_history, target_lang)
+            transcript = {"user_message": user_message}
+            if conversation is not None:
+                transcript["session_id"] = conversation.session_id
+            yield sse_event("transcript", transcript)
+
+            reply_parts = []
+            seq = 0
+            segment = -1
+            async for segment, (sentence, audio) in aenumerate(synthesize_sentences(
+                collect_text(stream_reply(user_message, conversation_history, target_lang, summary), reply_parts),
+                speech_synthesizer(model_id, output_format, bitrate)
+            )):
+                yield sse_event("reply_sentence", {"segment": segment, "text": sentence})
+                for offset in range(0, len(audio), STREAM_CHUNK_SIZE):
+                    yield audio_chunk_event(seq, audio[offset:offset + STREAM_CHUNK_SIZE], segment=segment)
+                    seq += 1
+
+            reply_text = "".join(reply_parts).strip()
+            if conversation is not None:
+                await conversation_store.append(conversation, user_message, reply_text)
+            yield sse_event("reply", {"reply_text": reply_text})
+            yield sse_event("done", {"audio_format": output_format, "chunks": seq, "segments": segment + 1})
+        except Exception as e:
+            yield error_event(e)
+
+    return sse_response(events())
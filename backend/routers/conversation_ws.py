@@ -0,0 +1,264 @@
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+
+from config import settings
+from routers.conversation import get_reply, load_conversation
+from routers.practice import stream_speech
+from schemas.tts import TTSRequest
+from services.audio import resolve_audio_format, resolve_bitrate
+from services.conversation_store import MAX_SESSION_ID_LENGTH, conversation_store
+from services.resilience import request_deadline
+from services.stt import DeepgramStreamingTranscriber, StreamingTranscriber, StreamingTranscription
+
+"""
+    Communication mode over a single WebSocket instead of one /api/reply POST per turn.
+
+    Client -> server
+        * {"type": "start", "target_lang": "es", "model_id": "...", "session_id": optional,
+           "audio_format": optional wav/mp3/opus, "bitrate": optional kbps}
+        * binary frames: microphone audio, sent while the user is still speaking
+        * {"type": "end_of_speech"}: optional, e.g. push-to-talk released
+        * {"type": "stop"}: finish pending turns and close
+    Server -> client
+        * {"type": "ready", "session_id": "..."}
+        * {"type": "transcript", "text": "...", "is_final": bool}: live captions
+        * {"type": "user_message", "text": "..."}: end of speech detected, LLM started
+        * {"type": "reply", "text": "..."}
+        * binary frames: reply audio chunks, then {"type": "audio_end", "audio_format": "..."}
+        * {"type": "error", "status_code": int, "detail": "..."}
+
+    The chat history lives server-side in services.conversation_store under the
+    session id, shared with the /api/reply endpoints.
+"""
+
+MAX_SESSIONS = 1000
+
+router = APIRouter(tags=['conversation'])
+
+
+@dataclass
+class ConversationSession:
+    session_id: str
+    target_lang: str
+    model_id: str
+    audio_format: str = "wav"
+    bitrate: Optional[int] = None
+
+
+# Most recently used last; the oldest sessions are dropped past MAX_SESSIONS
+sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+
+def get_streaming_transcriber() -> StreamingTranscriber:
+    """Dependency so tests can swap in an offline transcriber"""
+    return DeepgramStreamingTranscriber(api_key=settings.DEEPGRAM_API_KEY)
+
+
+def open_session(start: dict) -> ConversationSession:
+    """
+    Resume the session named in the start message, or begin a new one.
+    Raises HTTPException for a field of the wrong type, an unsupported audio format
+    or bitrate, or an overlong session id.
+    """
+    for field in ("target_lang", "model_id", "session_id", "audio_format"):
+        if start.get(field) is not None and not isinstance(start[field], str):
+            raise HTTPException(status_code=400, detail=f"{field} must be a string")
+    if start.get("bitrate") is not None and (isinstance(start["bitrate"], bool) or not isinstance(start["bitrate"], int)):
+        raise HTTPException(status_code=400, detail="bitrate must be an integer")
+
+    audio_format = resolve_audio_format(start.get("audio_format"))
+    bitrate = start.get("bitrate")
+    resolve_bitrate(audio_format, bitrate)
+
+    session_id = start.get("session_id")
+    if session_id and len(session_id) > MAX_SESSION_ID_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"session_id must be at most {MAX_SESSION_ID_LENGTH} characters"
+        )
+    session = sessions.get(session_id) if session_id else None
+    if session is None:
+        session = ConversationSession(
+            session_id=session_id or uuid.uuid4().hex,
+            target_lang=start["target_lang"],
+            model_id=start["model_id"],
+        )
+    else:
+        session.target_lang = start.get("target_lang", session.target_lang)
+        session.model_id = start.get("model_id", session.model_id)
+    session.audio_format = audio_format
+    session.bitrate = bitrate
+
+    sessions[session.session_id] = session
+    sessions.move_to_end(session.session_id)
+    while len(sessions) > MAX_SESSIONS:
+        sessions.popitem(last=False)
+    return session
+
+
+async def send_error(websocket: WebSocket, exc: Exception):
+    if isinstance(exc, HTTPException):
+        await websocket.send_json({"type": "error", "status_code": exc.status_code, "detail": exc.detail})
+    else:
+        await websocket.send_json({"type": "error", "status_code": 500, "detail": str(exc)})
+
+
+def parse_control(message: dict) -> Optional[dict]:
+    """The JSON object in a text frame, or None for anything else"""
+    try:
+        control = json.loads(message.get("text") or "")
+    except ValueError:
+        return None
+    return control if isinstance(control, dict) else None
+
+
+async def send_invalid_control(websocket: WebSocket):
+    await websocket.send_json({
+        "type": "error",
+        "status_code": 400,
+        "detail": "Text frames must be JSON control messages"
+    })
+
+
+async def pump_client_audio(websocket: WebSocket, stream: StreamingTranscription):
+    """Forward microphone frames to the transcriber until the client says stop"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        if message.get("bytes") is not None:
+            await stream.send(message["bytes"])
+        elif message.get("text"):
+            control = parse_control(message)
+            if control is None:
+                # Ignored, like an unknown message type, but the client is told
+                await send_invalid_control(websocket)
+            elif control.get("type") == "end_of_speech":
+                await stream.finalize()
+            elif control.get("type") == "stop":
+                return
+
+
+async def pump_transcripts(websocket: WebSocket, stream: StreamingTranscription, turns: asyncio.Queue):
+    """Relay live captions and hand each finished utterance to the responder"""
+    segments = []
+    async for event in stream:
+        if event.text:
+            await websocket.send_json({
+                "type": "transcript",
+                "text": " ".join(segments + [event.text]),
+                "is_final": event.is_final,
+            })
+            if event.is_final:
+                segments.append(event.text)
+
+        if event.speech_final and segments:
+            await turns.put(" ".join(segments))
+            segments = []
+
+
+async def respond(websocket: WebSocket, session: ConversationSession, turns: asyncio.Queue):
+    """Run LLM + TTS for each utterance, in order, as soon as it is complete"""
+    while (user_message := await turns.get()) is not None:
+        try:
+            # Each turn gets the same vendor-call budget as a /api/reply request
+            with request_deadline(settings.REPLY_DEADLINE_SECONDS):
+                await websocket.send_json({"type": "user_message", "text": user_message})
+
+                conversation = await load_conversation(session.session_id, session.target_lang)
+                reply = await get_reply(
+                    user_message=user_message,
+                    conversation_history=list(conversation.turns),
+                    language=session.target_lang,
+                    summary=conversation.summary
+                )
+                await conversation_store.append(conversation, user_message, reply['reply'])
+                await websocket.send_json({"type": "reply", "text": reply['reply']})
+
+                request = TTSRequest(transcript=reply['reply'], model_id=session.model_id,
+                                     audio_format=session.audio_format, bitrate=session.bitrate)
+                async for chunk in stream_speech(request=request):
+                    await websocket.send_bytes(chunk)
+                await websocket.send_json({"type": "audio_end", "audio_format": session.audio_format})
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            await send_error(websocket, e)
+
+
+@router.websocket("/ws/conversation")
+async def conversation_socket(
+    websocket: WebSocket,
+    transcriber: StreamingTranscriber = Depends(get_streaming_transcriber)
+):
+    await websocket.accept()
+
+    try:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        start = parse_control(message) or {}
+        if start.get("type") != "start" or not start.get("target_lang") or not start.get("model_id"):
+            await websocket.send_json({
+                "type": "error",
+                "status_code": 400,
+                "detail": "First message must be a start message with target_lang and model_id"
+            })
+            await websocket.close(code=1008)
+            return
+
+        try:
+            session = open_session(start)
+        except HTTPException as e:
+            await send_error(websocket, e)
+            await websocket.close(code=1008)
+            return
+
+        async with AsyncExitStack() as stack:
+            try:
+                stream = await stack.enter_async_context(transcriber.open(session.target_lang))
+            except Exception as e:
+                # A missing API key or a failed connection; nothing to do but tell the client
+                await send_error(websocket, e if isinstance(e, HTTPException) else HTTPException(
+                    status_code=502,
+                    detail=f"Speech-to-text could not be started: {e}"
+                ))
+                await websocket.close(code=1011)
+                return
+            await websocket.send_json({"type": "ready", "session_id": session.session_id})
+
+            turns: asyncio.Queue[Optional[str]] = asyncio.Queue()
+            client_audio = asyncio.create_task(pump_client_audio(websocket, stream))
+            transcripts = asyncio.create_task(pump_transcripts(websocket, stream, turns))
+            responder = asyncio.create_task(respond(websocket, session, turns))
+            try:
+                done, _ = await asyncio.wait({client_audio, transcripts}, return_when=asyncio.FIRST_COMPLETED)
+                if client_audio in done:
+                    # Re-raises WebSocketDisconnect; otherwise stop was requested, so
+                    # flush the transcriber and let the pending turns finish
+                    client_audio.result()
+                    await stream.close()
+                    await transcripts
+                else:
+                    # The transcriber ended before the client was done
+                    await send_error(websocket, transcripts.exception() or HTTPException(
+                        status_code=502,
+                        detail="Speech-to-text stream ended unexpectedly"
+                    ))
+                await turns.put(None)
+                await responder
+            finally:
+                for task in (client_audio, transcripts, responder):
+                    task.cancel()
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
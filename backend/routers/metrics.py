@@ -0,0 +1,143 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.admission import REJECTION_REASONS, admission_pools
+from services.clone_jobs import clone_jobs
+from services.llm_cache import llm_cache
+from services.metrics import register_collector, render_metrics
+from services.prewarm import prewarm_job
+from services.resilience import CLOSED, HALF_OPEN, OPEN, resilience_stats
+from services.single_flight import correction_flights, speech_flights
+from services.tts_cache import tts_cache
+
+router = APIRouter(tags=['metrics'])
+
+
+def collect_cache_metrics():
+    tts = tts_cache.stats()
+    llm = llm_cache.stats()
+    yield (
+        "cache_lookups_total", "counter", "Response cache lookups by outcome",
+        [
+            ({"cache": "tts", "result": "memory_hit"}, tts["memory_hits"]),
+            ({"cache": "tts", "result": "shared_hit"}, tts["shared_hits"]),
+            ({"cache": "tts", "result": "miss"}, tts["misses"]),
+            ({"cache": "llm", "result": "memory_hit"}, llm["memory_hits"]),
+            ({"cache": "llm", "result": "shared_hit"}, llm["shared_hits"]),
+            ({"cache": "llm", "result": "miss"}, llm["misses"]),
+        ],
+    )
+    yield (
+        "cache_entries", "gauge", "Entries held in memory by each response cache",
+        [({"cache": "tts"}, tts["memory_entries"]), ({"cache": "llm"}, llm["entries"])],
+    )
+    yield (
+        "tts_cache_bytes", "gauge", "Bytes of synthesized audio held by each TTS cache tier",
+        [({"tier": "memory"}, tts["memory_bytes"]), ({"tier": "shared"}, tts["shared_bytes"])],
+    )
+    yield (
+        "cache_backend_errors_total", "counter", "Shared cache tier calls that failed and were treated as misses",
+        [({"cache": "tts"}, tts["errors"]), ({"cache": "llm"}, llm["errors"])],
+    )
+
+
+def collect_single_flight_metrics():
+    flights = (speech_flights, correction_flights)
+    yield (
+        "single_flight_calls_total", "counter", "Vendor calls started by the request coalescing layer",
+        [({"call": flight.name}, flight.calls) for flight in flights],
+    )
+    yield (
+        "single_flight_coalesced_total", "counter", "Requests that joined an identical call already in flight",
+        [({"call": flight.name}, flight.coalesced) for flight in flights],
+    )
+
+
+def collect_admission_metrics():
+    pools = admission_pools.values()
+    yield (
+        "admission_in_flight", "gauge", "Requests holding an admission slot",
+        [({"pool": pool.name}, pool.active) for pool in pools],
+    )
+    yield (
+        "admission_queue_depth", "gauge", "Requests waiting for an admission slot",
+        [({"pool": pool.name}, pool.queue_depth()) for pool in pools],
+    )
+    yield (
+        "admission_admitted_total", "counter", "Requests admitted, directly or after queueing",
+        [({"pool": pool.name}, pool.admitted) for pool in pools],
+    )
+    yield (
+        "admission_rejections_total", "counter", "Requests shed with 429/503 by reason",
+        [({"pool": pool.name, "reason": reason}, pool.rejected[reason])
+         for pool in pools for reason in REJECTION_REASONS],
+    )
+
+
+def collect_clone_job_metrics():
+    jobs = clone_jobs.stats()
+    yield (
+        "clone_jobs_pending", "gauge", "Voice-clone jobs queued or running",
+        [({}, jobs["pending"])],
+    )
+    yield (
+        "clone_jobs_total", "counter", "Voice-clone submissions by outcome",
+        [({"outcome": outcome}, jobs[outcome]) for outcome in ("submitted", "deduplicated", "succeeded", "failed")],
+    )
+
+
+def collect_prewarm_metrics():
+    prewarm = prewarm_job.status()
+    yield (
+        "tts_prewarm_coverage_ratio", "gauge", "Share of the warm-up phrase set cached, per preset voice",
+        [({"voice": voice}, coverage) for voice, coverage in prewarm["coverage_by_voice"].items()],
+    )
+    yield (
+        "tts_prewarm_syntheses_total", "counter", "Syntheses made by the TTS cache warm-up by outcome",
+        [({"outcome": "synthesized"}, prewarm["synthesized_total"]), ({"outcome": "failed"}, prewarm["failed_total"])],
+    )
+    yield (
+        "tts_prewarm_runs_total", "counter", "TTS cache warm-up runs started",
+        [({}, prewarm["runs"])],
+    )
+
+
+def collect_vendor_call_metrics():
+    vendors = resilience_stats()
+    circuit_levels = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    yield (
+        "vendor_circuit_state", "gauge", "Circuit breaker state per vendor (0 closed, 1 half-open, 2 open)",
+        [({"vendor": vendor}, circuit_levels[stats["circuit"]]) for vendor, stats in vendors.items()],
+    )
+    yield (
+        "vendor_circuit_opens_total", "counter", "Times each vendor's circuit breaker opened",
+        [({"vendor": vendor}, stats["circuit_opens"]) for vendor, stats in vendors.items()],
+    )
+    yield (
+        "vendor_calls_total", "counter", "Vendor calls by outcome (a call may be retried or hedged)",
+        [({"vendor": vendor, "outcome": outcome}, stats[outcome])
+         for vendor, stats in vendors.items() for outcome in ("calls", "failures", "timeouts", "rejected")],
+    )
+    yield (
+        "vendor_retries_total", "counter", "Vendor call retries after a failure",
+        [({"vendor": vendor}, stats["retries"]) for vendor, stats in vendors.items()],
+    )
+    yield (
+        "vendor_hedges_total", "counter", "Hedged duplicates of slow vendor calls, and how many of them won",
+        [({"vendor": vendor, "result": result}, stats[key]) for vendor, stats in vendors.items()
+         for result, key in (("sent", "hedges"), ("won", "hedge_wins"))],
+    )
+
+
+register_collector(collect_cache_metrics)
+register_collector(collect_single_flight_metrics)
+register_collector(collect_admission_metrics)
+register_collector(collect_clone_job_metrics)
+register_collector(collect_prewarm_metrics)
+register_collector(collect_vendor_call_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency and payload size histograms plus cache counters, for Prometheus to scrape"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form
-from fastapi.responses import Response
-from deepgram import DeepgramClient
-from google import genai
-from google.genai import types
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form, Header
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import json
 import base64
-import os
+import time
+from typing import Dict, List, Optional, Union
 
-from fishaudio import FishAudio
 from schemas.tts import TTSRequest
 from config import settings
 from schemas import tts
-from utils.preset_voices import is_preset_voice, get_all_preset_voices
+from utils.preset_voices import preset_voice_registry
+from services.vendor_clients import fish_tts_config, gemini_config, get_vendor_clients
+from services.vendor_pool import DEEPGRAM, GEMINI, FISH_AUDIO
+from services.resilience import call_vendor, stream_vendor
+from services.streaming import audio_chunk_event, error_event, sse_event, sse_response
+from services.uploads import max_batch_upload_bytes, read_audio_upload
+from services.tts_cache import tts_cache, tts_cache_key
+from services.llm_cache import llm_cache, llm_cache_key
+from services.principal_cache import principal_cache
+from services.single_flight import correction_flights, speech_flights
+from services.prewarm import observed_phrases, prewarm_job
+from services.metrics import observe_stage, record_payload, stage_timer
+from services.audio import resolve_audio_format, resolve_bitrate
+from services.audio_response import AUDIO, MULTIPART, audio_body_response, multipart_response, negotiate_audio_response
 
 """
     The routes for the practice gets a audio stream, language, and voice to use
@@ -24,50 +35,57 @@ from utils.preset_voices import is_preset_voice, get_all_preset_voices
         Return audio stream to user
 """
 
+router = APIRouter(prefix="/api", tags=['api'])
 
-# FishAudio reads API key from environment variable FISH_API_KEY
-os.environ['FISH_API_KEY'] = settings.FISH_AUDIO_API_KEY
-fish_audio = FishAudio()
-
-# Google GenAI reads API key from GEMINI_API_KEY environment variable (new SDK)
-if settings.GOOGLE_API_KEY:
-    os.environ['GEMINI_API_KEY'] = settings.GOOGLE_API_KEY
-    print(f"GEMINI_API_KEY set (length: {len(settings.GOOGLE_API_KEY)})")
-else:
-    print("GOOGLE_API_KEY is empty! Check your .env file.")
-
-# Create a single client object (reused across requests)
-client = genai.Client()
+# Chunk size used when replaying cached audio on the streaming endpoints
+STREAM_CHUNK_SIZE = 16 * 1024
 
-router = APIRouter(prefix="/api", tags=['api'])
+# Bump whenever the correction prompt changes so cached corrections are not reused
+CORRECTION_PROMPT_VERSION = "1"
 
 @router.get("/preset-voices")
-async def get_preset_voices():
+async def get_preset_voices(if_none_match: Optional[str] = Header(None)):
     """
     Get all available preset voices that users can choose from.
     Returns a list of preset voices with their IDs, names, and descriptions.
+
+    The body is precomputed by the registry and carries an ETag, so a client that
+    sends it back in If-None-Match gets an empty 304 until the file changes.
     """
     try:
-        presets = get_all_preset_voices()
-        # Convert to list format for easier frontend consumption
-        voices_list = []
-        for key, voice_data in presets.items():
-            voices_list.append({
-                "key": key,
-                "id": voice_data.get("id"),
-                "name": voice_data.get("name"),
-                "description": voice_data.get("description", "")
-            })
-        return {
-            "success": True,
-            "preset_voices": voices_list
-        }
+        body, etag = preset_voice_registry.response()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error loading preset voices: {str(e)}"
         )
 
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match:
+        client_tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in client_tags or "*" in client_tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and sizes of the response caches, for capacity tuning"""
+    return {
+        "tts": tts_cache.stats(),
+        "llm": llm_cache.stats(),
+        "principals": principal_cache.stats(),
+        "single_flight": {
+            "tts": speech_flights.stats(),
+            "correction": correction_flights.stats()
+        },
+        "prewarm": prewarm_job.status()
+    }
+
+@router.get("/cache/prewarm")
+async def get_prewarm_status():
+    """Progress of the preset-voice TTS warm-up and how much of its phrase set is cached"""
+    return prewarm_job.status()
+
 async def transcribe_audio(audio_data: bytes, target_language: str='en'):
     # Validate API key
     api_key = settings.DEEPGRAM_API_KEY
@@ -76,28 +94,27 @@ async def transcribe_audio(audio_data: bytes, target_language: str='en'):
             status_code=500,
             detail="DEEPGRAM_ENV_KEY is not set or is empty. Please check your .env file."
         )
-    
-    # Ensure no extra whitespace
-    api_key = api_key.strip()
-    
-    try:
-        deepgram = DeepgramClient(api_key=api_key)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to initialize Deepgram client: {str(e)}"
-        )
-    
+
+    # Shared client from the registry, so the keep-alive connection is reused
+    deepgram = get_vendor_clients().require('deepgram')
+
+    # Trimmed 16 kHz mono is all Deepgram needs; silent clips stop here, unbilled
+    audio_data = await prepare_stt_audio(audio_data)
+
     try:
         # v3 uses different way to send requests, matching that 
-        response = deepgram.listen.v1.media.transcribe_file(
-            request=audio_data, 
-            model='nova-2',
-            smart_format=True,
-            language=target_language if target_language != "auto" else "en",
-            detect_language=True if target_language == "auto" else False,
-            punctuate=True,
-        )
+        with stage_timer("stt"):
+            response = await call_vendor(
+                DEEPGRAM,
+                "stt",
+                deepgram.listen.v1.media.transcribe_file,
+                request=audio_data,
+                model='nova-2',
+                smart_format=True,
+                language=target_language if target_language != "auto" else "en",
+                detect_language=True if target_language == "auto" else False,
+                punctuate=True,
+            )
         
         # Access response as object attributes (v3+ SDK style)
         transcript = response.results.channels[0].alternatives[0].transcript
@@ -108,21 +125,51 @@ async def transcribe_audio(audio_data: bytes, target_language: str='en'):
             detected_lang = response.results.channels[0].detected_language
         else:
             detected_lang = target_language
-        
-        print(transcript)
+
         return {
             'text': transcript,
             'confidence': confidence
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech to text {str(e)}")
     
+async def prepare_stt_audio(audio_data: bytes) -> bytes:
+    """
+    The recording to send to STT: silence-trimmed 16 kHz mono WAV when the upload
+    can be decoded, otherwise the upload as it is. Raises a 400 for a silent clip.
+    """
+    if not settings.STT_PREPROCESS:
+        return audio_data
+    # Imported here so NumPy loads with the first recording, not at startup
+    from services.audio_preprocess import prepare_for_stt
+    # NumPy releases the GIL for most of this, so a thread keeps the loop free
+    with stage_timer("preprocess"):
+        prepared = await asyncio.to_thread(prepare_for_stt, audio_data, settings.UPLOAD_MAX_SECONDS)
+    if prepared is None:
+        return audio_data
+    record_payload("stt_audio", len(prepared.wav))
+    return prepared.wav
+
 async def get_correction(text, language):
     """
         Given a text in a certain language, use an LLM to check correctness of the sentence.
         If the sentence is not correct, make it correct
+
+        Concurrent calls for the same sentence share one cache lookup and Gemini call.
     """
+    key = llm_cache_key("correction", language, text, CORRECTION_PROMPT_VERSION)
+    # Every waiter gets the same dict, so hand each its own copy
+    return dict(await correction_flights.run(key, lambda: _correct(text, language)))
+
+async def _correct(text, language):
     try:
+        # Learners repeat the same sentences; reuse an earlier correction when we have one
+        cached_correction = await llm_cache.get("correction", language, text, CORRECTION_PROMPT_VERSION)
+        if cached_correction is not None:
+            return cached_correction
+
         prompt = f"""You are a supportive language teacher. A student is learning {language} and said:
         "{text}"
 
@@ -140,46 +187,155 @@ async def get_correction(text, language):
         Return ONLY valid JSON, no markdown or extra text."""
         
         # Use the new SDK format
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=500,
-                response_mime_type='application/json'
+        with stage_timer("llm"):
+            response = await call_vendor(
+                GEMINI,
+                "llm",
+                get_vendor_clients().require('gemini').models.generate_content,
+                model='gemini-2.0-flash',
+                contents=prompt,
+                config=gemini_config(
+                    temperature=0.7,
+                    max_output_tokens=500,
+                    response_mime_type='application/json'
+                )
             )
-        )
-        generated_text = response.text.strip()
-
-        # Clean any markdowns if present. Naive markdown checking
-        if generated_text.startswith("```json"):
-            generated_text = generated_text[7:]
-        if generated_text.startswith("```"):
-            generated_text = generated_text[3:]
-        if generated_text.endswith("```"):
-            generated_text = generated_text[:-3]
-
-        correction_data = json.loads(generated_text.strip())
+        correction_data = parse_model_json(response.text)
+        await llm_cache.put("correction", language, text, CORRECTION_PROMPT_VERSION, correction_data)
         return correction_data
 
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"Error while correction model was parsin json. {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"The correction model returned an error. {str(e)}")
 
-    
+
+def parse_model_json(generated_text: str):
+    """Parse a JSON model response, without the markdown fences it sometimes adds"""
+    generated_text = generated_text.strip()
+
+    # Clean any markdowns if present. Naive markdown checking
+    if generated_text.startswith("```json"):
+        generated_text = generated_text[7:]
+    if generated_text.startswith("```"):
+        generated_text = generated_text[3:]
+    if generated_text.endswith("```"):
+        generated_text = generated_text[:-3]
+
+    return json.loads(generated_text.strip())
+
+async def get_corrections(texts: List[str], language: str) -> Dict[str, Union[dict, Exception]]:
+    """
+    Corrections for several sentences with a single Gemini request.
+
+    Sentences with a cached correction are not sent again, and each new correction
+    is cached under the same key get_correction uses. A sentence the model leaves
+    out of its answer is corrected on its own. Returns each distinct text mapped to
+    its correction, or to the exception that kept it from being corrected.
+    """
+    corrections: Dict[str, Union[dict, Exception]] = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        cached_correction = await llm_cache.get("correction", language, text, CORRECTION_PROMPT_VERSION)
+        if cached_correction is not None:
+            corrections[text] = cached_correction
+        else:
+            missing.append(text)
+
+    if len(missing) > 1:
+        try:
+            corrected = await _correct_batch(missing, language)
+        except Exception as e:
+            corrected = {}
+            for text in missing:
+                corrections[text] = e
+        for index, corrected_text in corrected.items():
+            corrections[missing[index]] = {"corrected_text": corrected_text}
+            await llm_cache.put("correction", language, missing[index], CORRECTION_PROMPT_VERSION,
+                                corrections[missing[index]])
+
+    for text in missing:
+        if text not in corrections:
+            try:
+                corrections[text] = await get_correction(text=text, language=language)
+            except Exception as e:
+                corrections[text] = e
+    return corrections
+
+async def _correct_batch(texts: List[str], language: str) -> Dict[int, str]:
+    """One Gemini request correcting every text; returns corrected text by position"""
+    sentences = json.dumps([{"id": index, "text": text} for index, text in enumerate(texts)], ensure_ascii=False)
+    prompt = f"""You are a supportive language teacher. A student is learning {language} and recorded these sentences, each with an id:
+        {sentences}
+
+        For every sentence, write the grammatically perfect version IN THE SAME LANGUAGE ({language}). Fix grammar/pronunciation but keep it in {language}!
+
+        CRITICAL RULES:
+        - Every "corrected_text" MUST be in {language}, NOT English
+        - Never translate to English - only fix grammar in their target language
+        - If a sentence is already perfect, return it as-is
+        - Correct each sentence on its own; never merge, split or reorder sentences
+        - Keep the corrected text natural and conversational
+
+        Return ONLY valid JSON of the form {{"corrections": [{{"id": <id>, "corrected_text": "..."}}]}}
+        with one entry per sentence, no markdown or extra text."""
+
+    try:
+        with stage_timer("llm"):
+            response = await call_vendor(
+                GEMINI,
+                "llm",
+                get_vendor_clients().require('gemini').models.generate_content,
+                hedge=False,
+                model='gemini-2.0-flash',
+                contents=prompt,
+                config=gemini_config(
+                    temperature=0.7,
+                    max_output_tokens=min(8192, 200 + 150 * len(texts)),
+                    response_mime_type='application/json'
+                )
+            )
+        entries = parse_model_json(response.text).get('corrections', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"The correction model returned an error. {str(e)}")
+
+    corrected = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        index, corrected_text = entry.get('id'), entry.get('corrected_text')
+        if isinstance(index, int) and 0 <= index < len(texts) and isinstance(corrected_text, str) \
+                and corrected_text.strip():
+            corrected[index] = corrected_text.strip()
+    return corrected
+
 @router.post("/practice")
 async def practice_speech(
     file: UploadFile = File(...),
     target_lang: str = Form(...),
-    model_id: str = Form(...)
+    model_id: str = Form(...),
+    audio_format: Optional[str] = Form(None),
+    bitrate: Optional[int] = Form(None),
+    accept: Optional[str] = Header(None)
 ):
+    """
+    Transcribe, correct and re-voice a recording.
 
-    try:
-        audio_data = await file.read()
+    Returns JSON with the audio base64-encoded by default; send `Accept: audio/*`
+    or `Accept: multipart/mixed` to get the audio as raw bytes instead.
 
-        if len(audio_data) < 1000:
-            raise HTTPException(status_code=400, detail="Audio file is too small or empty")
+    The audio is WAV unless `audio_format` (wav, mp3 or opus, with an optional
+    `bitrate` in kbps) or a specific type in Accept such as audio/mpeg asks for
+    something smaller.
+    """
+    try:
+        audio_data = await read_upload(file)
+        output_format = resolve_audio_format(audio_format, accept)
+        resolve_bitrate(output_format, bitrate)
 
         # Step 1 is to transcribe with deepgram
         transcription = await transcribe_audio(audio_data, target_lang)
@@ -192,28 +348,270 @@ async def practice_speech(
         corrected_text = correction['corrected_text']
 
         # Step 3 is to send it to Fish audio for it to be made into the sound of someone
-        request = tts.TTSRequest(transcript=corrected_text, model_id=model_id)
+        request = tts.TTSRequest(transcript=corrected_text, model_id=model_id,
+                                 audio_format=output_format, bitrate=bitrate)
         correction_audio = await generate_speech(request=request)
 
-        # Convert the audio to base64 for easy frontend handling
-        audio_base64 = base64.b64encode(correction_audio).decode('utf-8')
-
-
-        return {
+        return audio_response(accept, {
             "success": True,
             "corrected_text": corrected_text,
-            "audio_base64": audio_base64,
-            "audio_format": "wav",
+            "audio_format": output_format,
             "initial_text": transcription['text'],
-        }
+        }, correction_audio, audio_field="audio_base64")
 
-    
     except HTTPException:
         raise 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error with practice mode {str(e)}")
 
-async def generate_speech(request: TTSRequest):
+@router.post("/practice/stream")
+async def practice_speech_stream(
+    file: UploadFile = File(...),
+    target_lang: str = Form(...),
+    model_id: str = Form(...),
+    audio_format: Optional[str] = Form(None),
+    bitrate: Optional[int] = Form(None)
+):
+    """
+    Streaming variant of /practice as server-sent events.
+
+    Events, in order: `transcript`, `correction`, one `audio` event per TTS chunk
+    as Fish Audio produces it, then `done`. Failures after the stream has started
+    are sent as an `error` event.
+    """
+    audio_data = await read_upload(file)
+    output_format = resolve_audio_format(audio_format)
+    resolve_bitrate(output_format, bitrate)
+
+    async def events():
+        try:
+            transcription = await transcribe_audio(audio_data, target_lang)
+
+            if not transcription['text'].strip():
+                raise HTTPException(status_code=400, detail="No speech was detected")
+
+            yield sse_event("transcript", {"initial_text": transcription['text']})
+
+            correction = await get_correction(text=transcription['text'], language=target_lang)
+            corrected_text = correction['corrected_text']
+            yield sse_event("correction", {"corrected_text": corrected_text})
+
+            request = tts.TTSRequest(transcript=corrected_text, model_id=model_id,
+                                     audio_format=output_format, bitrate=bitrate)
+            seq = 0
+            async for chunk in stream_speech(request=request):
+                yield audio_chunk_event(seq, chunk)
+                seq += 1
+
+            yield sse_event("done", {"audio_format": output_format, "chunks": seq})
+        except Exception as e:
+            yield error_event(e)
+
+    return sse_response(events())
+
+@router.post("/practice/batch")
+async def practice_batch(
+    files: List[UploadFile] = File(...),
+    target_lang: str = Form(...),
+    model_id: str = Form(...),
+    audio_format: Optional[str] = Form(None),
+    bitrate: Optional[int] = Form(None)
+):
+    """
+    Grade a set of recordings in one request, as server-sent events.
+
+    The clips are transcribed concurrently, corrected together in one Gemini
+    request, and re-voiced PRACTICE_BATCH_TTS_CONCURRENCY at a time. Events:
+    `transcript` for each clip as its transcription finishes, then `correction`
+    for each clip, then for each clip as its audio is ready an `item` event
+    followed by its `audio` events (with `segment` set to the clip's index), and
+    finally `done`. Clips are identified by `index`, their position in the
+    upload. A clip that fails gets an `item` event with an `error` instead of
+    audio; the rest of the set carries on.
+
+    The whole set may be at most PRACTICE_BATCH_MAX_MB. Each clip stays in its
+    upload spool until its turn to be transcribed, so only the clips being
+    transcribed are held in memory at once.
+    """
+    if len(files) > settings.PRACTICE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can have at most {settings.PRACTICE_BATCH_MAX_ITEMS} recordings"
+        )
+    if sum(file.size or 0 for file in files) > max_batch_upload_bytes():
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can have at most {settings.PRACTICE_BATCH_MAX_MB:g} MB of recordings"
+        )
+    output_format = resolve_audio_format(audio_format)
+    resolve_bitrate(output_format, bitrate)
+
+    return sse_response(practice_batch_events(files, target_lang, model_id, output_format, bitrate))
+
+async def practice_batch_events(clips: List[UploadFile], target_lang: str, model_id: str,
+                                output_format: str, bitrate: Optional[int]):
+    """The /practice/batch event stream over the uploaded clips"""
+    succeeded = 0
+
+    def item_error(index: int, e: Exception) -> str:
+        status_code = e.status_code if isinstance(e, HTTPException) else 500
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        return sse_event("item", {"index": index, "error": {"status_code": status_code, "detail": detail}})
+
+    try:
+        # Step 1: transcribe every clip, a few at a time, reading each only then
+        stt_slots = asyncio.Semaphore(settings.PRACTICE_BATCH_STT_CONCURRENCY)
+
+        async def transcribe(index: int):
+            try:
+                async with stt_slots:
+                    audio_data = await read_upload(clips[index])
+                    transcription = await transcribe_audio(audio_data, target_lang)
+                if not transcription['text'].strip():
+                    raise HTTPException(status_code=400, detail="No speech was detected")
+                return index, transcription['text'], None
+            except Exception as e:
+                return index, None, e
+
+        transcripts = {}
+        async for index, text, error in _completed([transcribe(index) for index in range(len(clips))]):
+            if error is not None:
+                yield item_error(index, error)
+            else:
+                transcripts[index] = text
+                yield sse_event("transcript", {"index": index, "initial_text": text})
+
+        # Step 2: correct them all with one prompt
+        corrections = await get_corrections(list(transcripts.values()), target_lang) if transcripts else {}
+        corrected = {}
+        for index, text in sorted(transcripts.items()):
+            correction = corrections[text]
+            if isinstance(correction, Exception):
+                yield item_error(index, correction)
+            else:
+                corrected[index] = correction['corrected_text']
+                yield sse_event("correction", {"index": index, "corrected_text": corrected[index]})
+
+        # Step 3: re-voice the corrections, a few at a time, sending each as it is done
+        tts_slots = asyncio.Semaphore(settings.PRACTICE_BATCH_TTS_CONCURRENCY)
+
+        async def synthesize(index: int):
+            try:
+                async with tts_slots:
+                    audio = await generate_speech(tts.TTSRequest(
+                        transcript=corrected[index], model_id=model_id, audio_format=output_format, bitrate=bitrate
+                    ))
+                return index, audio, None
+            except Exception as e:
+                return index, None, e
+
+        async for index, audio, error in _completed([synthesize(index) for index in corrected]):
+            if error is not None:
+                yield item_error(index, error)
+                continue
+            succeeded += 1
+            yield sse_event("item", {
+                "index": index,
+                "initial_text": transcripts[index],
+                "corrected_text": corrected[index],
+                "audio_format": output_format,
+            })
+            for seq, offset in enumerate(range(0, len(audio), STREAM_CHUNK_SIZE)):
+                yield audio_chunk_event(seq, audio[offset:offset + STREAM_CHUNK_SIZE], segment=index)
+
+        yield sse_event("done", {
+            "items": len(clips),
+            "succeeded": succeeded,
+            "failed": len(clips) - succeeded,
+            "audio_format": output_format,
+        })
+    except Exception as e:
+        yield error_event(e)
+
+async def _completed(calls: list):
+    """Run the coroutines concurrently and yield their results as they finish"""
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The client went away: don't keep paying for the rest of the set
+        for task in tasks:
+            task.cancel()
+
+async def read_upload(file: UploadFile) -> bytes:
+    """
+    Read the uploaded recording, timing the read and recording its size.
+
+    Rejects near-empty uploads with a 400, uploads over the size or duration
+    limits with a 413, and uploads whose magic bytes are not an audio container
+    we know with a 415, whatever content type they claim.
+    """
+    with stage_timer("upload_read"):
+        audio_data = await read_audio_upload(file)
+    record_payload("upload", len(audio_data))
+    return audio_data
+
+def json_response(content: dict) -> JSONResponse:
+    """Serialize a response body up front so its cost shows up as its own stage"""
+    with stage_timer("serialize"):
+        response = JSONResponse(content=content)
+    record_payload("response", len(response.body))
+    return response
+
+def audio_response(accept: Optional[str], content: dict, audio: bytes, audio_field: str) -> Response:
+    """
+    Send `content` together with the audio in the mode the Accept header asks for.
+    JSON clients get the audio base64-encoded in `audio_field`.
+    """
+    mode = negotiate_audio_response(accept)
+    if mode == AUDIO:
+        return audio_body_response(content, audio, content["audio_format"])
+    if mode == MULTIPART:
+        return multipart_response(content, audio, content["audio_format"])
+
+    # Convert the audio to base64 for easy frontend handling
+    with stage_timer("base64"):
+        audio_base64 = base64.b64encode(audio).decode('utf-8')
+    return json_response({**content, audio_field: audio_base64})
+
+def _validate_tts_request(request: TTSRequest):
+    if not request.transcript.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Transcript cannot be empty"
+        )
+    
+    if not request.model_id.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Model ID cannot be empty"
+        )
+
+    resolve_audio_format(request.audio_format)
+    resolve_bitrate(request.audio_format, request.bitrate)
+
+def speech_cache_key(request: TTSRequest) -> str:
+    # A request without a bitrate gets the default one, so both share an entry
+    bitrate = resolve_bitrate(request.audio_format, request.bitrate)
+    return tts_cache_key(request.transcript, request.model_id, request.audio_format, 'balanced', bitrate)
+
+def _speech_options(request: TTSRequest) -> dict:
+    """Fish Audio arguments for the requested output format and bitrate"""
+    options = {
+        'text': request.transcript,
+        'reference_id': request.model_id,
+        'format': request.audio_format,
+        'latency': 'balanced'
+    }
+    bitrate = resolve_bitrate(request.audio_format, request.bitrate)
+    if request.audio_format == 'mp3':
+        options['config'] = fish_tts_config(format='mp3', mp3_bitrate=bitrate, latency='balanced')
+    elif request.audio_format == 'opus':
+        options['config'] = fish_tts_config(format='opus', opus_bitrate=bitrate, latency='balanced')
+    return options
+
+async def generate_speech(request: TTSRequest, observe: bool = True):
     """
     Generate speech from text using a Fish Audio voice model.
     
@@ -222,54 +620,22 @@ async def generate_speech(request: TTSRequest):
     - A preset voice ID (from preset_voices.json)
     
     Returns audio file as bytes.
+
+    Concurrent requests for the same phrase, voice and format share one cache
+    lookup and synthesis. Phrases are counted for the cache warm-up job unless
+    `observe` is False (as it is for the warm-up's own calls).
     """
     try:
         # Validate input
-        if not request.transcript.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Transcript cannot be empty"
-            )
-        
-        if not request.model_id.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Model ID cannot be empty"
-            )
+        _validate_tts_request(request)
         
         # Check if it's a preset voice (for logging/debugging)
         # is_preset = is_preset_voice(request.model_id)
         
-        # Generate speech using the voice model (works for both preset and user voices)
-        audio = fish_audio.tts.convert(
-            text=request.transcript,
-            reference_id=request.model_id,
-            format='wav',
-            latency='balanced'
-        )
-        # Fish Audio SDK returns bytes directly
-        if isinstance(audio, bytes):
-            return audio
-        elif hasattr(audio, 'read'):
-            # Fallback: file-like object
-            return audio.read()
-        elif hasattr(audio, '__iter__') and not isinstance(audio, (str, bytes)):
-            # Fallback: iterable (generator/iterator) - collect chunks
-            audio_chunks = []
-            for chunk in audio:
-                if isinstance(chunk, bytes):
-                    audio_chunks.append(chunk)
-                elif hasattr(chunk, 'read'):
-                    audio_chunks.append(chunk.read())
-                else:
-                    audio_chunks.append(bytes(chunk))
-            return b"".join(audio_chunks)
-        else:
-            # Unexpected type
-            raise HTTPException(
-                status_code=500,
-                detail=f"Unexpected audio format from Fish Audio: {type(audio)}"
-            )
+        if observe:
+            observed_phrases.observe(request.transcript)
+        cache_key = speech_cache_key(request)
+        return await speech_flights.run(cache_key, lambda: _cached_speech(request, cache_key))
             
     except HTTPException:
         raise
@@ -277,4 +643,90 @@ async def generate_speech(request: TTSRequest):
         raise HTTPException(
             status_code=500,
             detail=f"Error generating speech: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def _cached_speech(request: TTSRequest, cache_key: str) -> bytes:
+    # Same phrase, voice and format as an earlier request: skip the paid synthesis
+    cached_audio = await tts_cache.get(cache_key)
+    if cached_audio is not None:
+        return cached_audio
+
+    # Generate speech using the voice model (works for both preset and user voices)
+    with stage_timer("tts"):
+        audio = await call_vendor(FISH_AUDIO, "tts", _synthesize, request)
+    record_payload("tts_audio", len(audio))
+    await tts_cache.put(cache_key, audio)
+    return audio
+
+async def stream_speech(request: TTSRequest):
+    """
+    Like generate_speech, but yields audio chunks as Fish Audio produces them.
+
+    The chunks are also kept so the finished audio can go into the TTS cache;
+    cache hits are replayed in STREAM_CHUNK_SIZE pieces.
+    """
+    _validate_tts_request(request)
+    observed_phrases.observe(request.transcript)
+
+    cache_key = speech_cache_key(request)
+    cached_audio = await tts_cache.get(cache_key)
+    if cached_audio is not None:
+        for offset in range(0, len(cached_audio), STREAM_CHUNK_SIZE):
+            yield cached_audio[offset:offset + STREAM_CHUNK_SIZE]
+        return
+
+    try:
+        audio_chunks = []
+        # The consumer paces this generator, so only time-to-first-chunk is the vendor's
+        started = time.perf_counter()
+        async for chunk in stream_vendor(
+            FISH_AUDIO,
+            "tts",
+            get_vendor_clients().require('fish_audio').tts.stream,
+            **_speech_options(request)
+        ):
+            if chunk:
+                if not audio_chunks:
+                    observe_stage("tts_first_chunk", time.perf_counter() - started)
+                audio_chunks.append(chunk)
+                yield chunk
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating speech: {str(e)}"
+        )
+    audio = b"".join(audio_chunks)
+    record_payload("tts_audio", len(audio))
+    await tts_cache.put(cache_key, audio)
+
+def _synthesize(request: TTSRequest) -> bytes:
+    """
+    Blocking Fish Audio synthesis. Runs on the Fish Audio vendor pool, so both the
+    request and the chunk collection stay off the event loop.
+    """
+    audio = get_vendor_clients().require('fish_audio').tts.convert(**_speech_options(request))
+    # Fish Audio SDK returns bytes directly
+    if isinstance(audio, bytes):
+        return audio
+    elif hasattr(audio, 'read'):
+        # Fallback: file-like object
+        return audio.read()
+    elif hasattr(audio, '__iter__') and not isinstance(audio, (str, bytes)):
+        # Fallback: iterable (generator/iterator) - collect chunks
+        audio_chunks = []
+        for chunk in audio:
+            if isinstance(chunk, bytes):
+                audio_chunks.append(chunk)
+            elif hasattr(chunk, 'read'):
+                audio_chunks.append(chunk.read())
+            else:
+                audio_chunks.append(bytes(chunk))
+        return b"".join(audio_chunks)
+    else:
+        # Unexpected type
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected audio format from Fish Audio: {type(audio)}"
+        )
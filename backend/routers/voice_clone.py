@@ -1,42 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from fishaudio import FishAudio
-from config import settings
-import os
+from auth import get_current_user
+from services.clone_jobs import clone_jobs
+from services.principal_cache import Principal
+from services.uploads import read_audio_upload
 
-# FishAudio reads API key from environment variable FISH_API_KEY
-os.environ['FISH_API_KEY'] = settings.FISH_AUDIO_API_KEY
-fish_audio = FishAudio()
 router = APIRouter(prefix="/api", tags=['api'])
 
-@router.post("/create_clone")
+@router.post("/create_clone", status_code=status.HTTP_202_ACCEPTED)
 async def create_user_clone(
     file: UploadFile = File(...),
     voice_name: str = Form(...),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create or update a voice clone for the authenticated user.
-    
-    If the user already has a voice_model_id, it will be updated with the new voice.
-    Otherwise, a new voice clone will be created and saved to the user's record.
+
+    The clone is made in the background: this returns a job id straight away, and
+    GET /api/clone_jobs/{job_id} reports its progress. When the job succeeds the
+    new voice is saved as the user's voice_model_id, replacing any earlier one.
+    Uploading a sample that is already being cloned, or was cloned recently,
+    returns the existing job.
     """
     try:
-        # Read the audio file
-        audio_data = await file.read()
-        
-        voice = fish_audio.voices.create(
-            title=voice_name,
-            voices=[audio_data],
-            description=f"Custom voice clone for {"me"}"
+        # Read the audio file, within the upload size and duration limits
+        audio_data = await read_audio_upload(file)
+
+        job, created = clone_jobs.submit(
+            user_id=current_user.id,
+            voice_name=voice_name,
+            description=f"Custom voice clone for {current_user.name or current_user.email}",
+            audio=audio_data
         )
-                
+
         return {
             "success": True,
-            "message": "Voice clone updated successfully",
-            "voice_id": voice.id,
-            "voice_name": voice_name
+            "message": "Voice clone queued" if created else "This sample is already being cloned",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/clone_jobs/{job.id}",
+            "voice_name": job.voice_name
         }
-    
+
     except HTTPException:
         raise
     except Exception as e:
@@ -44,3 +48,15 @@ async def create_user_clone(
             status_code=500,
             detail=f"Error while creating/updating user clone: {str(e)}"
         )
+
+@router.get("/clone_jobs/{job_id}")
+async def get_clone_job(job_id: str, current_user: Principal = Depends(get_current_user)):
+    """
+    Status of a voice-clone job: queued, running, saving, succeeded or failed.
+    Succeeded jobs carry the voice_id; failed ones an error.
+    """
+    job = clone_jobs.get(job_id)
+    # Other users' jobs are reported as missing rather than forbidden
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Clone job not found")
+    return job.to_dict()
@@ -1,7 +1,10 @@
+from typing import Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class TTSRequest(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     
     transcript: str = Field(..., description="The text to convert to speech")
-    model_id: str = Field(..., description="The Fish Audio cloned voice model ID (the ID of your custom voice clone)")
\ No newline at end of file
+    model_id: str = Field(..., description="The Fish Audio cloned voice model ID (the ID of your custom voice clone)")
+    audio_format: str = Field("wav", description="Output format: wav, mp3 or opus")
+    bitrate: Optional[int] = Field(None, description="Output bitrate in kbps for mp3 or opus; None for wav")
\ No newline at end of file
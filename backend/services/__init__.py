@@ -0,0 +1,19 @@
+from .vendor_pool import (
+    DEEPGRAM,
+    GEMINI,
+    FISH_AUDIO,
+    configure_vendor_pools,
+    iterate_vendor_stream,
+    run_vendor_call,
+    shutdown_vendor_pools
+)
+
+__all__ = [
+    "DEEPGRAM",
+    "GEMINI",
+    "FISH_AUDIO",
+    "configure_vendor_pools",
+    "iterate_vendor_stream",
+    "run_vendor_call",
+    "shutdown_vendor_pools"
+]
@@ -0,0 +1,257 @@
+"""
+Admission control for the voice pipeline endpoints.
+
+Each /api/practice, /api/reply or /api/create_clone request holds a paid vendor
+call for seconds. Without a limit a traffic spike piles up work against the
+vendors until every request times out together. Instead each endpoint gets an
+AdmissionPool:
+
+    * at most `max_concurrent` requests run at once
+    * up to `max_queue` more wait, first come first served, for at most
+      `queue_timeout` seconds
+    * one signed-in user (the bearer token's user) may hold at most
+      `per_user_limit` running or waiting requests
+    * one client address may hold at most `per_address_limit` of the requests
+      without a valid token. Off (0) by default: a classroom behind one NAT, or
+      users behind a proxy, share an address
+
+Anything past those limits is rejected straight away, before the upload is read:
+429 for a user over their limit, 503 when the endpoint's queue is full or the
+wait ran out. Both carry a Retry-After estimated from recent request durations.
+
+AdmissionMiddleware applies the pools by path. It is a pure ASGI middleware, so a
+streaming response keeps its slot until the last event is sent.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from config import settings
+from services.metrics import observe_stage
+
+REJECTION_REASONS = ("user_limit", "queue_full", "queue_timeout")
+
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionPool:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 per_user_limit: int = 0, per_address_limit: int = 0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user_limit = per_user_limit
+        self.per_address_limit = per_address_limit
+
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_user: Dict[str, int] = {}
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._hold_seconds = 1.0
+
+        self.admitted = 0
+        self.rejected = {reason: 0 for reason in REJECTION_REASONS}
+
+    @asynccontextmanager
+    async def admit(self, user: str):
+        """Hold a slot for the duration of the block"""
+        ticket = await self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    async def acquire(self, user: str) -> Tuple[str, float]:
+        """
+        Take a slot, waiting in the queue if need be; pass the ticket to release().
+        Raises HTTPException (429 or 503, with Retry-After) when the request is shed.
+        """
+        # Anonymous requests are identified by address (see request_identity)
+        limit = self.per_address_limit if user.startswith("ip:") else self.per_user_limit
+        if limit and self._per_user.get(user, 0) >= limit:
+            self._reject("user_limit", 429, f"Too many concurrent {self.name} requests; wait for one to finish")
+
+        queued = self.active >= self.max_concurrent or bool(self._waiters)
+        if queued and len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", 503, f"The {self.name} service is at capacity; try again shortly")
+
+        self._per_user[user] = self._per_user.get(user, 0) + 1
+        try:
+            if queued:
+                await self._wait()
+            else:
+                self.active += 1
+        except BaseException:
+            self._leave(user)
+            raise
+
+        self.admitted += 1
+        return user, time.perf_counter()
+
+    def release(self, ticket: Tuple[str, float]) -> None:
+        user, admitted_at = ticket
+        held = time.perf_counter() - admitted_at
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._leave(user)
+        self._release_slot()
+
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the queue ahead and recent hold times"""
+        ahead = (len(self._waiters) + 1) / max(self.max_concurrent, 1)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(self._hold_seconds * ahead)))
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+    async def _wait(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            self._reject("queue_timeout", 503, f"Timed out waiting for the {self.name} service; try again shortly")
+        observe_stage("admission_wait", time.perf_counter() - started)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        """A waiter gave up; pass on the slot if one was already handed to it"""
+        if waiter.done() and not waiter.cancelled():
+            self._release_slot()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def _release_slot(self) -> None:
+        # Hand the slot straight to the next waiter so a newcomer can't jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _leave(self, user: str) -> None:
+        remaining = self._per_user.get(user, 0) - 1
+        if remaining > 0:
+            self._per_user[user] = remaining
+        else:
+            self._per_user.pop(user, None)
+
+    def _reject(self, reason: str, status_code: int, detail: str):
+        self.rejected[reason] += 1
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+
+def create_admission_pools() -> Dict[str, AdmissionPool]:
+    def pool(name: str, max_concurrent: int) -> AdmissionPool:
+        return AdmissionPool(
+            name,
+            max_concurrent=max_concurrent,
+            max_queue=settings.ADMISSION_QUEUE_SIZE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            per_user_limit=settings.ADMISSION_PER_USER_CONCURRENCY,
+            per_address_limit=settings.ADMISSION_PER_ADDRESS_CONCURRENCY,
+        )
+
+    return {
+        "practice": pool("practice", settings.ADMISSION_PRACTICE_CONCURRENCY),
+        "reply": pool("reply", settings.ADMISSION_REPLY_CONCURRENCY),
+        "clone": pool("clone", settings.ADMISSION_CLONE_CONCURRENCY),
+    }
+
+
+admission_pools = create_admission_pools()
+
+# POST paths and the pool each one draws from; streaming variants share a pool
+ADMISSION_ROUTES = {
+    "/api/practice": "practice",
+    "/api/practice/stream": "practice",
+    "/api/practice/batch": "practice",
+    "/api/reply": "reply",
+    "/api/reply/stream": "reply",
+    "/api/create_clone": "clone",
+}
+
+
+def request_identity(scope) -> str:
+    """The user a request counts against: the bearer token's user id, else the client address"""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                user_id = _token_user_id(token.strip())
+                if user_id is not None:
+                    return f"user:{user_id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+def _token_user_id(token: str) -> Optional[int]:
+    # Imported here: auth pulls in the database layer, which this module otherwise doesn't need
+    from auth import decode_token, user_id_from_claims
+    from services.principal_cache import principal_cache
+
+    user_id = principal_cache.get_token(token)
+    if user_id is not None:
+        return user_id
+    invalid = HTTPException(status_code=401)
+    try:
+        return user_id_from_claims(decode_token(token, invalid), invalid)
+    except HTTPException:
+        # The route rejects bad tokens itself; here they just count by address
+        return None
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware that runs the requests in ADMISSION_ROUTES through their pool"""
+
+    def __init__(self, app, pools: Optional[Dict[str, AdmissionPool]] = None,
+                 routes: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.pools = admission_pools if pools is None else pools
+        self.routes = ADMISSION_ROUTES if routes is None else routes
+
+    async def __call__(self, scope, receive, send):
+        pool_name = self.routes.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if pool_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.pools[pool_name]
+        try:
+            ticket = await pool.acquire(request_identity(scope))
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(ticket)
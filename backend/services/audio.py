@@ -0,0 +1,158 @@
+"""
+Audio container helpers: output format negotiation, upload sniffing and joining
+per-sentence WAV segments.
+"""
+import struct
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Output formats we ask Fish Audio for, with the media type we send them as
+AUDIO_FORMATS = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg; codecs=opus",
+}
+
+# Bitrates (kbps) Fish Audio accepts per compressed format, and the default
+AUDIO_BITRATES = {
+    "mp3": (64, 128, 192),
+    "opus": (24, 32, 48, 64),
+}
+DEFAULT_BITRATES = {
+    "mp3": 128,
+    "opus": 32,
+}
+
+# Media types in an Accept header that name one of our formats
+_ACCEPT_FORMATS = {
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+}
+
+
+def resolve_audio_format(requested: Optional[str], accept: Optional[str] = None) -> str:
+    """
+    The output format for a request: an explicit `audio_format` field wins, then
+    the first specific audio type in the Accept header, then WAV.
+    """
+    if requested:
+        audio_format = requested.strip().lower()
+        if audio_format not in AUDIO_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported audio format '{requested}'. Use one of: {', '.join(AUDIO_FORMATS)}"
+            )
+        return audio_format
+
+    for entry in (accept or "").split(","):
+        media_type = entry.split(";")[0].strip().lower()
+        if media_type in _ACCEPT_FORMATS:
+            return _ACCEPT_FORMATS[media_type]
+    return "wav"
+
+
+def resolve_bitrate(audio_format: str, bitrate: Optional[int]) -> Optional[int]:
+    """The bitrate to request; WAV has none, compressed formats fall back to a default"""
+    if audio_format not in AUDIO_BITRATES:
+        return None
+    if bitrate is None:
+        return DEFAULT_BITRATES[audio_format]
+    if bitrate not in AUDIO_BITRATES[audio_format]:
+        allowed = ", ".join(str(rate) for rate in AUDIO_BITRATES[audio_format])
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported {audio_format} bitrate {bitrate}. Use one of: {allowed}"
+        )
+    return bitrate
+
+
+def sniff_audio_type(data: bytes) -> Optional[str]:
+    """Media type of an upload from its magic bytes, or None if it is not audio we know"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "audio/wav"
+    if data[:4] == b"OggS":
+        return "audio/ogg"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        # EBML header: what MediaRecorder produces in Chrome and Firefox
+        return "audio/webm"
+    if data[:4] == b"fLaC":
+        return "audio/flac"
+    if data[4:8] == b"ftyp":
+        return "audio/mp4"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    return None
+
+
+def _wav_format_and_data(wav: bytes) -> Tuple[bytes, bytes]:
+    """
+    Return the raw `fmt ` chunk body and PCM data of a WAV file.
+
+    Streamed WAVs often carry placeholder sizes in their headers, so a data chunk
+    whose declared size runs past the end of the buffer just takes the rest.
+    """
+    if wav[:4] != b"RIFF" or wav[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    fmt, offset = None, 12
+    while offset + 8 <= len(wav):
+        chunk_id = wav[offset:offset + 4]
+        chunk_size = struct.unpack("<I", wav[offset + 4:offset + 8])[0]
+        body_start = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = wav[body_start:body_start + chunk_size]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return fmt, wav[body_start:min(body_start + chunk_size, len(wav))]
+        offset = body_start + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+
+def wav_duration(wav: bytes) -> Optional[float]:
+    """Seconds of audio in a WAV file from its byte rate, or None if the header can't tell"""
+    try:
+        fmt, pcm = _wav_format_and_data(wav)
+    except ValueError:
+        return None
+    if len(fmt) < 16:
+        return None
+    byte_rate = struct.unpack("<I", fmt[8:12])[0]
+    return len(pcm) / byte_rate if byte_rate else None
+
+
+def concat_wav(segments: List[bytes]) -> bytes:
+    """
+    Join WAV files with the same format into one WAV.
+
+    Used when a reply is synthesized sentence by sentence but the client expects
+    a single file.
+    """
+    if not segments:
+        raise ValueError("No WAV segments to join")
+    if len(segments) == 1:
+        return segments[0]
+
+    fmt, pcm_parts = None, []
+    for segment in segments:
+        segment_fmt, data = _wav_format_and_data(segment)
+        if fmt is None:
+            fmt = segment_fmt
+        elif segment_fmt != fmt:
+            raise ValueError("Cannot join WAV segments with different formats")
+        pcm_parts.append(data)
+
+    data_size = sum(len(part) for part in pcm_parts)
+    header = b"".join([
+        b"RIFF", struct.pack("<I", 4 + 8 + len(fmt) + 8 + data_size), b"WAVE",
+        b"fmt ", struct.pack("<I", len(fmt)), fmt,
+        b"data", struct.pack("<I", data_size),
+    ])
+    return header + b"".join(pcm_parts)
+
@@ -0,0 +1,204 @@
+"""
+Preprocessing of recordings before speech-to-text.
+
+Browsers upload what the microphone captured: usually 48 kHz stereo WebM/Opus,
+with silence before the learner starts and after they stop. Deepgram bills and
+spends time on all of it. prepare_for_stt decodes the upload, downmixes it to
+mono, resamples it to 16 kHz (all Deepgram needs for speech), and trims leading
+and trailing silence with an energy-based voice activity detector. The result is
+sent as a 16-bit PCM WAV. A clip with no speech in it is rejected with a 400
+before any paid call is made.
+
+WAV is decoded here. Other containers need ffmpeg on the PATH; without it they
+are passed through untouched, as they were before this stage existed. Given a
+max_seconds, ffmpeg stops decoding just past it, so a long compressed recording
+costs no more than a short one before it is rejected.
+"""
+import io
+import shutil
+import struct
+import subprocess
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from services.audio import _wav_format_and_data, sniff_audio_type
+
+TARGET_SAMPLE_RATE = 16000
+
+# Voice activity detection works on 20 ms frames. A frame is voiced when its RMS
+# level is within SPEECH_RANGE_DB of the loudest frame and above SILENCE_DBFS.
+FRAME_SECONDS = 0.02
+SILENCE_DBFS = -45.0
+SPEECH_RANGE_DB = 30.0
+# Less voiced audio than this counts as no speech at all
+MIN_SPEECH_SECONDS = 0.1
+# Audio kept either side of the detected speech, so soft onsets aren't clipped
+PADDING_SECONDS = 0.15
+
+FFMPEG_TIMEOUT_SECONDS = 30
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class PreparedAudio:
+    wav: bytes
+    duration: float
+    original_duration: float
+
+
+def prepare_for_stt(data: bytes, max_seconds: Optional[float] = None) -> Optional[PreparedAudio]:
+    """
+    Decode, downmix, resample and trim a recording for STT.
+
+    Returns None when the upload can't be decoded here, in which case the caller
+    should send the original bytes. Raises HTTPException 400 when it decodes to
+    silence, and 413 when it is longer than max_seconds.
+    """
+    decoded = decode_audio(data, max_seconds)
+    if decoded is None:
+        return None
+    samples, sample_rate = decoded
+
+    mono = downmix(samples)
+    original_duration = len(mono) / sample_rate
+    if max_seconds is not None and original_duration > max_seconds:
+        raise HTTPException(status_code=413, detail=f"Recording is too long. The limit is {max_seconds:g} seconds.")
+    mono = resample(mono, sample_rate, TARGET_SAMPLE_RATE)
+
+    speech = detect_speech(mono, TARGET_SAMPLE_RATE)
+    if speech is None:
+        raise HTTPException(status_code=400, detail="No speech was detected in the recording")
+    start, end = speech
+    trimmed = mono[start:end]
+    return PreparedAudio(
+        wav=encode_wav(trimmed, TARGET_SAMPLE_RATE),
+        duration=len(trimmed) / TARGET_SAMPLE_RATE,
+        original_duration=original_duration,
+    )
+
+
+def decode_audio(data: bytes, max_seconds: Optional[float] = None) -> Optional[Tuple[np.ndarray, int]]:
+    """Samples as float32 in [-1, 1] with shape (frames, channels), and the sample rate"""
+    if sniff_audio_type(data) == "audio/wav":
+        return decode_wav(data)
+    return decode_with_ffmpeg(data, max_seconds)
+
+
+def decode_wav(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """Integer PCM and float WAV; None for anything else, e.g. compressed WAV codecs"""
+    try:
+        fmt, pcm = _wav_format_and_data(data)
+    except ValueError:
+        return None
+    if len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    if channels == 0 or sample_rate == 0 or bits not in (8, 16, 24, 32, 64):
+        return None
+
+    width = bits // 8
+    usable = len(pcm) - len(pcm) % (width * channels)
+    pcm = pcm[:usable]
+    if format_tag == _WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(pcm, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif format_tag == _WAVE_FORMAT_PCM and bits in (16, 32):
+        dtype = "<i2" if bits == 16 else "<i4"
+        samples = np.frombuffer(pcm, dtype=dtype).astype(np.float32) / float(2 ** (bits - 1))
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 24:
+        # Widen each little-endian 3-byte sample to 4 bytes, then shift the sign back in
+        raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3)
+        widened = np.zeros((len(raw), 4), dtype=np.uint8)
+        widened[:, 1:] = raw
+        samples = (widened.view("<i4").ravel() >> 8).astype(np.float32) / float(2 ** 23)
+    else:
+        return None
+    return samples.reshape(-1, channels), sample_rate
+
+
+def decode_with_ffmpeg(data: bytes, max_seconds: Optional[float] = None) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode any container ffmpeg understands straight to 16 kHz mono. With
+    max_seconds, decoding stops a second past it: enough to tell it was exceeded.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+    limit = [] if max_seconds is None else ["-t", f"{max_seconds + 1:g}"]
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0", *limit,
+             "-f", "s16le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "pipe:1"],
+            input=data, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    samples = np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+    return samples.reshape(-1, 1), TARGET_SAMPLE_RATE
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample by linear interpolation. When downsampling, a windowed-sinc low-pass
+    at the new Nyquist frequency runs first so higher frequencies don't alias.
+    """
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    if target_rate < source_rate:
+        samples = _low_pass(samples, cutoff=0.5 * target_rate / source_rate)
+    target_length = int(round(len(samples) * target_rate / source_rate))
+    positions = np.arange(target_length, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int) -> Optional[Tuple[int, int]]:
+    """Sample range from the first to the last voiced frame, padded; None if nothing is voiced"""
+    frame_length = int(sample_rate * FRAME_SECONDS)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return None
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    level_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    threshold = max(SILENCE_DBFS, level_db.max() - SPEECH_RANGE_DB)
+    voiced = np.flatnonzero(level_db > threshold)
+    if len(voiced) * FRAME_SECONDS < MIN_SPEECH_SECONDS:
+        return None
+
+    padding = int(sample_rate * PADDING_SECONDS)
+    start = max(0, voiced[0] * frame_length - padding)
+    end = min(len(samples), (voiced[-1] + 1) * frame_length + padding)
+    return start, end
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Mono 16-bit PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    buffer = io.BytesIO()
+    buffer.write(b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE")
+    buffer.write(b"fmt " + struct.pack("<IHHIIHH", 16, _WAVE_FORMAT_PCM, 1, sample_rate, sample_rate * 2, 2, 16))
+    buffer.write(b"data" + struct.pack("<I", len(pcm)) + pcm)
+    return buffer.getvalue()
+
+
+def _low_pass(samples: np.ndarray, cutoff: float, taps: int = 63) -> np.ndarray:
+    """Hamming-windowed sinc FIR; cutoff is a fraction of the sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    kernel /= kernel.sum()
+    return np.convolve(samples, kernel.astype(np.float32), mode="same")
+
@@ -0,0 +1,90 @@
+"""
+Response modes for endpoints that return synthesized audio.
+
+JSON with the audio base64-encoded in a field is the default, and it is what
+existing clients get. Base64 makes the payload about a third larger and costs
+several full-buffer copies, so a client can ask for the raw bytes instead with
+its Accept header:
+
+    Accept: audio/*          audio body, metadata JSON in the X-Audio-Metadata header
+    Accept: multipart/mixed  a JSON part followed by an audio part
+    Accept: application/json (or no Accept header) the original JSON body
+"""
+import json
+import uuid
+from typing import Optional
+
+from fastapi.responses import Response
+
+from services.audio import AUDIO_FORMATS
+from services.metrics import record_payload
+
+JSON = "json"
+AUDIO = "audio"
+MULTIPART = "multipart"
+
+METADATA_HEADER = "X-Audio-Metadata"
+
+
+def negotiate_audio_response(accept: Optional[str]) -> str:
+    """
+    Pick the response mode from an Accept header.
+
+    The highest q-value among application/json, multipart/mixed and audio/* wins;
+    ties go to the type listed first. Anything else, including */*, means JSON.
+    """
+    if not accept:
+        return JSON
+
+    best_mode, best_q = JSON, 0.0
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        media_type = media_type.lower()
+        if media_type == "application/json":
+            mode = JSON
+        elif media_type == "multipart/mixed":
+            mode = MULTIPART
+        elif media_type.startswith("audio/"):
+            mode = AUDIO
+        else:
+            continue
+
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best_mode, best_q = mode, q
+    return best_mode
+
+
+def audio_body_response(metadata: dict, audio: bytes, audio_format: str) -> Response:
+    """Raw audio body; the metadata travels ASCII-escaped in a header"""
+    response = Response(
+        content=audio,
+        media_type=AUDIO_FORMATS[audio_format],
+        headers={METADATA_HEADER: json.dumps(metadata)}
+    )
+    record_payload("response", len(audio))
+    return response
+
+
+def multipart_response(metadata: dict, audio: bytes, audio_format: str) -> Response:
+    """multipart/mixed with the metadata as the first part and the audio as the second"""
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n\r\n"
+        f"{json.dumps(metadata, ensure_ascii=False)}\r\n"
+        f"--{boundary}\r\n"
+        f"Content-Type: {AUDIO_FORMATS[audio_format]}\r\n"
+        f"Content-Length: {len(audio)}\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+    body = b"".join((head, audio, tail))
+    record_payload("response", len(body))
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}")
@@ -0,0 +1,542 @@
+"""
+Storage backends for the response caches.
+
+The TTS and LLM caches keep a small in-process tier in every worker and look up
+misses in a second, shared tier. With several uvicorn workers (or hosts) a
+phrase synthesized by one worker is then a hit for all of them, so the hit rate
+doesn't drop as workers are added. The shared tier is chosen by
+CACHE_BACKEND_URL:
+
+    memory                   in-process only (one worker)
+    sqlite:///path/cache.db  one file shared by the workers on a host
+    redis://host:6379/0      a Redis-protocol server shared by every host
+
+Without a URL each cache keeps its earlier second tier: TTS audio files in
+TTS_CACHE_DIR, LLM results in the database with LLM_CACHE_PERSIST.
+
+Backends store bytes and are blocking; the caches call them through
+asyncio.to_thread. Large values are passed through without extra copies where
+the storage allows it: the memory tier hands back the object it holds, SQLite
+returns the blob as a single bytes object, and the Redis client writes values
+to the socket with scatter-gather I/O and reads replies straight into one
+bytes object.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import unquote, urlparse
+
+from config import settings
+
+
+class CacheBackendError(Exception):
+    """The backend answered with an error (as opposed to being unreachable)"""
+
+
+class CacheBackend(ABC):
+    """
+    Interface of a cache storage tier. Keys are strings, values bytes; `ttl` is in
+    seconds, None meaning the entry lives until evicted.
+    """
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` has a live entry, without counting as a use of it"""
+        return self.get(key) is not None
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, prefix: str = "") -> None:
+        """Remove every entry whose key starts with `prefix`"""
+
+    def size_bytes(self) -> Optional[int]:
+        """Bytes held, where the backend can tell cheaply"""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """LRU bounded by total bytes, private to the process"""
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+class DiskBackend(CacheBackend):
+    """
+    One file per entry in a directory, evicted least-recently-used first once the
+    directory grows past its byte budget. Shared by the workers on a host. Entries
+    don't expire; `ttl` is ignored.
+    """
+    name = "disk"
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._bytes: Optional[int] = None  # scanned on first access
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # mtime doubles as the last-used time for eviction
+        os.utime(path)
+        return value
+
+    def contains(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Write then rename so readers never see a half-written file
+        temp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+        temp_path.write_bytes(value)
+
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_bytes()
+            if path.exists():
+                self._bytes -= path.stat().st_size
+            os.replace(temp_path, path)
+            self._bytes += len(value)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+        with self._lock:
+            self._bytes = None
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            if self.directory.exists():
+                for path in self.directory.glob(f"{self._file_name(prefix)}*.audio"):
+                    path.unlink(missing_ok=True)
+            self._bytes = None
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_bytes()
+            return self._bytes
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        # Key prefixes use ':' as in Redis, which some filesystems don't allow
+        return key.replace(":", "-")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{self._file_name(key)}.audio"
+
+    def _scan_bytes(self) -> int:
+        if not self.directory.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.directory.glob("*.audio"))
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.audio"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        # Evict down to 90% so every put past the budget doesn't trigger a full scan
+        target = self.max_bytes * 0.9
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._bytes = total
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    A single SQLite file in WAL mode, shared by the workers on one host. Readers
+    don't block each other or the writer. Entries are evicted least-recently-used
+    first past `max_bytes`; the last-used time is refreshed at most once a minute
+    per entry so hits rarely need the write lock.
+    """
+    name = "sqlite"
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._bytes: Optional[int] = None  # this process's running estimate
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        db = self._connection()
+        row = db.execute("SELECT value, expires_at, used_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at, used_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            db.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        if now - used_at > self.TOUCH_INTERVAL:
+            db.execute("UPDATE cache_entries SET used_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def contains(self, key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        db = self._connection()
+        db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now + ttl if ttl is not None else None, now)
+        )
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._total(db)
+            else:
+                self._bytes += len(value)
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict(db, now)
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = "") -> None:
+        db = self._connection()
+        db.execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        with self._lock:
+            self._bytes = self._total(db)
+
+    def size_bytes(self) -> int:
+        db = self._connection()
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._total(db)
+            return self._bytes
+
+    def close(self) -> None:
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; the caches call in from a thread pool
+        db = getattr(self._local, "connection", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, used_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS cache_entries_used_at ON cache_entries (used_at)")
+            self._local.connection = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    @staticmethod
+    def _total(db: sqlite3.Connection) -> int:
+        return int(db.execute("SELECT total(size) FROM cache_entries").fetchone()[0])
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            total = self._total(db)
+            # Evict down to 90% so every put past the budget doesn't trigger a scan
+            target = self.max_bytes * 0.9
+            doomed = []
+            for key, size in db.execute("SELECT key, size FROM cache_entries ORDER BY used_at"):
+                if total <= target:
+                    break
+                doomed.append((key,))
+                total -= size
+            db.executemany("DELETE FROM cache_entries WHERE key = ?", doomed)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._bytes = total
+
+
+class RedisBackend(CacheBackend):
+    """
+    A minimal client for servers speaking the Redis protocol (RESP2): Redis,
+    Valkey, KeyDB, or benchmarks/fake_resp_server.py in tests. Connections are
+    pooled and opened on first use. Size limits and eviction are the server's job
+    (e.g. `maxmemory-policy allkeys-lru`).
+    """
+    name = "redis"
+    # Most systems accept at least this many buffers per sendmsg call
+    MAX_IOVECS = 512
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 2.0, pool_size: int = 16):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: List["_RespConnection"] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **options) -> "RedisBackend":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return cls(host=parsed.hostname or "localhost", port=parsed.port or 6379, db=db, password=password,
+                   **options)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute(b"GET", key)
+
+    def contains(self, key: str) -> bool:
+        return self.execute(b"EXISTS", key) == 1
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.execute(b"SET", key, value)
+        else:
+            self.execute(b"SET", key, value, b"PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self.execute(b"DEL", key)
+
+    def clear(self, prefix: str = "") -> None:
+        pattern = "".join("\\" + char if char in "*?[]\\" else char for char in prefix) + "*"
+        cursor = b"0"
+        while True:
+            cursor, keys = self.execute(b"SCAN", cursor, b"MATCH", pattern, b"COUNT", 1000)
+            if keys:
+                self.execute(b"DEL", *keys)
+            if cursor == b"0":
+                break
+
+    def ping(self) -> bool:
+        return self.execute(b"PING") == b"PONG"
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def execute(self, *args):
+        connection = self._acquire()
+        try:
+            reply = connection.command(args)
+        except CacheBackendError:
+            self._release(connection)
+            raise
+        except BaseException:
+            # The connection may be mid-reply; never reuse it
+            connection.close()
+            raise
+        self._release(connection)
+        return reply
+
+    def _acquire(self) -> "_RespConnection":
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection = _RespConnection(socket.create_connection((self.host, self.port), timeout=self.timeout))
+        try:
+            if self.password:
+                connection.command((b"AUTH", self.password))
+            if self.db:
+                connection.command((b"SELECT", self.db))
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    def _release(self, connection: "_RespConnection") -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+
+class _RespConnection:
+    def __init__(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def command(self, args):
+        buffers = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            elif isinstance(arg, int):
+                arg = str(arg).encode("ascii")
+            arg = memoryview(arg).cast("B")
+            buffers.append(b"$%d\r\n" % arg.nbytes)
+            buffers.append(arg)
+            buffers.append(b"\r\n")
+        self._send(buffers)
+        return self._read_reply()
+
+    def _send(self, buffers: list) -> None:
+        if not hasattr(self.sock, "sendmsg"):
+            self.sock.sendall(b"".join(buffers))
+            return
+        # Scatter-gather: large values go to the socket without being joined into a copy
+        pending = [memoryview(buffer) for buffer in buffers]
+        while pending:
+            sent = self.sock.sendmsg(pending[:RedisBackend.MAX_IOVECS])
+            while sent:
+                if sent >= len(pending[0]):
+                    sent -= len(pending.pop(0))
+                else:
+                    pending[0] = pending[0][sent:]
+                    sent = 0
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by the cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise CacheBackendError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            # A buffered read this large fills one new bytes object directly
+            value = self.reader.read(length)
+            if len(value) != length or self.reader.read(2) != b"\r\n":
+                raise ConnectionError("connection closed by the cache server")
+            return value
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise CacheBackendError(f"unexpected reply from the cache server: {line[:40]!r}")
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+def create_cache_backend(url: str, max_bytes: int) -> Optional[CacheBackend]:
+    """The shared tier for a CACHE_BACKEND_URL; None when the URL is empty"""
+    if not url:
+        return None
+    if url == "memory":
+        return MemoryBackend(max_bytes)
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        # sqlite:///relative/path or sqlite:////absolute/path, as SQLAlchemy writes them
+        return SQLiteBackend(Path(url[len("sqlite:///"):]), max_bytes)
+    if scheme in ("redis", "rediss"):
+        if scheme == "rediss":
+            raise ValueError("TLS connections (rediss://) are not supported by the cache client")
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Unsupported CACHE_BACKEND_URL {url!r}; use memory, sqlite:///path or redis://host:port/db")
+
+
+shared_cache_backend = create_cache_backend(settings.CACHE_BACKEND_URL, settings.CACHE_BACKEND_MAX_MB * 1024 * 1024)
@@ -0,0 +1,218 @@
+"""
+Background jobs for voice cloning.
+
+Creating a Fish Audio voice takes long enough that holding the upload request
+open for it ties up a request slot and a client connection for the whole time.
+Instead /api/create_clone submits a CloneJob here and returns its id straight
+away; a small pool of worker threads uploads the sample, writes the new voice id
+to the user's row and invalidates their cached principal. Clients poll the job
+for its status.
+
+Uploading the same sample again while its job is queued, running or finished
+returns that job instead of creating a second voice; jobs are matched per user
+by the SHA-256 of the audio. A failed job can be retried with the same sample.
+
+Jobs are kept in memory for CLONE_JOB_TTL_SECONDS after they finish. Jobs still
+queued when the server stops are lost, and the client has to submit them again.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import settings
+from database import SessionLocal
+from models.user import User
+from services.principal_cache import principal_cache
+from services.vendor_clients import get_vendor_clients
+
+QUEUED = "queued"
+RUNNING = "running"
+SAVING = "saving"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class CloneJob:
+    id: str
+    user_id: int
+    voice_name: str
+    description: str
+    content_hash: str
+    status: str = QUEUED
+    voice_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # Dropped once the job has run, so finished jobs don't hold their samples
+    audio: Optional[bytes] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "voice_id": self.voice_id,
+            "voice_name": self.voice_name,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class CloneJobQueue:
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+
+        self._jobs: Dict[str, CloneJob] = {}
+        self._by_content: Dict[Tuple[int, str], str] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def submit(self, user_id: int, voice_name: str, description: str, audio: bytes) -> Tuple[CloneJob, bool]:
+        """
+        Queue a clone of `audio` for a user. Returns (job, created); created is False
+        when an earlier job for the same sample was returned instead.
+        Raises HTTPException 503 when too many jobs are already waiting.
+        """
+        content_hash = hashlib.sha256(audio).hexdigest()
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(self._by_content.get((user_id, content_hash), ""))
+            if existing is not None and existing.status != FAILED:
+                self.deduplicated += 1
+                return existing, False
+
+            if self._pending() >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many voice clones are in progress; try again shortly",
+                    headers={"Retry-After": "30"}
+                )
+
+            job = CloneJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                voice_name=voice_name,
+                description=description,
+                content_hash=content_hash,
+                audio=audio,
+            )
+            self._jobs[job.id] = job
+            self._by_content[(user_id, content_hash)] = job.id
+            self.submitted += 1
+
+        self._pool().submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[CloneJob]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self._pending(),
+                "jobs": len(self._jobs),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the workers; jobs that have not started are dropped"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs.clear()
+            self._by_content.clear()
+            self.submitted = self.deduplicated = self.succeeded = self.failed = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.workers),
+                    thread_name_prefix="clone-worker"
+                )
+            return self._executor
+
+    def _run(self, job: CloneJob) -> None:
+        self._set_status(job, RUNNING)
+        try:
+            voice = get_vendor_clients().require('fish_audio').voices.create(
+                title=job.voice_name,
+                voices=[job.audio],
+                description=job.description
+            )
+            self._set_status(job, SAVING, voice_id=voice.id)
+            self._save_voice(job.user_id, voice.id, job.voice_name)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+            self._set_status(job, FAILED, error=f"Error while creating the voice clone: {detail}")
+            with self._lock:
+                self.failed += 1
+        else:
+            self._set_status(job, SUCCEEDED)
+            with self._lock:
+                self.succeeded += 1
+        finally:
+            job.audio = None
+
+    def _save_voice(self, user_id: int, voice_id: str, voice_name: str) -> None:
+        db = SessionLocal()
+        try:
+            user = db.get(User, user_id)
+            if user is None:
+                raise ValueError(f"user {user_id} no longer exists")
+            user.voice_model_id = voice_id
+            user.voice_name = voice_name
+            db.commit()
+        finally:
+            db.close()
+        # Requests holding the old principal must see the new voice
+        principal_cache.invalidate(user_id)
+
+    def _set_status(self, job: CloneJob, status: str, **changes) -> None:
+        with self._lock:
+            job.status = status
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status not in FINISHED)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job for job in self._jobs.values() if job.status in FINISHED and job.updated_at <= cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._by_content.get((job.user_id, job.content_hash)) == job.id:
+                del self._by_content[(job.user_id, job.content_hash)]
+
+
+clone_jobs = CloneJobQueue(
+    workers=settings.CLONE_WORKERS,
+    max_pending=settings.CLONE_QUEUE_SIZE,
+    ttl_seconds=settings.CLONE_JOB_TTL_SECONDS,
+)
@@ -0,0 +1,241 @@
+"""
+Server-side conversation history for the /api/reply endpoints and the WebSocket.
+
+Clients used to re-send the whole chat history with every turn, and the prompt
+kept the last 10 messages however long they were. Now a conversation lives here
+under its session id, and the client only sends that id.
+
+Each conversation keeps its recent turns verbatim, within a token budget for its
+language. When the turns outgrow the budget, the older half is folded into a
+running summary by a summarizer the caller supplies (an LLM call). The summary is
+kept alongside the turns, so it is only ever extended, never rebuilt. Upload size
+and prompt size per turn therefore stay bounded however long the conversation runs.
+
+Conversations live in an in-memory LRU that drops sessions idle for longer than
+the TTL. With CONVERSATION_PERSIST enabled they are also written to the
+`conversations` table, so a session survives restarts and can move between
+workers sharing the database.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+from database import AsyncSessionLocal
+from models.conversation import ConversationRecord
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSION_ID_LENGTH = 64
+
+# Rough characters per token. Scripts without spaces pack far fewer characters
+# into a token than the Latin-script languages.
+CHARS_PER_TOKEN = {
+    'ja': 1.0,
+    'zh': 1.0,
+    'ko': 1.5,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Summarizer: (previous summary, turns to fold, language, max tokens) -> new summary
+Summarizer = Callable[[str, List[dict], str, int], Awaitable[str]]
+
+
+def estimate_tokens(text: str, language: str) -> int:
+    """Approximate the model's token count for text in the given language"""
+    return int(len(text) / CHARS_PER_TOKEN.get(language, DEFAULT_CHARS_PER_TOKEN)) + 1
+
+
+def parse_token_budgets(spec: str) -> Dict[str, int]:
+    """Parse per-language overrides written as "ja=1500,zh=1500"; bad entries are ignored"""
+    budgets = {}
+    for entry in spec.split(","):
+        language, _, budget = entry.partition("=")
+        try:
+            budgets[language.strip()] = int(budget)
+        except ValueError:
+            continue
+    return budgets
+
+
+@dataclass
+class Conversation:
+    session_id: str
+    language: str
+    turns: List[dict] = field(default_factory=list)  # {"role": ..., "content": ...}
+    summary: str = ""
+    updated_at: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(turn['content'], self.language) for turn in self.turns)
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        max_sessions: int,
+        ttl_seconds: float,
+        token_budget: int,
+        language_budgets: Optional[Dict[str, int]] = None,
+        persist: bool = False,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.token_budget = token_budget
+        self.language_budgets = dict(language_budgets or {})
+        self.persist = persist
+
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+
+        self.summaries = 0
+        self.summary_failures = 0
+
+    def budget(self, language: str) -> int:
+        """Token budget for the verbatim turns of a conversation in this language"""
+        return self.language_budgets.get(language, self.token_budget)
+
+    async def open(self, session_id: str, language: str) -> Conversation:
+        """The conversation for a session id, created empty if it is unknown or expired"""
+        now = time.time()
+        conversation = self._sessions.get(session_id)
+        if conversation is not None and conversation.updated_at + self.ttl_seconds <= now:
+            del self._sessions[session_id]
+            conversation = None
+
+        if conversation is None and self.persist:
+            conversation = await self._db_get(session_id, now)
+        if conversation is None:
+            conversation = Conversation(session_id=session_id, language=language)
+        # A learner can switch language mid-session; the history carries over
+        conversation.language = language
+
+        self._remember(conversation)
+        return conversation
+
+    async def compact(self, conversation: Conversation, summarize: Summarizer) -> None:
+        """
+        Fold the oldest turns into the summary until the rest fit the budget.
+
+        The two most recent turns are always kept verbatim. If the summarizer fails
+        the folded turns are dropped anyway, keeping the earlier summary, so a vendor
+        outage degrades the context rather than letting it grow without bound.
+        """
+        budget = self.budget(conversation.language)
+        folded_any = False
+        async with conversation.lock:
+            while conversation.tokens() > budget and len(conversation.turns) > 2:
+                # Fold whole user/assistant exchanges, about half the turns at a time,
+                # so a summary call is needed every few turns rather than every turn
+                fold_count = max(2, len(conversation.turns) // 2) // 2 * 2
+                folded = conversation.turns[:fold_count]
+                try:
+                    summary = await summarize(
+                        conversation.summary, folded, conversation.language, self._summary_budget(budget)
+                    )
+                    conversation.summary = self._clip(summary.strip(), conversation.language, budget)
+                    self.summaries += 1
+                except Exception as e:
+                    self.summary_failures += 1
+                    logger.warning("Conversation summary failed, dropping %d turns: %s: %s",
+                                   fold_count, type(e).__name__, e)
+                del conversation.turns[:fold_count]
+                folded_any = True
+        if folded_any and self.persist:
+            await self._db_put(conversation)
+
+    async def append(self, conversation: Conversation, user_message: str, reply: str) -> None:
+        """Record one exchange"""
+        async with conversation.lock:
+            conversation.turns.append({"role": "user", "content": user_message})
+            conversation.turns.append({"role": "assistant", "content": reply})
+            conversation.updated_at = time.time()
+        self._remember(conversation)
+        if self.persist:
+            await self._db_put(conversation)
+
+    def recent(self, turns: list, language: str) -> list:
+        """The newest turns that fit the language's budget, for clients that send their own history"""
+        budget = self.budget(language)
+        kept, used = [], 0
+        for turn in reversed(turns):
+            if not isinstance(turn, dict):
+                continue
+            used += estimate_tokens(str(turn.get('content', '')), language)
+            if used > budget:
+                break
+            kept.append(turn)
+        kept.reverse()
+        return kept
+
+    def get(self, session_id: str) -> Optional[Conversation]:
+        """The in-memory conversation for a session id, without touching its recency"""
+        return self._sessions.get(session_id)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "persistent": self.persist,
+        }
+
+    def clear(self) -> None:
+        self._sessions.clear()
+        self.summaries = self.summary_failures = 0
+
+    def _summary_budget(self, budget: int) -> int:
+        return max(budget // 4, 32)
+
+    def _clip(self, summary: str, language: str, budget: int) -> str:
+        """Hold the summary to its budget even if the model ignored the length limit"""
+        max_chars = int(self._summary_budget(budget) * CHARS_PER_TOKEN.get(language, DEFAULT_CHARS_PER_TOKEN))
+        return summary if len(summary) <= max_chars else summary[:max_chars].rstrip() + "…"
+
+    def _remember(self, conversation: Conversation) -> None:
+        self._sessions[conversation.session_id] = conversation
+        self._sessions.move_to_end(conversation.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def _db_get(self, session_id: str, now: float) -> Optional[Conversation]:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(ConversationRecord, session_id)
+            if row is None:
+                return None
+            if row.updated_at + self.ttl_seconds <= now:
+                await db.delete(row)
+                await db.commit()
+                return None
+            return Conversation(
+                session_id=row.session_id,
+                language=row.language,
+                turns=json.loads(row.turns),
+                summary=row.summary,
+                updated_at=row.updated_at,
+            )
+
+    async def _db_put(self, conversation: Conversation) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.merge(ConversationRecord(
+                session_id=conversation.session_id,
+                language=conversation.language,
+                summary=conversation.summary,
+                turns=json.dumps(conversation.turns, ensure_ascii=False),
+                updated_at=conversation.updated_at,
+            ))
+            await db.commit()
+
+
+conversation_store = ConversationStore(
+    max_sessions=settings.CONVERSATION_MAX_SESSIONS,
+    ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+    token_budget=settings.CONVERSATION_TOKEN_BUDGET,
+    language_budgets=parse_token_budgets(settings.CONVERSATION_TOKEN_BUDGETS),
+    persist=settings.CONVERSATION_PERSIST,
+)
@@ -0,0 +1,189 @@
+"""
+Memoization for the Gemini correction and reply calls.
+
+Learners repeat the same beginner sentences constantly, and each one costs a full
+LLM round trip. Results are cached under (namespace, language, normalized text,
+prompt version); bumping a prompt version makes every old entry unreachable.
+
+Entries live in an in-memory LRU with a TTL, in front of an optional shared tier
+every worker reads: the backend from CACHE_BACKEND_URL (see
+services.cache_backend), or with LLM_CACHE_PERSIST the `llm_cache` table through
+the app's database engine, so entries also survive restarts. A shared tier that
+fails is counted and treated as a miss.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from config import settings
+from database import SessionLocal
+from models.llm_cache import LLMCacheEntry
+from services.cache_backend import CacheBackend, shared_cache_backend
+
+# Namespace of the LLM entries in a backend shared with other caches
+KEY_PREFIX = "llm:"
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def llm_cache_key(namespace: str, language: str, text: str, prompt_version: str) -> str:
+    payload = json.dumps([namespace, language, normalize_text(text), prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DatabaseBackend(CacheBackend):
+    """The `llm_cache` table as a cache backend; keys are "llm:<namespace>:<hash>" """
+    name = "database"
+
+    def get(self, key: str) -> Optional[bytes]:
+        db = SessionLocal()
+        try:
+            row = db.get(LLMCacheEntry, key)
+            if row is None:
+                return None
+            if row.expires_at <= time.time():
+                db.delete(row)
+                db.commit()
+                return None
+            return row.value.encode('utf-8')
+        finally:
+            db.close()
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(LLMCacheEntry(
+                key=key,
+                namespace=key.split(":")[1],
+                value=value.decode('utf-8'),
+                expires_at=time.time() + ttl if ttl is not None else float("inf")
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def delete(self, key: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def clear(self, prefix: str = "") -> None:
+        db = SessionLocal()
+        try:
+            db.query(LLMCacheEntry).filter(LLMCacheEntry.key.startswith(prefix, autoescape=True)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class LLMCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, persist: bool = False,
+                 backend: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        if backend is None and persist:
+            backend = DatabaseBackend()
+        self.backend = backend
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.errors = 0
+
+    async def get(self, namespace: str, language: str, text: str, prompt_version: str) -> Optional[dict]:
+        key = llm_cache_key(namespace, language, text, prompt_version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return dict(value)
+                del self._memory[key]
+                self.expired += 1
+
+        if self.backend:
+            raw = await self._shared(self.backend.get, self._shared_key(namespace, key))
+            if raw is not None:
+                value = json.loads(raw)
+                self.shared_hits += 1
+                self._memory_put(key, now + self.ttl_seconds, value)
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def put(self, namespace: str, language: str, text: str, prompt_version: str, value: dict) -> None:
+        key = llm_cache_key(namespace, language, text, prompt_version)
+        self._memory_put(key, time.time() + self.ttl_seconds, dict(value))
+        if self.backend:
+            raw = json.dumps(value, ensure_ascii=False).encode('utf-8')
+            await self._shared(self.backend.set, self._shared_key(namespace, key), raw, self.ttl_seconds)
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "errors": self.errors,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "shared_backend": self.backend.name if self.backend else None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.backend:
+            self.backend.clear(KEY_PREFIX)
+        with self._lock:
+            self.memory_hits = self.shared_hits = self.misses = self.expired = self.errors = 0
+
+    @staticmethod
+    def _shared_key(namespace: str, key: str) -> str:
+        return f"{KEY_PREFIX}{namespace}:{key}"
+
+    async def _shared(self, method, *args):
+        try:
+            return await asyncio.to_thread(method, *args)
+        except Exception:
+            self.errors += 1
+            return None
+
+    def _memory_put(self, key: str, expires_at: float, value: dict) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    persist=settings.LLM_CACHE_PERSIST,
+    backend=shared_cache_backend,
+)
@@ -0,0 +1,183 @@
+"""
+Per-stage latency and payload-size instrumentation.
+
+Every pipeline stage (upload read, STT, LLM, TTS, base64 encode, response
+serialization) is timed with `stage_timer`, and payload sizes are recorded with
+`record_payload`. Both feed Prometheus-style histograms served at /metrics.
+
+ServerTimingMiddleware also keeps the stage timings of the current request and
+returns them in a `Server-Timing` header, so a single slow request can be broken
+down from the browser's network panel.
+
+Other modules expose their own counters (cache hits, queue depths, ...) by
+registering a collector.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+stage_seconds = Histogram(
+    "voice_pipeline_stage_seconds",
+    "Time spent in each voice pipeline stage",
+    ("stage",),
+    LATENCY_BUCKETS,
+)
+payload_bytes = Histogram(
+    "voice_pipeline_payload_bytes",
+    "Size of payloads moving through the voice pipeline",
+    ("kind",),
+    SIZE_BUCKETS,
+)
+
+# (stage, seconds) pairs recorded during the current request
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a pipeline stage into the stage histogram and the request's Server-Timing"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """For stages that can't be wrapped in stage_timer, e.g. time to first chunk"""
+    stage_seconds.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def record_payload(kind: str, size: int) -> None:
+    payload_bytes.observe(size, kind=kind)
+
+
+# A collector returns metric families as (name, type, help, [(labels, value), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def register_collector(collect: Callable[[], Iterable[MetricFamily]]) -> None:
+    _collectors.append(collect)
+
+
+def render_metrics() -> str:
+    """Everything in Prometheus text exposition format"""
+    sections = [stage_seconds.render(), payload_bytes.render()]
+    for collect in _collectors:
+        for name, metric_type, help_text, samples in collect():
+            lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+            lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+            sections.append("\n".join(lines))
+    return "\n".join(sections) + "\n"
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Stages that ran several times (e.g. per-sentence TTS) are summed"""
+    durations: Dict[str, float] = {}
+    for stage, seconds in timings:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware (so streaming responses are not buffered) that collects
+    the stage timings of each HTTP request and adds a Server-Timing header.
+    Stages still running when a streaming response starts are not included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(timings, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
@@ -0,0 +1,341 @@
+"""
+Background warm-up of the TTS cache for the preset voices.
+
+The first learner to hear "¡Muy bien!" in a preset voice waits seconds for a
+Fish Audio synthesis that every later one gets from the cache. The warm-up job
+pays that first synthesis ahead of time for phrases we expect to be asked for:
+
+    * the phrase list in PREWARM_PHRASES_PATH, per language code
+    * the phrases synthesized most often since startup (observed_phrases)
+
+and for each of them every preset voice and configured format. A run starts
+PREWARM_DELAY_SECONDS after startup and repeats every PREWARM_INTERVAL_SECONDS.
+Entries already cached, by this worker or another one sharing the cache tier,
+are skipped, so repeat runs only synthesize what is new or was evicted.
+
+Every synthesis is paid for, so the job is off unless PREWARM_ENABLED is set.
+Each worker runs its own job and nothing stops two workers from synthesizing
+the same missing entry at once, so it is meant to run in a single process.
+
+The job runs at low priority: it synthesizes at most PREWARM_CONCURRENCY
+phrases at once, and before each one waits until no request in this worker is
+synthesizing or holding a practice/reply admission slot. A run gives up after a
+few failed syntheses in a row, since that usually means the vendor is down or
+out of credit rather than a bad phrase.
+"""
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from config import settings
+from schemas.tts import TTSRequest
+from services.admission import admission_pools
+from services.single_flight import speech_flights
+from services.tts_cache import normalize_transcript, tts_cache
+from utils.preset_voices import preset_voice_registry
+
+DISABLED = "disabled"
+IDLE = "idle"
+SCHEDULED = "scheduled"
+RUNNING = "running"
+WAITING = "waiting"  # yielding to live traffic
+FINISHED = "finished"
+FAILED = "failed"
+
+# Admission pools whose requests synthesize speech
+VOICE_POOLS = ("practice", "reply")
+
+# How often a waiting run checks whether live traffic has gone quiet
+IDLE_POLL_SECONDS = 0.5
+
+# A run stops after this many failed syntheses in a row
+MAX_CONSECUTIVE_FAILURES = 5
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class PhraseCounter:
+    """
+    How often each short phrase was sent to TTS. Bounded: when `max_entries`
+    phrases are tracked, every count is halved and the ones that reach zero are
+    dropped, so phrases that stop being asked for age out.
+    """
+
+    def __init__(self, max_entries: int = 2000, max_chars: int = 80):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def observe(self, text: str) -> None:
+        phrase = normalize_transcript(text)
+        # Long replies are rarely repeated word for word
+        if not phrase or len(phrase) > self.max_chars:
+            return
+        with self._lock:
+            if phrase not in self._counts and len(self._counts) >= self.max_entries:
+                self._decay()
+            self._counts[phrase] = self._counts.get(phrase, 0) + 1
+
+    def top(self, limit: int, min_count: int = 1) -> List[str]:
+        """The `limit` most frequent phrases seen at least `min_count` times"""
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return [phrase for phrase, count in ranked[:limit] if count >= min_count]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _decay(self) -> None:
+        self._counts = {phrase: count // 2 for phrase, count in self._counts.items() if count > 1}
+        if len(self._counts) >= self.max_entries:
+            # Every tracked phrase survived the halving; start over rather than grow
+            self._counts.clear()
+
+
+def load_phrase_list(path: Path, languages: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    The phrase list file ({"es": ["Hola", ...], ...}), limited to `languages` when
+    given. A missing file is an empty list.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            phrases = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {
+        language: [phrase for phrase in entries if isinstance(phrase, str) and phrase.strip()]
+        for language, entries in phrases.items()
+        if not languages or language in languages
+    }
+
+
+class PrewarmJob:
+    def __init__(self, enabled: bool, phrases_path: Path, languages: List[str], voices: List[str],
+                 formats: List[str], delay_seconds: float, interval_seconds: float, concurrency: int,
+                 observed_top: int, observed_min_count: int):
+        self.enabled = enabled
+        self.phrases_path = Path(phrases_path)
+        self.languages = languages
+        self.voices = voices
+        self.formats = formats
+        self.delay_seconds = delay_seconds
+        self.interval_seconds = interval_seconds
+        self.concurrency = max(1, concurrency)
+        self.observed_top = observed_top
+        self.observed_min_count = observed_min_count
+
+        self._task: Optional[asyncio.Task] = None
+        self._own_flights = 0
+        self._reset_progress()
+        self.state = IDLE if enabled else DISABLED
+        self.runs = 0
+        self.synthesized_total = 0
+        self.failed_total = 0
+        self.last_error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def start(self) -> None:
+        """Schedule the runs on the running event loop (called from the app lifespan)"""
+        if not self.enabled or not settings.FISH_AUDIO_API_KEY:
+            self.state = DISABLED
+            return
+        if self._task is None or self._task.done():
+            self.state = SCHEDULED
+            self._task = asyncio.create_task(self._loop(), name="tts-prewarm")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def plan(self, voices: Optional[Dict[str, str]] = None) -> List[TTSRequest]:
+        """
+        Everything one run should have cached: observed phrases first, most frequent
+        first, then the phrase list, each in every preset voice and format.
+        """
+        voices = self.voice_ids() if voices is None else voices
+        phrases = self.observed_phrases() + [
+            phrase for entries in load_phrase_list(self.phrases_path, self.languages).values()
+            for phrase in entries
+        ]
+        seen = set()
+        items = []
+        for phrase in phrases:
+            key = normalize_transcript(phrase)
+            if key in seen:
+                continue
+            seen.add(key)
+            for audio_format in self.formats:
+                for voice_id in voices.values():
+                    items.append(TTSRequest(transcript=phrase, model_id=voice_id, audio_format=audio_format))
+        return items
+
+    def observed_phrases(self) -> List[str]:
+        if self.observed_top <= 0:
+            return []
+        return observed_phrases.top(self.observed_top, self.observed_min_count)
+
+    def voice_ids(self) -> Dict[str, str]:
+        """Preset voice key -> Fish Audio id, for the configured voices (all if none are)"""
+        return {
+            key: voice['id'] for key, voice in preset_voice_registry.voices().items()
+            if voice.get('id') and (not self.voices or key in self.voices)
+        }
+
+    async def run_once(self) -> dict:
+        """Check every planned entry and synthesize the missing ones; returns the status"""
+        # routers.practice records the observed phrases, so it imports this module
+        from routers.practice import generate_speech, speech_cache_key
+
+        voice_ids = self.voice_ids()
+        items = self.plan(voice_ids)
+        voices = {voice_id: key for key, voice_id in voice_ids.items()}
+        self._reset_progress()
+        self.total = len(items)
+        for item in items:
+            self._by_voice.setdefault(voices[item.model_id], [0, 0])[1] += 1
+        self.state = RUNNING
+        self.started_at = time.time()
+        self.finished_at = None
+        self.runs += 1
+
+        pending = iter(items)
+        consecutive_failures = 0
+
+        async def worker():
+            nonlocal consecutive_failures
+            for item in pending:
+                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    return
+                key = speech_cache_key(item)
+                if await tts_cache.contains(key):
+                    self.cached_before += 1
+                    self._covered(voices[item.model_id])
+                    continue
+
+                await self._yield_to_live_traffic()
+                # Another worker sharing the cache may have got here first
+                if await tts_cache.contains(key):
+                    self.cached_before += 1
+                    self._covered(voices[item.model_id])
+                    continue
+
+                self._own_flights += 1
+                try:
+                    await generate_speech(item, observe=False)
+                except HTTPException as e:
+                    self.failed += 1
+                    self.failed_total += 1
+                    consecutive_failures += 1
+                    self.last_error = str(e.detail)
+                else:
+                    self.synthesized += 1
+                    self.synthesized_total += 1
+                    consecutive_failures = 0
+                    self._covered(voices[item.model_id])
+                finally:
+                    self._own_flights -= 1
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.state = FAILED if consecutive_failures >= MAX_CONSECUTIVE_FAILURES else FINISHED
+        self.finished_at = time.time()
+        return self.status()
+
+    def status(self) -> dict:
+        """
+        Progress of the current (or last) run. Coverage is the share of planned
+        entries known to be cached; entries not checked yet count as uncached.
+        """
+        checked = self.cached_before + self.synthesized + self.failed
+        return {
+            "state": self.state,
+            "runs": self.runs,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "total": self.total,
+            "checked": checked,
+            "cached_before": self.cached_before,
+            "synthesized": self.synthesized,
+            "failed": self.failed,
+            "coverage": self.coverage(),
+            "coverage_by_voice": {
+                key: covered / total if total else 0.0 for key, (covered, total) in self._by_voice.items()
+            },
+            "synthesized_total": self.synthesized_total,
+            "failed_total": self.failed_total,
+            "observed_phrases": len(observed_phrases),
+            "last_error": self.last_error,
+        }
+
+    def coverage(self) -> float:
+        return (self.cached_before + self.synthesized) / self.total if self.total else 0.0
+
+    def _reset_progress(self) -> None:
+        self.total = 0
+        self.cached_before = 0
+        self.synthesized = 0
+        self.failed = 0
+        self._by_voice: Dict[str, List[int]] = {}  # voice key -> [covered, total]
+
+    def _covered(self, voice_key: str) -> None:
+        self._by_voice[voice_key][0] += 1
+
+    def _live_traffic(self) -> bool:
+        if speech_flights.in_flight() > self._own_flights:
+            return True
+        return any(admission_pools[name].active for name in VOICE_POOLS)
+
+    async def _yield_to_live_traffic(self) -> None:
+        while self._live_traffic():
+            self.state = WAITING
+            await asyncio.sleep(IDLE_POLL_SECONDS)
+        self.state = RUNNING
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(self.delay_seconds)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.state = FAILED
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.finished_at = time.time()
+            if self.interval_seconds <= 0:
+                return
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Phrases sent to TTS by live requests, fed by routers.practice
+observed_phrases = PhraseCounter()
+
+prewarm_job = PrewarmJob(
+    enabled=settings.PREWARM_ENABLED,
+    phrases_path=Path(settings.PREWARM_PHRASES_PATH),
+    languages=_csv(settings.PREWARM_LANGUAGES),
+    voices=_csv(settings.PREWARM_VOICES),
+    formats=_csv(settings.PREWARM_FORMATS) or ["wav"],
+    delay_seconds=settings.PREWARM_DELAY_SECONDS,
+    interval_seconds=settings.PREWARM_INTERVAL_SECONDS,
+    concurrency=settings.PREWARM_CONCURRENCY,
+    observed_top=settings.PREWARM_OBSERVED_TOP,
+    observed_min_count=settings.PREWARM_OBSERVED_MIN_COUNT,
+)
@@ -0,0 +1,123 @@
+"""
+Short-lived cache of authenticated principals.
+
+Without it every authenticated request decodes the JWT and loads the user row
+just to check `is_active`. The cache keeps two kinds of entries:
+
+    * token -> user id, for tokens whose signature was already verified, kept
+      until the token itself expires
+    * user id -> Principal (the user fields routes need), kept for a short TTL
+
+auth_callback and anything else that updates a user calls `invalidate(user_id)`.
+The TTL bounds how long another worker's copy can be stale.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, detached from any database session"""
+    id: int
+    email: str
+    name: Optional[str]
+    picture: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    voice_model_id: Optional[str]
+    voice_name: Optional[str]
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._tokens: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._principals: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get_token(self, token: str) -> Optional[int]:
+        """User id of an already verified, unexpired token"""
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+            expires_at, user_id = entry
+            if expires_at <= time.time():
+                del self._tokens[token]
+                return None
+            self._tokens.move_to_end(token)
+            return user_id
+
+    def put_token(self, token: str, user_id: int, expires_at: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tokens[token] = (expires_at, user_id)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._principals.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self._principals.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._principals.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._principals[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._principals.move_to_end(principal.id)
+            while len(self._principals) > self.max_entries:
+                self._principals.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's principal after their row changed"""
+        with self._lock:
+            self._principals.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "principals": len(self._principals),
+            "tokens": len(self._tokens),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._principals.clear()
+            self.hits = self.misses = 0
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,460 @@
+"""
+Deadlines, hedging, retries and circuit breakers for the vendor calls.
+
+Without them a vendor's slow tail holds a /api/practice request for as long as
+the SDK's own HTTP timeout allows, tens of seconds. call_vendor wraps
+run_vendor_call (and stream_vendor wraps iterate_vendor_stream) with:
+
+    * a deadline: each voice endpoint request gets a budget for its vendor calls
+      (DeadlineMiddleware), split between the stt, llm and tts stages by weight.
+      A stage may use its share of whatever is left when it starts, so a fast
+      stage leaves more for the later ones. Calls outside such a request get
+      VENDOR_CALL_TIMEOUT each. A call that runs out of time fails with a 504.
+    * hedging: an idempotent call still running after the recent p95 latency of
+      its vendor and stage gets one duplicate, and whichever answers first wins.
+      Hedges are capped at HEDGE_MAX_RATIO of the calls, so a vendor that is
+      slow across the board is not sent double the load.
+    * retries: an idempotent call that fails is retried up to VENDOR_RETRIES
+      times while the deadline and the circuit breaker allow.
+    * a circuit breaker per vendor: after CIRCUIT_FAILURE_THRESHOLD failures in
+      a row the vendor is failed fast with a 503 for CIRCUIT_RESET_SECONDS; then
+      one trial call decides whether it closes again.
+
+Only the vendor's own failures are retried and counted by the breaker: transport
+errors, timeouts, 5xx and 429 (is_vendor_fault). A request the vendor turns down
+(an unknown voice, audio it can't decode) or an HTTPException raised on our side
+fails the same way again, and says nothing about the vendor's health; it is
+passed straight back, so one user's bad requests can't open the circuit for all.
+
+A call that timed out or lost a hedge can't be interrupted: its vendor thread
+runs on until the SDK returns, bounded by VENDOR_HTTP_TIMEOUT. While a vendor
+hangs, the breaker keeps those threads from piling up.
+"""
+import asyncio
+import contextvars
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from config import settings
+from services.vendor_pool import DEEPGRAM, FISH_AUDIO, GEMINI, VENDORS, iterate_vendor_stream, run_vendor_call
+
+VENDOR_NAMES = {DEEPGRAM: "Deepgram", GEMINI: "Gemini", FISH_AUDIO: "Fish Audio"}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Hedge no sooner than this, however fast the vendor has been
+MIN_HEDGE_DELAY = 0.05
+
+# Wait before a retry, as (base, jitter) in seconds
+RETRY_BACKOFF = (0.05, 0.1)
+
+
+def parse_stage_weights(spec: str) -> Dict[str, float]:
+    """Parse stage weights written as "stt=1,llm=1,tts=2"; bad entries are ignored"""
+    weights = {}
+    for entry in spec.split(","):
+        stage, _, weight = entry.partition("=")
+        try:
+            weights[stage.strip()] = float(weight)
+        except ValueError:
+            continue
+    return weights
+
+
+class DeadlineBudget:
+    """
+    Time budget of one request's vendor calls. The clock starts with the first
+    vendor call, so a slow upload doesn't eat into it. A stage gets
+    remaining * weight / (weight of the stages not started yet, its own included);
+    stages without a weight count as 1. Later calls of a stage that has started
+    (per-sentence TTS, the clips of a batch) share its window.
+    """
+
+    def __init__(self, seconds: float, weights: Dict[str, float]):
+        self.seconds = seconds
+        self.weights = weights
+        self.started_at: Optional[float] = None
+        self._stage_ends: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        if self.started_at is None:
+            return self.seconds
+        return max(0.0, self.seconds - (time.monotonic() - self.started_at))
+
+    def timeout_for(self, stage: str) -> float:
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        now = time.monotonic()
+        if stage not in self._stage_ends:
+            pending = sum(weight for name, weight in self.weights.items()
+                          if name not in self._stage_ends and name != stage)
+            weight = self.weights.get(stage, 1.0)
+            self._stage_ends[stage] = now + self.remaining() * weight / (weight + pending)
+        return max(0.0, min(self._stage_ends[stage] - now, self.remaining()))
+
+
+_deadline: contextvars.ContextVar[Optional[DeadlineBudget]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float, weights: Optional[Dict[str, float]] = None):
+    """Give the vendor calls made inside the block (and tasks started from it) a shared budget"""
+    budget = DeadlineBudget(seconds, stage_weights if weights is None else weights)
+    token = _deadline.set(budget)
+    try:
+        yield budget
+    finally:
+        _deadline.reset(token)
+
+
+def stage_timeout(stage: str) -> float:
+    """Seconds the next call for `stage` may take"""
+    budget = _deadline.get()
+    if budget is None:
+        return settings.VENDOR_CALL_TIMEOUT
+    return min(budget.timeout_for(stage), settings.VENDOR_CALL_TIMEOUT)
+
+
+class LatencyWindow:
+    """The most recent call latencies of one vendor stage, for the hedge delay"""
+    MIN_SAMPLES = 20
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """None until there are enough samples to tell"""
+        if len(self._samples) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at: Optional[float] = None
+        self.opens = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only one trial at a time"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self.trial_started_at = None
+            if self.state == HALF_OPEN:
+                # A trial that never reported back (its caller went away) expires
+                if self.trial_started_at is not None and now - self.trial_started_at < self.reset_seconds:
+                    return False
+                self.trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.trial_started_at = None
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.reset_seconds - (time.monotonic() - self.opened_at)))
+
+    def record_client_error(self) -> None:
+        """The vendor answered but turned the request down: no verdict, but a trial is over"""
+        with self._lock:
+            self.trial_started_at = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.trial_started_at = None
+            self.opens = 0
+
+
+class VendorCallStats:
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def create_breakers() -> Dict[str, CircuitBreaker]:
+    return {
+        vendor: CircuitBreaker(vendor, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+        for vendor in VENDORS
+    }
+
+
+stage_weights = parse_stage_weights(settings.DEADLINE_STAGE_WEIGHTS)
+breakers = create_breakers()
+call_stats: Dict[str, VendorCallStats] = {vendor: VendorCallStats() for vendor in VENDORS}
+_latencies: Dict[tuple, LatencyWindow] = {}
+
+
+def resilience_stats() -> dict:
+    """Per vendor: breaker state and the call, retry, hedge and timeout counters"""
+    return {
+        vendor: {
+            "circuit": breakers[vendor].state,
+            "circuit_opens": breakers[vendor].opens,
+            **call_stats[vendor].to_dict(),
+        }
+        for vendor in VENDORS
+    }
+
+
+def reset_resilience() -> None:
+    for breaker in breakers.values():
+        breaker.reset()
+    for vendor in VENDORS:
+        call_stats[vendor] = VendorCallStats()
+    _latencies.clear()
+
+
+def vendor_status(exc: BaseException) -> Optional[int]:
+    """The HTTP status a vendor SDK error carries, if any"""
+    # Deepgram and httpx use status_code, google-genai code, Fish Audio status
+    for attribute in ("status_code", "code", "status"):
+        status = getattr(exc, attribute, None)
+        if isinstance(status, int):
+            return status
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_vendor_fault(exc: BaseException) -> bool:
+    """Whether a failed call is the vendor's fault, so worth a retry and counted by its breaker"""
+    if isinstance(exc, HTTPException):
+        return False
+    status = vendor_status(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def _admit(vendor: str) -> None:
+    breaker = breakers[vendor]
+    if not breaker.allow():
+        call_stats[vendor].rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"{VENDOR_NAMES[vendor]} is unavailable at the moment; try again shortly",
+            headers={"Retry-After": str(breaker.retry_after())}
+        )
+
+
+class VendorTimeout(HTTPException):
+    """A vendor call that ran out of its stage's deadline; sent to the client as a 504"""
+
+    def __init__(self, vendor: str, timeout: float):
+        super().__init__(
+            status_code=504,
+            detail=f"{VENDOR_NAMES[vendor]} did not respond within {timeout:.1f}s"
+        )
+        self.vendor = vendor
+
+
+def _timed_out(vendor: str, timeout: float) -> VendorTimeout:
+    call_stats[vendor].timeouts += 1
+    breakers[vendor].record_failure()
+    return VendorTimeout(vendor, timeout)
+
+
+async def call_vendor(vendor: str, stage: str, func: Callable[..., Any], *args,
+                      idempotent: bool = True, hedge: Optional[bool] = None, **kwargs) -> Any:
+    """
+    run_vendor_call within the stage's deadline, behind the vendor's circuit breaker.
+    Idempotent calls are also retried, and hedged unless `hedge` is False: pass that
+    for calls much bigger than the stage's usual ones, which would be hedged at once
+    and would skew its hedge delay. Raises HTTPException 503 while the breaker is
+    open and 504 when the deadline passes.
+    """
+    _admit(vendor)
+    stats = call_stats[vendor]
+    stats.calls += 1
+    timeout = stage_timeout(stage)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempts = 1 + (max(0, settings.VENDOR_RETRIES) if idempotent else 0)
+
+    for attempt in range(attempts):
+        if attempt:
+            stats.retries += 1
+        try:
+            result = await _attempt(vendor, stage, func, args, kwargs, deadline,
+                                    hedge=idempotent if hedge is None else hedge)
+        except asyncio.TimeoutError:
+            raise _timed_out(vendor, timeout) from None
+        except Exception as e:
+            if not is_vendor_fault(e):
+                breakers[vendor].record_client_error()
+                raise
+            stats.failures += 1
+            breakers[vendor].record_failure()
+            backoff = RETRY_BACKOFF[0] + random.random() * RETRY_BACKOFF[1]
+            if attempt + 1 == attempts or deadline - loop.time() <= backoff or not breakers[vendor].allow():
+                raise
+            await asyncio.sleep(backoff)
+        else:
+            breakers[vendor].record_success()
+            return result
+
+
+async def _attempt(vendor: str, stage: str, func: Callable[..., Any], args: tuple, kwargs: dict,
+                   deadline: float, hedge: bool) -> Any:
+    loop = asyncio.get_running_loop()
+    window = _latencies.setdefault((vendor, stage), LatencyWindow())
+    stats = call_stats[vendor]
+    started = {}
+
+    def launch() -> asyncio.Future:
+        task = asyncio.ensure_future(run_vendor_call(vendor, func, *args, **kwargs))
+        started[task] = loop.time()
+        return task
+
+    primary = launch()
+    tasks = [primary]
+    try:
+        hedge_delay = window.percentile(0.95) if hedge and settings.HEDGE_ENABLED else None
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=max(0.0, min(max(hedge_delay, MIN_HEDGE_DELAY),
+                                                                    deadline - loop.time())))
+            if not done and loop.time() < deadline and stats.hedges < settings.HEDGE_MAX_RATIO * stats.calls:
+                stats.hedges += 1
+                tasks.append(launch())
+
+        while tasks:
+            remaining = deadline - loop.time()
+            done = set()
+            if remaining > 0:
+                done, _ = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Count the slow call so the hedge delay follows the tail
+                if hedge:
+                    window.observe(loop.time() - started[primary])
+                raise asyncio.TimeoutError
+            failure = None
+            for task in done:
+                if task.exception() is None:
+                    if hedge:
+                        window.observe(loop.time() - started[task])
+                    if task is not primary:
+                        stats.hedge_wins += 1
+                    return task.result()
+                failure = task.exception()
+            tasks = [task for task in tasks if not task.done()]
+            if not tasks:
+                raise failure
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def stream_vendor(vendor: str, stage: str, open_stream: Callable[..., Any], *args, **kwargs) -> AsyncIterator[Any]:
+    """
+    iterate_vendor_stream behind the vendor's circuit breaker, with the stage's
+    deadline on the first item. Once items flow the consumer sets the pace, so
+    later items are not timed. Streams are not hedged or retried: items already
+    passed on can't be taken back.
+    """
+    _admit(vendor)
+    call_stats[vendor].calls += 1
+    timeout = stage_timeout(stage)
+    stream = iterate_vendor_stream(vendor, open_stream, *args, **kwargs)
+    try:
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), timeout)
+        except StopAsyncIteration:
+            breakers[vendor].record_success()
+            return
+        except asyncio.TimeoutError:
+            raise _timed_out(vendor, timeout) from None
+        except Exception as e:
+            _record_stream_error(vendor, e)
+            raise
+        breakers[vendor].record_success()
+        yield first
+
+        try:
+            async for item in stream:
+                yield item
+        except Exception as e:
+            _record_stream_error(vendor, e)
+            raise
+    finally:
+        await stream.aclose()
+
+
+def _record_stream_error(vendor: str, exc: Exception) -> None:
+    if is_vendor_fault(exc):
+        call_stats[vendor].failures += 1
+        breakers[vendor].record_failure()
+    else:
+        breakers[vendor].record_client_error()
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware giving the requests in DEADLINE_ROUTES their budget"""
+
+    def __init__(self, app, routes: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.routes = deadline_routes() if routes is None else routes
+
+    async def __call__(self, scope, receive, send):
+        seconds = self.routes.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+        with request_deadline(seconds):
+            await self.app(scope, receive, send)
+
+
+def deadline_routes() -> Dict[str, float]:
+    """POST paths and their vendor-call budget in seconds; streaming variants share one"""
+    return {
+        "/api/practice": settings.PRACTICE_DEADLINE_SECONDS,
+        "/api/practice/stream": settings.PRACTICE_DEADLINE_SECONDS,
+        "/api/practice/batch": settings.PRACTICE_BATCH_DEADLINE_SECONDS,
+        "/api/reply": settings.REPLY_DEADLINE_SECONDS,
+        "/api/reply/stream": settings.REPLY_DEADLINE_SECONDS,
+    }
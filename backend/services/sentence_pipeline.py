@@ -0,0 +1,90 @@
+"""
+Overlap LLM generation with speech synthesis.
+
+The reply text is streamed out of the LLM and cut at sentence boundaries. Each
+finished sentence is sent to TTS right away while later sentences are still
+being generated, and the audio segments are handed back in sentence order.
+"""
+import asyncio
+import re
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+# Latin-script enders only count once followed by whitespace, so "3.5" or a
+# sentence that is still streaming is not cut early; CJK enders need no space.
+SENTENCE_BOUNDARY = re.compile(r'[.!?…]+["»”\')\]]*\s+|[。！？]+')
+
+
+class SentenceSplitter:
+    """
+    Incrementally splits streamed text into sentences.
+
+    Sentences shorter than min_chars are merged with the next one, since each
+    TTS call has a fixed overhead that a two-word segment doesn't amortize.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        search_from = 0
+        while True:
+            match = SENTENCE_BOUNDARY.search(self._buffer, search_from)
+            if match is None:
+                break
+            sentence = self._buffer[:match.end()].strip()
+            if len(sentence) < self.min_chars:
+                search_from = match.end()
+                continue
+            sentences.append(sentence)
+            self._buffer = self._buffer[match.end():]
+            search_from = 0
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the stream has ended"""
+        tail, self._buffer = self._buffer.strip(), ""
+        return tail or None
+
+
+async def synthesize_sentences(
+    text_stream: AsyncIterator[str],
+    synthesize: Callable[[str], Awaitable[bytes]],
+    min_chars: int = 20
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Yield (sentence, audio) pairs in order.
+
+    Synthesis of each sentence starts as soon as the splitter emits it, so TTS for
+    sentence n runs while sentence n+1 is still generating. Errors from either
+    the text stream or a synthesis are raised to the caller.
+    """
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        splitter = SentenceSplitter(min_chars=min_chars)
+        try:
+            async for delta in text_stream:
+                for sentence in splitter.feed(delta):
+                    await pending.put((sentence, asyncio.create_task(synthesize(sentence))))
+            tail = splitter.flush()
+            if tail:
+                await pending.put((tail, asyncio.create_task(synthesize(tail))))
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await pending.get()) is not None:
+            sentence, synthesis = item
+            yield sentence, await synthesis
+        # Surfaces a text stream failure that ended production early
+        await producer
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                item[1].cancel()
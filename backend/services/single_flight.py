@@ -0,0 +1,62 @@
+"""
+Request coalescing for identical in-flight vendor calls.
+
+When a class practices the same phrase at the same moment, every request misses
+the response cache together and each one pays for its own Fish Audio synthesis
+and Gemini correction. A SingleFlight lets the first request with a given key
+start the call; requests with the same key that arrive while it is still running
+wait for that call instead of making their own. Every waiter gets the same
+result, or the same exception.
+
+The call runs as its own task, so a waiter that is cancelled (a client that hung
+up, say) does not cancel the call for the others, and the result still reaches
+the cache. Only calls in flight are shared; once a call finishes, the response
+caches take over.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Await `call()`, or the identical call already in flight under `key`"""
+        flight = self._flights.get(key)
+        # A task left over from another event loop (each test client request runs on
+        # its own) can't be awaited from this one
+        if flight is None or flight.get_loop() is not asyncio.get_running_loop():
+            flight = asyncio.ensure_future(call())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda task: self._land(key, task))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight()}
+
+    def clear(self) -> None:
+        self._flights.clear()
+        self.calls = self.coalesced = 0
+
+    def _land(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+speech_flights = SingleFlight("tts")
+correction_flights = SingleFlight("correction")
@@ -0,0 +1,47 @@
+"""
+Server-sent events helpers for the streaming practice/reply endpoints.
+
+Each pipeline stage is pushed to the client as its own event as soon as it is
+ready, so the browser can show the transcript while the LLM is still running and
+start playing audio before synthesis has finished.
+"""
+import base64
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the whole stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def audio_chunk_event(seq: int, chunk: bytes, segment: Optional[int] = None) -> str:
+    """
+    Audio is sent one base64 chunk per event; no full buffer is ever built.
+    `segment` tells the client which audio file a chunk belongs to when a reply
+    is synthesized as several files.
+    """
+    data = {"seq": seq, "audio_base64": base64.b64encode(chunk).decode('utf-8')}
+    if segment is not None:
+        data["segment"] = segment
+    return sse_event("audio", data)
+
+
+def error_event(exc: Exception) -> str:
+    """Errors after the 200 has been sent can only be reported in-band"""
+    if isinstance(exc, HTTPException):
+        return sse_event("error", {"status_code": exc.status_code, "detail": exc.detail})
+    return sse_event("error", {"status_code": 500, "detail": str(exc)})
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
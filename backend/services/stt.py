@@ -0,0 +1,104 @@
+"""
+Streaming speech-to-text for the conversation WebSocket.
+
+A StreamingTranscriber opens one live transcription per connection. Audio frames
+go in with `send()` while the user is still talking and TranscriptEvents come back
+by iterating the stream. An event with `speech_final` set marks the end of an
+utterance, which is the signal to start the LLM call.
+
+The Deepgram implementation uses the SDK's native async live client. Tests and
+local runs without network swap in the fake from benchmarks.fake_vendors.
+"""
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncContextManager, AsyncIterator
+
+
+@dataclass
+class TranscriptEvent:
+    text: str
+    is_final: bool = False      # this segment's text will not change anymore
+    speech_final: bool = False  # the speaker finished the utterance
+
+
+class StreamingTranscription(ABC):
+    """One live transcription stream"""
+
+    @abstractmethod
+    async def send(self, frame: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def finalize(self) -> None:
+        """The client says the user stopped talking; flush and end the utterance"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """No more audio is coming; iteration ends once pending results are out"""
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[TranscriptEvent]:
+        ...
+
+
+class StreamingTranscriber(ABC):
+    """Opens live transcription streams"""
+
+    @abstractmethod
+    def open(self, language: str) -> AsyncContextManager[StreamingTranscription]:
+        ...
+
+
+class DeepgramStreamingTranscriber(StreamingTranscriber):
+    def __init__(self, api_key: str, model: str = 'nova-2', endpointing_ms: int = 300,
+                 utterance_end_ms: int = 1000):
+        self.api_key = api_key
+        self.model = model
+        self.endpointing_ms = endpointing_ms
+        self.utterance_end_ms = utterance_end_ms
+
+    @asynccontextmanager
+    async def open(self, language: str):
+        from deepgram import AsyncDeepgramClient
+
+        client = AsyncDeepgramClient(api_key=self.api_key)
+        async with client.listen.v1.connect(
+            model=self.model,
+            language=language if language != "auto" else "en",
+            interim_results="true",
+            endpointing=str(self.endpointing_ms),
+            utterance_end_ms=str(self.utterance_end_ms),
+            vad_events="true",
+            smart_format="true",
+            punctuate="true",
+        ) as socket:
+            yield _DeepgramTranscription(socket)
+
+
+class _DeepgramTranscription(StreamingTranscription):
+    def __init__(self, socket):
+        self._socket = socket
+
+    async def send(self, frame: bytes) -> None:
+        await self._socket.send_media(frame)
+
+    async def finalize(self) -> None:
+        await self._socket.send_finalize()
+
+    async def close(self) -> None:
+        await self._socket.send_close_stream()
+
+    async def __aiter__(self):
+        async for message in self._socket:
+            message_type = getattr(message, 'type', None)
+            if message_type == "Results":
+                alternative = message.channel.alternatives[0]
+                yield TranscriptEvent(
+                    text=alternative.transcript,
+                    is_final=bool(message.is_final),
+                    speech_final=bool(message.speech_final or message.from_finalize),
+                )
+            elif message_type == "UtteranceEnd":
+                # Sent after a gap in words even when endpointing missed the pause
+                yield TranscriptEvent(text="", is_final=True, speech_final=True)
@@ -0,0 +1,122 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Preset voices get asked to say the same short phrases over and over, and every
+Fish Audio synthesis is paid and takes seconds. Audio is cached under a hash of
+the normalized transcript, voice id, format and latency mode, in two tiers:
+
+    * memory: LRU bounded by total bytes, private to the worker
+    * shared: a cache backend every worker reads (see services.cache_backend);
+              by default one file per entry in TTS_CACHE_DIR, evicted
+              least-recently-used first once the directory grows past its
+              byte budget
+
+A shared hit is promoted back into memory. A shared tier that fails is counted
+and treated as a miss, so a cache outage never fails a request.
+"""
+import asyncio
+import hashlib
+import json
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+from config import settings
+from services.cache_backend import CacheBackend, DiskBackend, MemoryBackend, shared_cache_backend
+
+# Namespace of the TTS entries in a backend shared with other caches
+KEY_PREFIX = "tts:"
+
+
+def normalize_transcript(text: str) -> str:
+    """Canonical form for cache keys: NFC unicode with collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def tts_cache_key(transcript: str, model_id: str, audio_format: str = 'wav', latency: str = 'balanced',
+                  bitrate: Optional[int] = None) -> str:
+    payload = json.dumps(
+        [normalize_transcript(transcript), model_id.strip(), audio_format, latency, bitrate],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, memory_max_bytes: int, disk_dir: Optional[Path] = None, disk_max_bytes: int = 0,
+                 backend: Optional[CacheBackend] = None):
+        self.memory = MemoryBackend(memory_max_bytes)
+        if backend is None and disk_dir:
+            backend = DiskBackend(disk_dir, disk_max_bytes)
+        self.backend = backend
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory_hits += 1
+            return audio
+
+        audio = await self._shared(self.backend.get, KEY_PREFIX + key) if self.backend else None
+        if audio is None:
+            self.misses += 1
+            return None
+
+        self.shared_hits += 1
+        self.memory.set(key, audio)
+        return audio
+
+    async def contains(self, key: str) -> bool:
+        """Whether the audio for `key` is cached in either tier; not counted as a lookup"""
+        if self.memory.contains(key):
+            return True
+        return bool(self.backend and await self._shared(self.backend.contains, KEY_PREFIX + key))
+
+    async def put(self, key: str, audio: bytes) -> None:
+        self.memory.set(key, audio)
+        if self.backend:
+            await self._shared(self.backend.set, KEY_PREFIX + key, audio)
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.shared_hits
+        lookups = hits + self.misses
+        try:
+            shared_bytes = self.backend.size_bytes() if self.backend else 0
+        except Exception:
+            shared_bytes = None
+        return {
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size_bytes(),
+            "shared_backend": self.backend.name if self.backend else None,
+            "shared_bytes": shared_bytes or 0,
+        }
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.backend:
+            self.backend.clear(KEY_PREFIX)
+        self.memory_hits = self.shared_hits = self.misses = self.errors = 0
+
+    async def _shared(self, method, *args):
+        try:
+            return await asyncio.to_thread(method, *args)
+        except Exception:
+            self.errors += 1
+            return None
+
+
+tts_cache = TTSCache(
+    memory_max_bytes=settings.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=Path(settings.TTS_CACHE_DIR) if settings.TTS_CACHE_DIR else None,
+    disk_max_bytes=settings.TTS_CACHE_DISK_MB * 1024 * 1024,
+    backend=shared_cache_backend,
+)
@@ -0,0 +1,162 @@
+"""
+Size- and duration-bounded audio uploads.
+
+Starlette parses a multipart body before the endpoint runs, keeping each file in
+memory up to 1 MB and spooling the rest to a temporary file. Nothing capped how
+big that file could get, and the endpoints then read all of it into memory
+before checking anything. Two layers bound it now:
+
+    * UploadLimitMiddleware rejects a request to an upload route with a 413 as
+      soon as its Content-Length, or for a chunked body the bytes received so
+      far, pass the route's limit, before the rest of the body is parsed
+    * read_audio_upload checks the spooled file before reading it: a declared
+      content type that isn't audio or the magic bytes of something we don't
+      know get a 415, a size over UPLOAD_MAX_MB a 413. Then it reads the file
+      into memory once, and rejects a WAV longer than UPLOAD_MAX_SECONDS
+
+Compressed recordings have no duration in their header; their decode for STT is
+bounded instead (see services/audio_preprocess.py). Peak memory per recording is
+one copy of at most UPLOAD_MAX_MB, plus the spool. A /api/practice/batch body is
+capped at PRACTICE_BATCH_MAX_MB in all, and its clips are read one by one as
+they are transcribed.
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from config import settings
+from services.audio import sniff_audio_type, wav_duration
+
+# Anything smaller can't hold a spoken sentence
+MIN_UPLOAD_BYTES = 1000
+# Enough of the file to recognise its container
+SNIFF_BYTES = 64
+# Room in a request body for the multipart boundaries and the form fields next to
+# the recordings; Starlette caps each form field at 1 MB
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+# MediaRecorder labels WebM, MP4 and Ogg recordings as video/* in some browsers,
+# and some clients don't say at all
+_OTHER_RECORDING_TYPES = ("video/webm", "video/mp4", "video/ogg", "application/octet-stream")
+
+
+def max_upload_bytes() -> int:
+    return int(settings.UPLOAD_MAX_MB * 1024 * 1024)
+
+
+def max_batch_upload_bytes() -> int:
+    return int(settings.PRACTICE_BATCH_MAX_MB * 1024 * 1024)
+
+
+def is_audio_content_type(content_type: Optional[str]) -> bool:
+    """Whether a declared upload content type could be a recording; a missing one could"""
+    if not content_type:
+        return True
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("audio/") or media_type in _OTHER_RECORDING_TYPES
+
+
+def _unsupported() -> HTTPException:
+    return HTTPException(
+        status_code=415,
+        detail="Unsupported audio upload. Send WAV, WebM, Ogg, MP3, MP4 or FLAC audio."
+    )
+
+
+def _body_too_large(limit_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload is too large. The limit for this request is {limit_bytes / (1024 * 1024):.0f} MB."
+    )
+
+
+def _too_large(limit_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Audio upload is too large. The limit is {limit_bytes / (1024 * 1024):g} MB per recording."
+    )
+
+
+async def read_audio_upload(file: UploadFile) -> bytes:
+    """
+    The uploaded recording, read once after its type and size are checked.
+
+    Raises HTTPException 415 for content that isn't audio we know, 413 for a file
+    over UPLOAD_MAX_MB or a WAV over UPLOAD_MAX_SECONDS, and 400 for a near-empty
+    one.
+    """
+    if not is_audio_content_type(file.content_type):
+        raise _unsupported()
+
+    size = file.size
+    if size is None:
+        # Built outside the multipart parser; ask the spool
+        file.file.seek(0, 2)
+        size = file.file.tell()
+    if size > max_upload_bytes():
+        raise _too_large(max_upload_bytes())
+    if size < MIN_UPLOAD_BYTES:
+        raise HTTPException(status_code=400, detail="Audio file is too small or empty")
+
+    await file.seek(0)
+    if sniff_audio_type(await file.read(SNIFF_BYTES)) is None:
+        raise _unsupported()
+    await file.seek(0)
+    audio_data = await file.read()
+
+    if sniff_audio_type(audio_data) == "audio/wav":
+        duration = wav_duration(audio_data)
+        if duration is not None and duration > settings.UPLOAD_MAX_SECONDS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Recording is too long. The limit is {settings.UPLOAD_MAX_SECONDS:g} seconds."
+            )
+    return audio_data
+
+
+class UploadLimitMiddleware:
+    """Pure ASGI middleware that stops request bodies to upload_routes() past their limit"""
+
+    def __init__(self, app, routes: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.routes = upload_routes() if routes is None else routes
+
+    async def __call__(self, scope, receive, send):
+        limit = self.routes.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            error = _body_too_large(limit)
+            await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI passes an HTTPException raised while reading the body through
+                    raise _body_too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def upload_routes() -> Dict[str, int]:
+    """POST paths that take recordings, and the most body bytes each may send"""
+    single = max_upload_bytes() + FORM_OVERHEAD_BYTES
+    return {
+        "/api/practice": single,
+        "/api/practice/stream": single,
+        "/api/practice/batch": max_batch_upload_bytes() + FORM_OVERHEAD_BYTES,
+        "/api/reply": single,
+        "/api/reply/stream": single,
+        "/api/create_clone": single,
+    }
@@ -0,0 +1,139 @@
+"""
+One registry of vendor SDK clients per worker, opened in the app lifespan.
+
+Every client gets its own keep-alive httpx connection pool, so calls reuse warm
+TLS connections instead of handshaking per request. The pool limits come from
+settings. Closing the registry at shutdown releases the sockets.
+
+A client whose API key is missing is left as None and only fails when a route
+actually needs it, so one absent key does not stop the whole app from starting.
+
+The SDK packages are heavy to import, so nothing imports them at module level:
+the clients are built in the lifespan hook (or on first use), and request
+options that need SDK types go through gemini_config / fish_tts_config.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from config import settings
+
+
+@dataclass
+class VendorClients:
+    deepgram: Any = None
+    gemini: Any = None
+    fish_audio: Any = None
+    http_clients: List[httpx.Client] = field(default_factory=list)
+
+    def require(self, name: str) -> Any:
+        """Get a client, or a 500 naming the vendor if it is not configured"""
+        client = getattr(self, name)
+        if client is None:
+            raise HTTPException(
+                status_code=500,
+                detail=f"The {name} client is not configured. Please check its API key in your .env file."
+            )
+        return client
+
+    def close(self) -> None:
+        for http_client in self.http_clients:
+            http_client.close()
+        self.http_clients.clear()
+
+
+_clients: Optional[VendorClients] = None
+_lock = threading.Lock()
+
+
+def _http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.VENDOR_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.VENDOR_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.VENDOR_HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=settings.VENDOR_HTTP_TIMEOUT
+    )
+
+
+def create_vendor_clients() -> VendorClients:
+    """Build the SDK clients, each on its own pooled httpx client"""
+    # SDK imports are kept local so importing this module stays cheap
+    from deepgram import DeepgramClient
+    from fishaudio import FishAudio
+    from google import genai
+    from google.genai import types
+
+    clients = VendorClients()
+    if settings.DEEPGRAM_API_KEY:
+        http_client = _http_client()
+        clients.http_clients.append(http_client)
+        clients.deepgram = DeepgramClient(
+            api_key=settings.DEEPGRAM_API_KEY,
+            httpx_client=http_client,
+            timeout=settings.VENDOR_HTTP_TIMEOUT
+        )
+    if settings.GOOGLE_API_KEY:
+        http_client = _http_client()
+        clients.http_clients.append(http_client)
+        clients.gemini = genai.Client(
+            api_key=settings.GOOGLE_API_KEY,
+            http_options=types.HttpOptions(httpx_client=http_client)
+        )
+    if settings.FISH_AUDIO_API_KEY:
+        http_client = _http_client()
+        clients.http_clients.append(http_client)
+        clients.fish_audio = FishAudio(api_key=settings.FISH_AUDIO_API_KEY, httpx_client=http_client)
+    return clients
+
+
+def gemini_config(**options) -> Any:
+    """A google.genai GenerateContentConfig, importing the SDK on first use"""
+    from google.genai import types
+    return types.GenerateContentConfig(**options)
+
+
+def fish_tts_config(**options) -> Any:
+    """A Fish Audio TTSConfig, importing the SDK on first use"""
+    from fishaudio.types import TTSConfig
+    return TTSConfig(**options)
+
+
+def open_vendor_clients() -> VendorClients:
+    """(Re)create the registry (called from the app lifespan on startup)"""
+    global _clients
+    with _lock:
+        if _clients is not None:
+            _clients.close()
+        _clients = create_vendor_clients()
+        return _clients
+
+
+def get_vendor_clients() -> VendorClients:
+    """Get the registry, opening it on first use outside the app lifespan"""
+    global _clients
+    if _clients is None:
+        with _lock:
+            if _clients is None:
+                _clients = create_vendor_clients()
+    return _clients
+
+
+def install_vendor_clients(clients: VendorClients) -> None:
+    """Swap in a prepared registry, e.g. fake vendors for benchmarks"""
+    global _clients
+    with _lock:
+        _clients = clients
+
+
+def close_vendor_clients() -> None:
+    """Close every pooled connection (called from the app lifespan on shutdown)"""
+    global _clients
+    with _lock:
+        if _clients is not None:
+            _clients.close()
+        _clients = None
@@ -0,0 +1,134 @@
+"""
+The Deepgram, Gemini and Fish Audio SDKs we use are synchronous. Calling them
+straight from an async route blocks the event loop for the whole vendor round
+trip, so every other request on the worker waits behind it.
+
+Each vendor gets its own size-limited thread pool instead. A slow vendor can
+only tie up its own threads, and the pool size caps how many calls we have in
+flight against that vendor at once.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from config import settings
+
+DEEPGRAM = "deepgram"
+GEMINI = "gemini"
+FISH_AUDIO = "fish_audio"
+
+VENDORS = (DEEPGRAM, GEMINI, FISH_AUDIO)
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def _default_pool_sizes() -> Dict[str, int]:
+    return {
+        DEEPGRAM: settings.DEEPGRAM_POOL_SIZE,
+        GEMINI: settings.GEMINI_POOL_SIZE,
+        FISH_AUDIO: settings.FISH_AUDIO_POOL_SIZE,
+    }
+
+
+def configure_vendor_pools(pool_sizes: Optional[Dict[str, int]] = None) -> None:
+    """
+    (Re)create the per-vendor pools.
+
+    Args:
+        pool_sizes: Mapping of vendor name to max worker threads. Vendors that are
+            not listed use the size from settings.
+    """
+    sizes = _default_pool_sizes()
+    if pool_sizes:
+        sizes.update(pool_sizes)
+
+    shutdown_vendor_pools(wait=False)
+    for vendor in VENDORS:
+        _executors[vendor] = ThreadPoolExecutor(
+            max_workers=max(1, sizes[vendor]),
+            thread_name_prefix=f"vendor-{vendor}"
+        )
+
+
+def get_vendor_pool(vendor: str) -> ThreadPoolExecutor:
+    """Get the pool for a vendor, creating the pools on first use"""
+    if vendor not in VENDORS:
+        raise ValueError(f"Unknown vendor: {vendor}")
+    if vendor not in _executors:
+        configure_vendor_pools()
+    return _executors[vendor]
+
+
+async def run_vendor_call(vendor: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking vendor SDK call on that vendor's pool and await its result.
+
+    Context variables of the calling task are copied into the worker thread so
+    per-request state stays visible inside the call.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_vendor_pool(vendor), context.run, call)
+
+
+async def iterate_vendor_stream(vendor: str, open_stream: Callable[..., Any], *args, **kwargs) -> AsyncIterator[Any]:
+    """
+    Open a blocking SDK iterator on the vendor's pool and yield its items.
+
+    Both opening the stream and every `next()` run on the pool, so a slow chunk only
+    parks a vendor thread. If the consumer stops early the iterator is closed. A
+    generator can't be closed while its `next()` is running, so when the consumer
+    gives up on an item that is still being fetched (a timeout, say), the thread
+    fetching it closes the iterator once `next()` returns.
+    """
+    iterator = iter(await run_vendor_call(vendor, open_stream, *args, **kwargs))
+    exhausted = object()
+    lock = threading.Lock()
+    state = {"fetching": False, "abandoned": False}
+
+    def close() -> None:
+        close_iterator = getattr(iterator, 'close', None)
+        if close_iterator is not None:
+            close_iterator()
+
+    def advance() -> Any:
+        try:
+            return next(iterator, exhausted)
+        finally:
+            with lock:
+                state["fetching"] = False
+                abandoned = state["abandoned"]
+            if abandoned:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    pending = None
+    try:
+        while True:
+            with lock:
+                state["fetching"] = True
+            pending = get_vendor_pool(vendor).submit(contextvars.copy_context().run, advance)
+            item = await asyncio.wrap_future(pending)
+            if item is exhausted:
+                break
+            yield item
+    finally:
+        with lock:
+            # A cancelled future never started, so nothing is fetching
+            in_flight = state["fetching"] and pending is not None and not pending.cancelled()
+            state["abandoned"] = in_flight
+        if not in_flight:
+            await run_vendor_call(vendor, close)
+
+
+def shutdown_vendor_pools(wait: bool = True) -> None:
+    """Shut down every vendor pool (called from the app lifespan on shutdown)"""
+    for executor in _executors.values():
+        executor.shutdown(wait=wait)
+    _executors.clear()
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+# The vendor SDK clients refuse to construct without a key; tests never reach
+# the real vendors, so any non-empty placeholder will do.
+os.environ.setdefault("FISH_AUDIO_API_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("DEEPGRAM_API_KEY", "test")
+
+# Keep response caches in memory so tests never write into the source tree
+os.environ["TTS_CACHE_DIR"] = ""
+# No background TTS warm-up in apps started by the tests
+os.environ["PREWARM_ENABLED"] = "false"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from services.conversation_store import conversation_store
+    from services.llm_cache import llm_cache
+    from services.prewarm import observed_phrases
+    from services.resilience import reset_resilience
+    from services.principal_cache import principal_cache
+    from services.single_flight import correction_flights, speech_flights
+    from services.tts_cache import tts_cache
+
+    tts_cache.clear()
+    llm_cache.clear()
+    principal_cache.clear()
+    conversation_store.clear()
+    speech_flights.clear()
+    correction_flights.clear()
+    observed_phrases.clear()
+    reset_resilience()
+    yield
+
+
+@pytest.fixture
+def vendor_clients(monkeypatch):
+    """An empty vendor client registry; tests assign the fake SDK clients they need"""
+    from services import vendor_clients as vendor_clients_module
+    from services.vendor_clients import VendorClients
+
+    clients = VendorClients()
+    monkeypatch.setattr(vendor_clients_module, "_clients", clients)
+    return clients
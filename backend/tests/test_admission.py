@@ -0,0 +1,167 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from auth import create_access_token
+from services.admission import AdmissionMiddleware, AdmissionPool, request_identity
+
+
+def pool(**overrides) -> AdmissionPool:
+    options = dict(max_concurrent=1, max_queue=1, queue_timeout=1.0, per_user_limit=0)
+    options.update(overrides)
+    return AdmissionPool("practice", **options)
+
+
+class TestAdmissionControl:
+    """Test suite for per-endpoint and per-user admission control"""
+
+    def test_queued_requests_run_in_order(self):
+        """Requests past the concurrency cap wait and are admitted first come first served"""
+        practice = pool(max_concurrent=1, max_queue=5)
+        order = []
+
+        async def request(name):
+            async with practice.admit(name):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            await asyncio.gather(*[request(f"user-{n}") for n in range(4)])
+
+        asyncio.run(scenario())
+        assert order == ["user-0", "user-1", "user-2", "user-3"]
+        assert practice.stats()["active"] == 0
+        assert practice.stats()["admitted"] == 4
+
+    def test_full_queue_is_shed(self):
+        """Past the concurrency cap and the queue, requests get a fast 503 with Retry-After"""
+        practice = pool(max_concurrent=1, max_queue=1)
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def hold(name):
+                async with practice.admit(name):
+                    await release.wait()
+
+            running = [asyncio.ensure_future(hold("a")), asyncio.ensure_future(hold("b"))]
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as shed:
+                await practice.acquire("c")
+            release.set()
+            await asyncio.gather(*running)
+            return shed.value
+
+        shed = asyncio.run(scenario())
+        assert shed.status_code == 503
+        assert int(shed.headers["Retry-After"]) >= 1
+        assert practice.stats()["rejected"]["queue_full"] == 1
+
+    def test_queue_deadline(self):
+        """A request still waiting when the deadline passes gets a 503 and leaves the queue"""
+        practice = pool(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+
+        async def scenario():
+            ticket = await practice.acquire("a")
+            with pytest.raises(HTTPException) as shed:
+                await practice.acquire("b")
+            practice.release(ticket)
+            return shed.value
+
+        assert asyncio.run(scenario()).status_code == 503
+        assert practice.stats()["rejected"]["queue_timeout"] == 1
+        assert practice.stats()["queued"] == 0
+        assert practice.stats()["active"] == 0
+
+    def test_per_user_limit(self):
+        """One user can't hold more than their share; other users are unaffected"""
+        practice = pool(max_concurrent=4, max_queue=4, per_user_limit=2)
+
+        async def scenario():
+            tickets = [await practice.acquire("ana"), await practice.acquire("ana")]
+            with pytest.raises(HTTPException) as limited:
+                await practice.acquire("ana")
+            tickets.append(await practice.acquire("ben"))
+            for ticket in tickets:
+                practice.release(ticket)
+            return limited.value
+
+        limited = asyncio.run(scenario())
+        assert limited.status_code == 429
+        assert "Retry-After" in limited.headers
+        assert practice.stats()["rejected"]["user_limit"] == 1
+
+    def test_anonymous_requests_limited_by_address_only_if_configured(self):
+        """Requests without a token share their address, so they aren't capped by it unless asked"""
+        practice = pool(max_concurrent=4, max_queue=4, per_user_limit=1)
+        limited = pool(max_concurrent=4, max_queue=4, per_user_limit=1, per_address_limit=2)
+
+        async def scenario():
+            tickets = [await practice.acquire("ip:10.0.0.1") for _ in range(4)]
+            for ticket in tickets:
+                practice.release(ticket)
+
+            tickets = [await limited.acquire("ip:10.0.0.1"), await limited.acquire("ip:10.0.0.1")]
+            with pytest.raises(HTTPException) as error:
+                await limited.acquire("ip:10.0.0.1")
+            for ticket in tickets:
+                limited.release(ticket)
+            return error.value
+
+        assert asyncio.run(scenario()).status_code == 429
+        assert practice.stats()["rejected"]["user_limit"] == 0
+
+    def test_identity_from_bearer_token(self):
+        """Requests count against the token's user, otherwise the client address"""
+        token = create_access_token({"sub": "7"})
+        authorized = {"headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 5000)}
+        anonymous = {"headers": [], "client": ("10.0.0.1", 5000)}
+        assert request_identity(authorized) == "user:7"
+        assert request_identity(anonymous) == "ip:10.0.0.1"
+
+    def test_middleware_sheds_before_the_route(self):
+        """Over the limits the middleware answers 503 itself, and other paths pass through"""
+        app = FastAPI()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        @app.post("/api/practice")
+        async def practice_route():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return {"ok": True}
+
+        @app.post("/api/other")
+        async def other_route():
+            return {"ok": True}
+
+        pools = {"practice": pool(max_concurrent=1, max_queue=0)}
+        app.add_middleware(AdmissionMiddleware, pools=pools, routes={"/api/practice": "practice"})
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = asyncio.ensure_future(client.post("/api/practice"))
+                await started.wait()
+                shed = await client.post("/api/practice")
+                other = await client.post("/api/other")
+                release.set()
+                return await first, shed, other
+
+        first, shed, other = asyncio.run(scenario())
+        assert first.status_code == 200
+        assert shed.status_code == 503
+        assert "Retry-After" in shed.headers
+        assert "detail" in shed.json()
+        assert other.status_code == 200
+        assert len(calls) == 1
+        assert pools["practice"].stats()["active"] == 0
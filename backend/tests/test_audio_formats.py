@@ -0,0 +1,145 @@
+import base64
+import io
+import sys
+import wave
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from routers import conversation, practice
+from services.audio import resolve_audio_format, resolve_bitrate, sniff_audio_type
+
+app = FastAPI()
+app.include_router(practice.router)
+app.include_router(conversation.router)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fish(vendor_clients):
+    vendor_clients.deepgram = FakeDeepgramClient()
+    vendor_clients.gemini = FakeGenAIClient()
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=2.0))
+    return vendor_clients.fish_audio
+
+
+@pytest.fixture
+def spoken(fish, vendor_clients, monkeypatch):
+    """Two-sentence replies, with the text of every TTS request recorded"""
+    vendor_clients.gemini = FakeGenAIClient(reply="Me alegro mucho de oírlo. ¿Cuánto tiempo llevas estudiando?")
+    texts = []
+    convert = fish.tts.convert
+
+    def recording_convert(*, text, **options):
+        texts.append(text)
+        return convert(text=text, **options)
+
+    monkeypatch.setattr(fish.tts, "convert", recording_convert)
+    return texts
+
+
+def reply_request(data=None):
+    return client.post("/api/reply",
+                       files={"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")},
+                       data={"target_lang": "es", "model_id": "voice", **(data or {})})
+
+
+def practice_request(data=None, headers=None, upload=None):
+    return client.post("/api/practice",
+                       files={"file": ("audio.webm", upload or make_wav(duration=0.2), "audio/webm")},
+                       data={"target_lang": "es", "model_id": "voice", **(data or {})},
+                       headers=headers or {})
+
+
+class TestAudioFormats:
+    """Test suite for output format negotiation and upload sniffing"""
+
+    def test_format_resolution(self):
+        """An explicit format beats Accept, which beats the WAV default"""
+        assert resolve_audio_format(None) == "wav"
+        assert resolve_audio_format(None, "audio/mpeg") == "mp3"
+        assert resolve_audio_format(None, "application/json, audio/ogg;q=0.5") == "opus"
+        assert resolve_audio_format("OPUS", "audio/mpeg") == "opus"
+        with pytest.raises(HTTPException) as exc_info:
+            resolve_audio_format("flac")
+        assert exc_info.value.status_code == 400
+
+    def test_bitrate_resolution(self):
+        """Compressed formats default their bitrate and reject ones Fish Audio lacks"""
+        assert resolve_bitrate("wav", None) is None
+        assert resolve_bitrate("mp3", None) == 128
+        assert resolve_bitrate("opus", 24) == 24
+        with pytest.raises(HTTPException):
+            resolve_bitrate("mp3", 100)
+
+    def test_sniffing(self):
+        """Uploads are typed by their magic bytes"""
+        assert sniff_audio_type(make_wav(duration=0.1)) == "audio/wav"
+        assert sniff_audio_type(b"\x1a\x45\xdf\xa3" + bytes(100)) == "audio/webm"
+        assert sniff_audio_type(b"OggS" + bytes(100)) == "audio/ogg"
+        assert sniff_audio_type(b"<html>" + bytes(100)) is None
+
+    def test_non_audio_upload_rejected(self, fish):
+        """A non-audio body is a 415 whatever its declared content type"""
+        response = practice_request(upload=b"%PDF-1.7" + bytes(2000))
+        assert response.status_code == 415
+        assert fish.calls == 0
+
+    def test_opus_output(self, fish):
+        """Opus at a given bitrate is requested from Fish Audio and labelled as such"""
+        response = practice_request(data={"audio_format": "opus", "bitrate": "24"})
+
+        body = response.json()
+        assert body["audio_format"] == "opus"
+        audio = base64.b64decode(body["audio_base64"])
+        assert audio[:4] == b"OggS"
+        # 2 s at 24 kbps instead of 2 s of 16 kHz PCM
+        assert len(audio) == 6000
+        assert len(audio) < len(fish.audio) / 10
+
+    def test_accept_picks_format_and_cache_is_per_format(self, fish):
+        """Accept: audio/mpeg returns MP3 bytes; WAV and MP3 of one phrase are cached apart"""
+        mp3 = practice_request(headers={"accept": "audio/mpeg"})
+        assert mp3.headers["content-type"] == "audio/mpeg"
+        assert mp3.content[:3] == b"ID3"
+
+        wav = practice_request()
+        assert base64.b64decode(wav.json()["audio_base64"]) == fish.audio
+        practice_request(headers={"accept": "audio/mpeg"})
+        assert fish.calls == 2
+
+    def test_bad_bitrate_rejected_before_vendors(self, fish):
+        """An unsupported bitrate fails fast instead of after STT and the LLM"""
+        response = practice_request(data={"audio_format": "mp3", "bitrate": "100"})
+        assert response.status_code == 400
+        assert fish.calls == 0
+
+    def test_wav_reply_decodes_as_one_file(self, fish, spoken):
+        """A WAV reply voiced sentence by sentence is joined into one readable WAV"""
+        response = reply_request()
+
+        assert spoken == ["Me alegro mucho de oírlo.", "¿Cuánto tiempo llevas estudiando?"]
+        audio = base64.b64decode(response.json()["reply_audio"])
+        with wave.open(io.BytesIO(audio)) as joined, wave.open(io.BytesIO(fish.audio)) as segment:
+            assert joined.getparams()[:3] == segment.getparams()[:3]
+            assert joined.getnframes() == 2 * segment.getnframes()
+            assert len(joined.readframes(joined.getnframes())) == len(audio) - 44
+
+    @pytest.mark.parametrize("audio_format, magic", [("opus", b"OggS"), ("mp3", b"ID3")])
+    def test_compressed_reply_is_one_stream(self, spoken, audio_format, magic):
+        """MP3 and Opus replies are synthesized whole rather than chained files"""
+        response = reply_request(data={"audio_format": audio_format})
+
+        assert spoken == ["Me alegro mucho de oírlo. ¿Cuánto tiempo llevas estudiando?"]
+        body = response.json()
+        assert body["audio_format"] == audio_format
+        audio = base64.b64decode(body["reply_audio"])
+        assert audio.startswith(magic)
+        assert audio.count(magic) == 1
@@ -0,0 +1,107 @@
+import io
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient
+from routers import practice
+from services import audio_preprocess
+from services.audio_preprocess import PADDING_SECONDS, decode_wav, prepare_for_stt, resample
+
+app = FastAPI()
+app.include_router(practice.router)
+
+client = TestClient(app)
+
+
+def tone(seconds: float, rate: int, frequency: float = 220.0, level: float = 0.4) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return level * np.sin(2 * np.pi * frequency * t)
+
+
+def pcm_wav(samples: np.ndarray, rate: int, channels: int = 1, width: int = 2) -> bytes:
+    """Integer PCM WAV; samples in [-1, 1], interleaved when channels > 1"""
+    scaled = np.round(samples * (2 ** (8 * width - 1) - 1)).astype("<i4")
+    if width == 2:
+        pcm = scaled.astype("<i2").tobytes()
+    else:
+        pcm = b"".join(value.to_bytes(width, "little", signed=True) for value in scaled.tolist())
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(width)
+        writer.setframerate(rate)
+        writer.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class TestAudioPreprocess:
+    """Test suite for the pre-STT silence trimming, downmix and resample stage"""
+
+    def test_trims_downmixes_and_resamples(self):
+        """48 kHz stereo with a second of silence either side becomes trimmed 16 kHz mono"""
+        rate = 48000
+        silence = np.zeros(rate)
+        speech = tone(0.5, rate)
+        mono = np.concatenate([silence, speech, silence])
+        stereo = np.repeat(mono, 2)
+
+        prepared = prepare_for_stt(pcm_wav(stereo, rate, channels=2))
+
+        assert prepared.original_duration == pytest.approx(2.5)
+        assert prepared.duration == pytest.approx(0.5 + 2 * PADDING_SECONDS, abs=0.03)
+        with wave.open(io.BytesIO(prepared.wav)) as reader:
+            assert reader.getnchannels() == 1
+            assert reader.getframerate() == 16000
+            assert reader.getsampwidth() == 2
+
+    def test_silent_clip_rejected(self):
+        """Silence and low-level noise are rejected as containing no speech"""
+        rng = np.random.default_rng(0)
+        noise = rng.normal(0, 0.001, 16000)
+        with pytest.raises(HTTPException) as silent:
+            prepare_for_stt(pcm_wav(noise, 16000))
+        assert silent.value.status_code == 400
+
+    def test_silent_upload_never_reaches_deepgram(self, vendor_clients):
+        """/api/practice answers 400 for a silent recording without calling STT"""
+        deepgram = FakeDeepgramClient()
+        vendor_clients.deepgram = deepgram
+        vendor_clients.gemini = FakeGenAIClient()
+        vendor_clients.fish_audio = FakeFishAudio()
+
+        response = client.post("/api/practice",
+                               files={"file": ("audio.wav", pcm_wav(np.zeros(16000), 16000), "audio/wav")},
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        assert response.status_code == 400
+        assert deepgram.calls == 0
+
+    def test_resample_filters_above_new_nyquist(self):
+        """A 12 kHz tone is removed when going from 48 kHz to 16 kHz, a 1 kHz tone is kept"""
+        rate = 48000
+        high = resample(tone(0.5, rate, frequency=12000).astype(np.float32), rate, 16000)
+        low = resample(tone(0.5, rate, frequency=1000).astype(np.float32), rate, 16000)
+        assert len(low) == 8000
+        assert np.sqrt(np.mean(high[100:-100] ** 2)) < 0.02
+        assert np.sqrt(np.mean(low[100:-100] ** 2)) == pytest.approx(0.4 / np.sqrt(2), rel=0.05)
+
+    def test_decodes_24_bit_pcm(self):
+        """24-bit samples keep their sign and scale"""
+        samples = np.array([0.5, -0.5, 0.25, -1.0])
+        decoded, rate = decode_wav(pcm_wav(samples, 44100, width=3))
+        assert rate == 44100
+        np.testing.assert_allclose(decoded[:, 0], samples, atol=1e-6)
+
+    def test_undecodable_upload_passes_through(self, monkeypatch):
+        """Without ffmpeg a WebM recording is left for Deepgram to decode"""
+        monkeypatch.setattr(audio_preprocess.shutil, "which", lambda name: None)
+        assert prepare_for_stt(b"\x1a\x45\xdf\xa3" + bytes(2000)) is None
@@ -0,0 +1,92 @@
+import base64
+import json
+import sys
+from email.parser import BytesParser
+from email.policy import HTTP
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from routers import conversation, practice
+from services.audio_response import AUDIO, JSON, MULTIPART, negotiate_audio_response
+
+app = FastAPI()
+app.include_router(practice.router)
+app.include_router(conversation.router)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fish(vendor_clients):
+    vendor_clients.deepgram = FakeDeepgramClient()
+    vendor_clients.gemini = FakeGenAIClient()
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=0.2))
+    return vendor_clients.fish_audio
+
+
+def practice_request(**headers):
+    return client.post("/api/practice",
+                       files={"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")},
+                       data={"target_lang": "es", "model_id": "voice"},
+                       headers=headers)
+
+
+class TestAudioResponse:
+    """Test suite for Accept-based audio response negotiation"""
+
+    @pytest.mark.parametrize("accept, mode", [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("audio/*", AUDIO),
+        ("audio/wav, application/json;q=0.5", AUDIO),
+        ("application/json, audio/*;q=0.9", JSON),
+        ("multipart/mixed", MULTIPART),
+        ("text/html", JSON),
+    ])
+    def test_negotiation(self, accept, mode):
+        """The highest-q supported type wins and JSON is the fallback"""
+        assert negotiate_audio_response(accept) == mode
+
+    def test_json_stays_default(self, fish):
+        """Clients that send no Accept header still get base64 in JSON"""
+        response = practice_request()
+
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert base64.b64decode(body["audio_base64"]) == fish.audio
+        assert body["corrected_text"] == "Yo soy estudiante de español."
+
+    def test_raw_audio_body(self, fish):
+        """audio/* gets the WAV bytes as the body and the text in a header"""
+        response = practice_request(accept="audio/*")
+
+        assert response.headers["content-type"] == "audio/wav"
+        assert response.content == fish.audio
+        metadata = json.loads(response.headers["x-audio-metadata"])
+        assert metadata["corrected_text"] == "Yo soy estudiante de español."
+        assert "audio_base64" not in metadata
+
+    def test_multipart_reply(self, fish):
+        """multipart/mixed carries the JSON metadata and the raw audio as two parts"""
+        response = client.post("/api/reply",
+                               files={"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")},
+                               data={"target_lang": "es", "model_id": "voice"},
+                               headers={"accept": "multipart/mixed"})
+
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/mixed; boundary=")
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + response.content
+        )
+        metadata_part, audio_part = message.iter_parts()
+        assert json.loads(metadata_part.get_content())["user_message"] == "Yo es estudiante de español."
+        assert audio_part.get_content_type() == "audio/wav"
+        assert audio_part.get_payload(decode=True) == fish.audio
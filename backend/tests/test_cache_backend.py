@@ -0,0 +1,149 @@
+import asyncio
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_resp_server import running_server
+from services.cache_backend import CacheBackend, CacheBackendError, MemoryBackend, RedisBackend, SQLiteBackend, create_cache_backend
+from services.llm_cache import LLMCache
+from services.tts_cache import TTSCache
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    """Each backend implementation, empty"""
+    if request.param == "memory":
+        yield MemoryBackend(max_bytes=1 << 24)
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(tmp_path / "cache.db", max_bytes=1 << 24)
+        yield backend
+        backend.close()
+    else:
+        with running_server() as (_, port):
+            backend = RedisBackend(port=port)
+            yield backend
+            backend.close()
+
+
+def closed_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class TestCacheBackend:
+    """Test suite for the shared cache tier backends"""
+
+    def test_get_set_delete_clear(self, backend):
+        """Every backend round-trips bytes, deletes, and clears by key prefix"""
+        assert backend.get("tts:a") is None
+        backend.set("tts:a", b"\x00audio\r\n")
+        backend.set("tts:b", b"b")
+        backend.set("llm:a", b"{}")
+        assert backend.get("tts:a") == b"\x00audio\r\n"
+
+        backend.delete("tts:b")
+        assert backend.get("tts:b") is None
+        backend.clear("tts:")
+        assert backend.get("tts:a") is None
+        assert backend.get("llm:a") == b"{}"
+
+    def test_ttl(self, backend):
+        """Entries stop being returned once their TTL has passed"""
+        backend.set("short", b"x", ttl=0.05)
+        backend.set("long", b"y", ttl=60)
+        time.sleep(0.1)
+        assert backend.get("short") is None
+        assert backend.get("long") == b"y"
+
+    def test_large_value(self, backend):
+        """A multi-megabyte audio blob comes back intact"""
+        audio = bytes(range(256)) * 16384
+        backend.set("big", audio)
+        assert backend.get("big") == audio
+
+    def test_sqlite_is_shared_and_bounded(self, tmp_path):
+        """Two workers on one file see each other's entries, and the file stays under budget"""
+        first = SQLiteBackend(tmp_path / "cache.db", max_bytes=250)
+        second = SQLiteBackend(tmp_path / "cache.db", max_bytes=250)
+        first.set("a", b"a" * 100)
+        first.set("b", b"b" * 100)
+        assert second.get("a") == b"a" * 100
+        second.set("c", b"c" * 100)
+        assert second.size_bytes() <= 250
+        assert second.get("c") == b"c" * 100
+
+    def test_caches_share_entries_across_workers(self, tmp_path):
+        """A phrase synthesized by one worker's TTS cache is a hit for another's"""
+        url = f"sqlite:///{tmp_path / 'cache.db'}"
+        worker_one = TTSCache(memory_max_bytes=1000, backend=create_cache_backend(url, 1 << 20))
+        worker_two = TTSCache(memory_max_bytes=1000, backend=create_cache_backend(url, 1 << 20))
+        llm_one = LLMCache(max_entries=10, ttl_seconds=60, backend=create_cache_backend(url, 1 << 20))
+        llm_two = LLMCache(max_entries=10, ttl_seconds=60, backend=create_cache_backend(url, 1 << 20))
+
+        async def scenario():
+            await worker_one.put("phrase", b"audio")
+            await llm_one.put("correction", "es", "hola", "1", {"corrected_text": "Hola."})
+            return (await worker_two.get("phrase"), await worker_two.get("phrase"),
+                    await llm_two.get("correction", "es", "hola", "1"))
+
+        shared, promoted, correction = asyncio.run(scenario())
+        assert shared == promoted == b"audio"
+        assert worker_two.stats()["shared_hits"] == 1
+        assert worker_two.stats()["memory_hits"] == 1
+        assert correction == {"corrected_text": "Hola."}
+        assert llm_two.stats()["shared_hits"] == 1
+
+    def test_clear_reaches_the_shared_tier(self, tmp_path):
+        """Cleared entries don't come back from the backend, and each cache clears only its own"""
+        backend = create_cache_backend(f"sqlite:///{tmp_path / 'cache.db'}", 1 << 20)
+        tts = TTSCache(memory_max_bytes=1000, backend=backend)
+        llm = LLMCache(max_entries=10, ttl_seconds=60, backend=backend)
+
+        async def scenario():
+            await tts.put("phrase", b"audio")
+            await llm.put("correction", "es", "hola", "1", {"corrected_text": "Hola."})
+            llm.clear()
+            return await llm.get("correction", "es", "hola", "1"), await tts.get("phrase")
+
+        assert asyncio.run(scenario()) == (None, b"audio")
+
+    def test_unreachable_backend_is_a_miss(self):
+        """A cache server that is down counts errors but never fails the lookup"""
+        cache = TTSCache(memory_max_bytes=1000, backend=RedisBackend(port=closed_port(), timeout=0.5))
+
+        async def scenario():
+            await cache.put("phrase", b"audio")
+            cache.memory.clear()
+            return await cache.get("phrase")
+
+        assert asyncio.run(scenario()) is None
+        assert cache.stats()["errors"] == 2
+        assert cache.stats()["misses"] == 1
+
+    def test_redis_url_password_and_database(self):
+        """redis:// URLs carry the password and database number"""
+        with running_server(password="s3cret") as (server, port):
+            zero = create_cache_backend(f"redis://:s3cret@127.0.0.1:{port}/0", 0)
+            three = create_cache_backend(f"redis://:s3cret@127.0.0.1:{port}/3", 0)
+            zero.set("k", b"zero")
+            three.set("k", b"three")
+            assert zero.get("k") == b"zero"
+            assert three.get("k") == b"three"
+            with pytest.raises(CacheBackendError):
+                RedisBackend(port=port).get("k")
+
+    def test_backend_interface_is_enforced(self):
+        """A backend missing part of the interface fails when created, not on first use"""
+        class GetOnly(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnly()
@@ -0,0 +1,137 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from auth import get_current_user
+from benchmarks.fake_vendors import FakeFishAudio, make_wav
+from database import Base
+from models.user import User
+from routers import voice_clone
+from services import clone_jobs as clone_jobs_module
+from services.clone_jobs import clone_jobs
+from services.principal_cache import Principal
+
+app = FastAPI()
+app.include_router(voice_clone.router)
+
+client = TestClient(app)
+
+
+def principal(user_id: int) -> Principal:
+    return Principal(id=user_id, email=f"user{user_id}@example.com", name=None, picture=None, is_active=True,
+                     created_at=None, updated_at=None, voice_model_id=None, voice_name=None)
+
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    """A throwaway database with two users, the first one signed in"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'clone.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(clone_jobs_module, "SessionLocal", factory)
+    with factory() as db:
+        db.add_all([User(email="user1@example.com"), User(email="user2@example.com")])
+        db.commit()
+
+    signed_in = {"user": principal(1)}
+    app.dependency_overrides[get_current_user] = lambda: signed_in["user"]
+    clone_jobs.clear()
+    yield factory, signed_in
+    app.dependency_overrides.clear()
+    clone_jobs.shutdown(wait=True)
+    clone_jobs.clear()
+
+
+def submit(audio: bytes, voice_name: str = "Mi voz"):
+    return client.post("/api/create_clone", files={"file": ("sample.wav", audio, "audio/wav")},
+                       data={"voice_name": voice_name})
+
+
+def wait_for(job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/clone_jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"clone job {job_id} did not finish")
+
+
+class TestCloneJobs:
+    """Test suite for background voice-clone jobs"""
+
+    def test_job_runs_in_background_and_saves_voice(self, users, vendor_clients):
+        """The upload returns a queued job at once; the worker saves the voice id on the user"""
+        factory, _ = users
+        vendor_clients.fish_audio = FakeFishAudio(latency=0.2)
+
+        started = time.perf_counter()
+        response = submit(make_wav(duration=0.5))
+        assert time.perf_counter() - started < 0.2
+        assert response.status_code == 202
+        assert response.json()["status"] in ("queued", "running")
+
+        job = wait_for(response.json()["job_id"])
+        assert job["status"] == "succeeded"
+        with factory() as db:
+            user = db.get(User, 1)
+            assert user.voice_model_id == job["voice_id"]
+            assert user.voice_name == "Mi voz"
+
+    def test_duplicate_upload_reuses_job(self, users, vendor_clients):
+        """The same sample from the same user is cloned once; another user's upload is separate"""
+        _, signed_in = users
+        fish = FakeFishAudio(latency=0.1)
+        vendor_clients.fish_audio = fish
+        sample = make_wav(duration=0.5)
+
+        first = submit(sample).json()
+        again = submit(sample).json()
+        assert again["job_id"] == first["job_id"]
+        wait_for(first["job_id"])
+
+        signed_in["user"] = principal(2)
+        other = submit(sample).json()
+        assert other["job_id"] != first["job_id"]
+        wait_for(other["job_id"])
+        assert fish.calls == 2
+        assert clone_jobs.stats()["deduplicated"] == 1
+
+    def test_failed_job_reports_error_and_can_retry(self, users, vendor_clients):
+        """A vendor error fails the job with a message, and the same sample can be submitted again"""
+        fish = FakeFishAudio()
+
+        def broken_create(**kwargs):
+            raise RuntimeError("sample too short")
+
+        fish.voices.create = broken_create
+        vendor_clients.fish_audio = fish
+        sample = make_wav(duration=0.5)
+
+        failed = wait_for(submit(sample).json()["job_id"])
+        assert failed["status"] == "failed"
+        assert "sample too short" in failed["error"]
+
+        fish.voices.create = fish.create_voice
+        retried = submit(sample).json()
+        assert retried["job_id"] != failed["job_id"]
+        assert wait_for(retried["job_id"])["status"] == "succeeded"
+
+    def test_jobs_are_private(self, users, vendor_clients):
+        """Another user's job id reads as not found"""
+        _, signed_in = users
+        vendor_clients.fish_audio = FakeFishAudio()
+        job_id = submit(make_wav(duration=0.5)).json()["job_id"]
+        wait_for(job_id)
+
+        signed_in["user"] = principal(2)
+        assert client.get(f"/api/clone_jobs/{job_id}").status_code == 404
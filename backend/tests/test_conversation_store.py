@@ -0,0 +1,149 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from database import Base
+from routers import conversation
+from services import conversation_store as conversation_store_module
+from services.conversation_store import ConversationStore, conversation_store, estimate_tokens
+
+app = FastAPI()
+app.include_router(conversation.router)
+
+client = TestClient(app)
+
+
+class RecordingGenAIClient(FakeGenAIClient):
+    """Remembers every prompt it was given"""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def generate_content(self, *, model, contents, config=None):
+        self.prompts.append(contents)
+        return super().generate_content(model=model, contents=contents, config=config)
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        self.prompts.append(contents)
+        return super().generate_content_stream(model=model, contents=contents, config=config)
+
+
+@pytest.fixture
+def gemini(vendor_clients):
+    fake_gemini = RecordingGenAIClient()
+    vendor_clients.deepgram = FakeDeepgramClient()
+    vendor_clients.gemini = fake_gemini
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=0.2))
+    return fake_gemini
+
+
+def upload():
+    return {"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")}
+
+
+class TestConversationStore:
+    """Test suite for the server-side conversation store"""
+
+    def test_context_stays_within_budget(self):
+        """However long the conversation, the kept turns fit the budget and the rest is summarized"""
+        store = ConversationStore(max_sessions=10, ttl_seconds=60, token_budget=60)
+        calls = []
+
+        async def summarize(summary, turns, language, max_tokens):
+            calls.append(len(turns))
+            return f"{len(calls)} summaries"
+
+        async def scenario():
+            for turn in range(50):
+                conversation = await store.open("s1", "es")
+                await store.compact(conversation, summarize)
+                assert conversation.tokens() <= 60 or len(conversation.turns) <= 2
+                await store.append(conversation, f"Mensaje número {turn} del usuario", "Respuesta del asistente")
+            return conversation
+
+        conversation = asyncio.run(scenario())
+        assert conversation.summary == f"{len(calls)} summaries"
+        # Folding about half the turns at a time needs far fewer calls than turns
+        assert 0 < len(calls) < 25
+        assert all(count % 2 == 0 for count in calls)
+
+    def test_language_budget(self):
+        """A per-language budget overrides the default, and CJK text counts more tokens per character"""
+        store = ConversationStore(max_sessions=10, ttl_seconds=60, token_budget=100, language_budgets={"ja": 300})
+        assert store.budget("ja") == 300
+        assert store.budget("es") == 100
+        assert estimate_tokens("こんにちは", "ja") > estimate_tokens("hola!", "es")
+
+    def test_failed_summary_still_bounds_context(self):
+        """A summarizer error drops the folded turns and keeps the earlier summary"""
+        store = ConversationStore(max_sessions=10, ttl_seconds=60, token_budget=20)
+
+        async def broken(summary, turns, language, max_tokens):
+            raise RuntimeError("vendor down")
+
+        async def scenario():
+            conversation = await store.open("s1", "es")
+            conversation.summary = "antes"
+            for turn in range(6):
+                await store.append(conversation, "x" * 40, "y" * 40)
+            await store.compact(conversation, broken)
+            return conversation
+
+        conversation = asyncio.run(scenario())
+        assert len(conversation.turns) == 2
+        assert conversation.summary == "antes"
+        assert store.stats()["summary_failures"] > 0
+
+    def test_persistent_sessions(self, monkeypatch, tmp_path):
+        """With persistence on, a conversation survives a restart of the store"""
+        Base.metadata.create_all(bind=create_engine(f"sqlite:///{tmp_path / 'conversations.db'}"))
+        factory = async_sessionmaker(
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'conversations.db'}", poolclass=NullPool)
+        )
+        monkeypatch.setattr(conversation_store_module, "AsyncSessionLocal", factory)
+
+        async def scenario():
+            store = ConversationStore(max_sessions=10, ttl_seconds=60, token_budget=100, persist=True)
+            conversation = await store.open("s1", "es")
+            await store.append(conversation, "Me llamo Ana", "¡Hola, Ana!")
+            restarted = ConversationStore(max_sessions=10, ttl_seconds=60, token_budget=100, persist=True)
+            return await restarted.open("s1", "es")
+
+        conversation = asyncio.run(scenario())
+        assert [turn["content"] for turn in conversation.turns] == ["Me llamo Ana", "¡Hola, Ana!"]
+
+    def test_reply_keeps_history_by_session(self, gemini):
+        """/reply issues a session id, and the next turn's prompt has the history without re-sending it"""
+        first = client.post("/api/reply", files=upload(), data={"target_lang": "es", "model_id": "voice"})
+        assert first.status_code == 200
+        session_id = first.json()["session_id"]
+
+        second = client.post("/api/reply", files=upload(),
+                             data={"target_lang": "es", "model_id": "voice", "session_id": session_id})
+        assert second.json()["session_id"] == session_id
+        assert "Assistant: ¡Qué bien!" in gemini.prompts[-1]
+        assert len(conversation_store.get(session_id).turns) == 4
+
+    def test_legacy_history_is_trimmed_to_budget(self, gemini, monkeypatch):
+        """Clients that still send chat_history get its newest turns within the budget, and no session"""
+        monkeypatch.setattr(conversation_store, "token_budget", 20)
+        history = [{"role": "user", "content": f"mensaje {n} " + "x" * 30} for n in range(10)]
+        response = client.post("/api/reply", files=upload(),
+                               data={"target_lang": "es", "model_id": "voice", "chat_history": json.dumps(history)})
+
+        assert "session_id" not in response.json()
+        assert "mensaje 9" in gemini.prompts[-1]
+        assert "mensaje 0" not in gemini.prompts[-1]
@@ -0,0 +1,175 @@
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeFishAudio, FakeGenAIClient, FakeStreamingTranscriber, make_wav
+from routers import conversation_ws
+from services.conversation_store import conversation_store
+from services.stt import StreamingTranscriber, StreamingTranscription
+from services.vendor_clients import get_vendor_clients
+
+app = FastAPI()
+app.include_router(conversation_ws.router)
+
+transcriber = FakeStreamingTranscriber()
+app.dependency_overrides[conversation_ws.get_streaming_transcriber] = lambda: transcriber
+
+client = TestClient(app)
+
+
+class RecordingGenAIClient(FakeGenAIClient):
+    """Remembers every prompt it was given"""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def generate_content(self, *, model, contents, config=None):
+        self.prompts.append(contents)
+        return super().generate_content(model=model, contents=contents, config=config)
+
+
+@pytest.fixture
+def gemini(vendor_clients):
+    fake_gemini = RecordingGenAIClient()
+    vendor_clients.gemini = fake_gemini
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=0.2), chunk_size=2048)
+    conversation_ws.sessions.clear()
+    return fake_gemini
+
+
+def receive_turn(websocket):
+    """Collect server messages up to and including audio_end"""
+    messages, audio = [], b""
+    while True:
+        message = websocket.receive()
+        if message.get("bytes") is not None:
+            audio += message["bytes"]
+            continue
+        messages.append(message["text"])
+        if '"audio_end"' in message["text"]:
+            return messages, audio
+
+
+class TestConversationSocket:
+    """Test suite for the /ws/conversation endpoint"""
+
+    def test_full_turn(self, gemini):
+        """Frames stream in as captions, end of speech triggers reply text and audio"""
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json({"type": "start", "target_lang": "es", "model_id": "voice"})
+            ready = websocket.receive_json()
+            assert ready["type"] == "ready"
+
+            websocket.send_bytes("Hola".encode())
+            assert websocket.receive_json() == {"type": "transcript", "text": "Hola", "is_final": True}
+            websocket.send_bytes("qué tal".encode())
+            assert websocket.receive_json()["text"] == "Hola qué tal"
+
+            websocket.send_json({"type": "end_of_speech"})
+            assert websocket.receive_json() == {"type": "user_message", "text": "Hola qué tal"}
+            assert websocket.receive_json()["type"] == "reply"
+
+            _, audio = receive_turn(websocket)
+            assert audio == get_vendor_clients().fish_audio.audio
+
+            websocket.send_json({"type": "stop"})
+
+    def test_history_is_kept_server_side(self, gemini):
+        """The second turn's prompt contains the first turn without the client re-sending it"""
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json({"type": "start", "target_lang": "es", "model_id": "voice"})
+            session_id = websocket.receive_json()["session_id"]
+
+            for utterance in ("Me llamo Ana", "Vivo en Madrid"):
+                websocket.send_bytes(utterance.encode())
+                websocket.send_bytes(b"")  # the fake treats an empty frame as end of speech
+                receive_turn(websocket)
+            websocket.send_json({"type": "stop"})
+
+        assert "Me llamo Ana" in gemini.prompts[1]
+        assert [m["role"] for m in conversation_store.get(session_id).turns] == [
+            "user", "assistant", "user", "assistant"
+        ]
+
+    def test_start_message_required(self, gemini):
+        """Audio before a start message is rejected"""
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json({"type": "end_of_speech"})
+            error = websocket.receive_json()
+            assert error["type"] == "error"
+            assert error["status_code"] == 400
+
+    def test_invalid_text_frames_get_an_error(self, gemini):
+        """A text frame that isn't JSON is answered with an error, at the start or mid-session"""
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_text("hello?")
+            assert websocket.receive_json()["status_code"] == 400
+            assert websocket.receive()["code"] == 1008
+
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json({"type": "start", "target_lang": "es", "model_id": "voice"})
+            assert websocket.receive_json()["type"] == "ready"
+            websocket.send_text("not json")
+            assert websocket.receive_json() == {
+                "type": "error", "status_code": 400, "detail": "Text frames must be JSON control messages"
+            }
+
+            # The session carries on
+            websocket.send_bytes("Hola".encode())
+            assert websocket.receive_json()["type"] == "transcript"
+            websocket.send_json({"type": "stop"})
+
+    @pytest.mark.parametrize("field, value, detail", [
+        ("session_id", 5, "session_id must be a string"),
+        ("audio_format", ["opus"], "audio_format must be a string"),
+        ("model_id", {"id": "voice"}, "model_id must be a string"),
+        ("bitrate", "32", "bitrate must be an integer"),
+    ])
+    def test_mistyped_start_fields_get_an_error(self, gemini, field, value, detail):
+        """A start field of the wrong type is answered with an error and a clean close"""
+        start = {"type": "start", "target_lang": "es", "model_id": "voice", "audio_format": "opus", field: value}
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json(start)
+            assert websocket.receive_json() == {"type": "error", "status_code": 400, "detail": detail}
+            assert websocket.receive()["code"] == 1008
+        assert not conversation_ws.sessions
+
+    def test_transcriber_failure_gets_an_error(self, gemini, monkeypatch):
+        """If speech-to-text can't be opened the client is told before the socket closes"""
+        class Unreachable(FakeStreamingTranscriber):
+            @asynccontextmanager
+            async def open(self, language):
+                raise ConnectionError("Deepgram is unreachable")
+                yield
+
+        monkeypatch.setitem(app.dependency_overrides, conversation_ws.get_streaming_transcriber, Unreachable)
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.send_json({"type": "start", "target_lang": "es", "model_id": "voice"})
+            assert websocket.receive_json() == {
+                "type": "error",
+                "status_code": 502,
+                "detail": "Speech-to-text could not be started: Deepgram is unreachable"
+            }
+            assert websocket.receive()["code"] == 1011
+
+    def test_transcriber_interface_is_enforced(self):
+        """A transcriber or stream missing part of the interface fails when created, not mid-call"""
+        class NoOpen(StreamingTranscriber):
+            pass
+
+        class SendOnly(StreamingTranscription):
+            async def send(self, frame: bytes) -> None:
+                pass
+
+        with pytest.raises(TypeError):
+            NoOpen()
+        with pytest.raises(TypeError):
+            SendOnly()
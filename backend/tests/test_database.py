@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import _async_url, _enable_sqlite_wal
+
+
+class TestDatabase:
+    """Test suite for the database engine setup"""
+
+    def test_async_url(self):
+        """Sync URLs map onto their asyncio drivers"""
+        assert _async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+        assert _async_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+        assert _async_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+    def test_sqlite_wal(self, tmp_path):
+        """SQLite connections are switched to write-ahead logging"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+        _enable_sqlite_wal(engine)
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        engine.dispose()
@@ -0,0 +1,46 @@
+import statistics
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeVendorError, Latency
+from benchmarks.load_test import parse_mix, percentile
+
+
+class TestFakeVendors:
+    """Test suite for the load-test vendor fakes and harness helpers"""
+
+    def test_latency_distribution_matches_median_and_p99(self):
+        """Samples of "200,800" have a median near 200 ms and a 99th percentile near 800 ms"""
+        latency = Latency.parse("200,800", seed=1)
+        samples = sorted(latency.sample() for _ in range(20000))
+        assert statistics.median(samples) == pytest.approx(0.2, rel=0.05)
+        assert percentile(samples, 0.99) == pytest.approx(0.8, rel=0.1)
+        assert Latency.parse("50").sample() == 0.05
+
+    def test_error_rate(self):
+        """About error_rate of the calls fail, and a failing stream ends early"""
+        deepgram = FakeDeepgramClient(error_rate=0.25, seed=3)
+        for _ in range(2000):
+            try:
+                deepgram.transcribe_file(request=b"")
+            except FakeVendorError:
+                pass
+        assert deepgram.failures / deepgram.calls == pytest.approx(0.25, abs=0.03)
+
+        fish = FakeFishAudio(error_rate=1.0, chunk_size=1024, seed=3)
+        received = []
+        with pytest.raises(FakeVendorError):
+            for chunk in fish.stream(text="hola"):
+                received.append(chunk)
+        assert len(b"".join(received)) < len(fish.audio)
+
+    def test_mix_interleaves_endpoints(self):
+        """Endpoint weights become an interleaved arrival order in those proportions"""
+        order = parse_mix("practice=2,reply=2,clone=1")
+        assert sorted(order) == ["clone", "practice", "practice", "reply", "reply"]
+        assert order[0] != order[1]
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeGenAIClient
+from database import Base
+from routers import practice
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMCache, llm_cache
+
+
+class TestLLMCache:
+    """Test suite for the Gemini correction/reply cache"""
+
+    def test_repeated_sentence_skips_llm(self, vendor_clients):
+        """The same sentence in the same language is only corrected once"""
+        gemini = FakeGenAIClient()
+        vendor_clients.gemini = gemini
+
+        async def scenario():
+            first = await practice.get_correction("Yo es estudiante", "es")
+            second = await practice.get_correction("  Yo es   estudiante ", "es")
+            other_language = await practice.get_correction("Yo es estudiante", "pt")
+            return first, second, other_language
+
+        first, second, _ = asyncio.run(scenario())
+        assert first == second
+        assert gemini.calls == 2
+        assert llm_cache.stats()["memory_hits"] == 1
+
+    def test_prompt_version_invalidates(self):
+        """Entries written under an older prompt version are not returned"""
+        cache = LLMCache(max_entries=10, ttl_seconds=60)
+
+        async def scenario():
+            await cache.put("correction", "es", "hola", "1", {"corrected_text": "Hola"})
+            return await cache.get("correction", "es", "hola", "2")
+
+        assert asyncio.run(scenario()) is None
+
+    def test_ttl_and_lru(self, monkeypatch):
+        """Entries expire after the TTL and the oldest entry is evicted past capacity"""
+        cache = LLMCache(max_entries=2, ttl_seconds=10)
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache_module.time, "time", lambda: now[0])
+
+        async def scenario():
+            for text in ("uno", "dos", "tres"):
+                await cache.put("correction", "es", text, "1", {"corrected_text": text})
+            evicted = await cache.get("correction", "es", "uno", "1")
+            fresh = await cache.get("correction", "es", "tres", "1")
+            now[0] += 11
+            expired = await cache.get("correction", "es", "tres", "1")
+            return evicted, fresh, expired
+
+        evicted, fresh, expired = asyncio.run(scenario())
+        assert evicted is None
+        assert fresh == {"corrected_text": "tres"}
+        assert expired is None
+        assert cache.stats()["expired"] == 1
+
+    def test_persistent_tier(self, monkeypatch, tmp_path):
+        """A new cache instance finds entries written by another through the database"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+        Base.metadata.create_all(bind=engine)
+        monkeypatch.setattr(llm_cache_module, "SessionLocal", sessionmaker(bind=engine))
+
+        async def scenario():
+            await LLMCache(max_entries=10, ttl_seconds=60, persist=True).put(
+                "correction", "es", "hola", "1", {"corrected_text": "Hola."})
+            restarted = LLMCache(max_entries=10, ttl_seconds=60, persist=True)
+            return restarted, await restarted.get("correction", "es", "hola", "1")
+
+        restarted, value = asyncio.run(scenario())
+        assert value == {"corrected_text": "Hola."}
+        assert restarted.stats()["shared_hits"] == 1
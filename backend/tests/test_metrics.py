@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from routers import metrics, practice
+from services.metrics import Histogram, ServerTimingMiddleware, server_timing_header
+
+app = FastAPI()
+app.add_middleware(ServerTimingMiddleware)
+app.include_router(practice.router)
+app.include_router(metrics.router)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def vendors(vendor_clients):
+    vendor_clients.deepgram = FakeDeepgramClient()
+    vendor_clients.gemini = FakeGenAIClient()
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=0.2))
+
+
+class TestMetrics:
+    """Test suite for stage timing, the Server-Timing header and /metrics"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Each bucket counts every observation at or below its bound"""
+        histogram = Histogram("test_seconds", "Test", ("stage",), (0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, stage="stt")
+
+        text = histogram.render()
+        assert 'test_seconds_bucket{stage="stt",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="stt",le="1"} 3' in text
+        assert 'test_seconds_bucket{stage="stt",le="+Inf"} 4' in text
+        assert 'test_seconds_count{stage="stt"} 4' in text
+
+    def test_server_timing_sums_repeated_stages(self):
+        """Per-sentence stages are reported once with their total duration"""
+        header = server_timing_header([("tts", 0.1), ("llm", 0.2), ("tts", 0.3)], total=0.7)
+        assert header == "tts;dur=400.0, llm;dur=200.0, total;dur=700.0"
+
+    def test_practice_reports_every_stage(self, vendors):
+        """A /practice response carries each pipeline stage in Server-Timing"""
+        response = client.post("/api/practice",
+                               files={"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")},
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        assert response.status_code == 200
+        stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+        assert stages == ["upload_read", "preprocess", "stt", "llm", "tts", "base64", "serialize", "total"]
+
+    def test_metrics_endpoint(self, vendors):
+        """/metrics exposes the stage and payload histograms and the cache counters"""
+        client.post("/api/practice",
+                    files={"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")},
+                    data={"target_lang": "es", "model_id": "voice"})
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'voice_pipeline_stage_seconds_count{stage="stt"}' in response.text
+        assert 'voice_pipeline_payload_bytes_count{kind="upload"}' in response.text
+        assert 'cache_lookups_total{cache="tts",result="miss"}' in response.text
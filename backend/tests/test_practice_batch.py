@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from config import settings
+from routers import practice
+
+app = FastAPI()
+app.include_router(practice.router)
+
+client = TestClient(app)
+
+
+def parse_sse(body: str):
+    """Split a text/event-stream body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def uploads(count: int):
+    return [("files", (f"clip{index}.wav", make_wav(duration=0.2), "audio/wav")) for index in range(count)]
+
+
+@pytest.fixture
+def vendors(vendor_clients):
+    vendor_clients.deepgram = FakeDeepgramClient(vary=True)
+    vendor_clients.gemini = FakeGenAIClient()
+    vendor_clients.fish_audio = FakeFishAudio(audio=make_wav(duration=0.5), chunk_size=4096)
+    return vendor_clients
+
+
+class TestPracticeBatch:
+    """Test suite for the /practice/batch endpoint"""
+
+    def test_batch_grades_every_clip_with_one_correction_call(self, vendors):
+        """Every clip is transcribed, corrected by a single Gemini call, and re-voiced"""
+        response = client.post("/api/practice/batch", files=uploads(4),
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        assert response.status_code == 200
+        events = parse_sse(response.text)
+        assert sorted(data["index"] for name, data in events if name == "transcript") == [0, 1, 2, 3]
+        assert sorted(data["index"] for name, data in events if name == "correction") == [0, 1, 2, 3]
+        assert vendors.gemini.calls == 1
+
+        items = [data for name, data in events if name == "item"]
+        assert sorted(item["index"] for item in items) == [0, 1, 2, 3]
+        assert all(item["corrected_text"] == "Yo soy estudiante de español." for item in items)
+        for item in items:
+            chunks = [data for name, data in events if name == "audio" and data["segment"] == item["index"]]
+            audio = b"".join(base64.b64decode(chunk["audio_base64"]) for chunk in chunks)
+            assert audio == vendors.fish_audio.audio
+        assert events[-1] == ("done", {"items": 4, "succeeded": 4, "failed": 0, "audio_format": "wav"})
+
+    def test_bad_clip_fails_alone(self, vendors):
+        """A clip that isn't audio gets an error item; the rest of the set is still graded"""
+        files = uploads(2) + [("files", ("notes.txt", b"not audio" * 200, "text/plain"))]
+        response = client.post("/api/practice/batch", files=files, data={"target_lang": "es", "model_id": "voice"})
+
+        events = parse_sse(response.text)
+        errors = [data for name, data in events if name == "item" and "error" in data]
+        assert [error["index"] for error in errors] == [2]
+        assert errors[0]["error"]["status_code"] == 415
+        assert events[-1][1]["succeeded"] == 2
+        assert events[-1][1]["failed"] == 1
+
+    def test_batch_size_is_limited(self, vendors, monkeypatch):
+        """More clips than PRACTICE_BATCH_MAX_ITEMS are rejected up front"""
+        monkeypatch.setattr(settings, "PRACTICE_BATCH_MAX_ITEMS", 2)
+        response = client.post("/api/practice/batch", files=uploads(3),
+                               data={"target_lang": "es", "model_id": "voice"})
+        assert response.status_code == 400
+        assert vendors.deepgram.calls == 0
+
+    def test_total_batch_size_is_limited(self, vendors, monkeypatch):
+        """A set over PRACTICE_BATCH_MAX_MB in all is rejected up front"""
+        monkeypatch.setattr(settings, "PRACTICE_BATCH_MAX_MB", 0.01)
+        response = client.post("/api/practice/batch", files=uploads(2),
+                               data={"target_lang": "es", "model_id": "voice"})
+        assert response.status_code == 413
+        assert vendors.deepgram.calls == 0
+
+    def test_clips_are_read_as_they_are_transcribed(self, vendors, monkeypatch):
+        """A clip stays in its spool until its turn, so only those being transcribed are in memory"""
+        monkeypatch.setattr(settings, "PRACTICE_BATCH_STT_CONCURRENCY", 1)
+        reads, read_when_transcribed = [], []
+        read_upload, transcribe_audio = practice.read_upload, practice.transcribe_audio
+
+        async def counting_read_upload(file):
+            reads.append(file.filename)
+            return await read_upload(file)
+
+        async def recording_transcribe_audio(audio_data, target_language):
+            read_when_transcribed.append(len(reads))
+            return await transcribe_audio(audio_data, target_language)
+
+        monkeypatch.setattr(practice, "read_upload", counting_read_upload)
+        monkeypatch.setattr(practice, "transcribe_audio", recording_transcribe_audio)
+        response = client.post("/api/practice/batch", files=uploads(3),
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        assert parse_sse(response.text)[-1][1]["succeeded"] == 3
+        assert read_when_transcribed == [1, 2, 3]
+
+    def test_corrections_reuse_the_cache(self, vendors):
+        """Cached sentences aren't sent again, and duplicates are corrected once"""
+        async def scenario():
+            await practice.get_correction(text="Hola amigo", language="es")
+            return await practice.get_corrections(["Hola amigo", "Yo es", "Tu es", "Yo es"], "es")
+
+        corrections = asyncio.run(scenario())
+        assert set(corrections) == {"Hola amigo", "Yo es", "Tu es"}
+        assert vendors.gemini.calls == 2
+
+        again = asyncio.run(practice.get_corrections(["Yo es", "Tu es"], "es"))
+        assert again == {text: corrections[text] for text in ("Yo es", "Tu es")}
+        assert vendors.gemini.calls == 2
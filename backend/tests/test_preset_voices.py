@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from routers import practice
+from utils.preset_voices import PresetVoiceRegistry
+
+app = FastAPI()
+app.include_router(practice.router)
+
+client = TestClient(app)
+
+
+def write_presets(path: Path, presets: dict, mtime: int):
+    path.write_text(json.dumps({"preset_voices": presets}))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    path = tmp_path / "preset_voices.json"
+    write_presets(path, {"adam": {"id": "id-adam", "name": "Adam"}}, mtime=1_000_000)
+    registry = PresetVoiceRegistry(path, check_interval=0)
+    registry.load()
+    monkeypatch.setattr(practice, "preset_voice_registry", registry)
+    return registry
+
+
+class TestPresetVoiceRegistry:
+    """Test suite for the in-memory preset voice registry"""
+
+    def test_indexes(self, registry):
+        """Voices are found by key and by Fish Audio id"""
+        assert registry.get("adam")["id"] == "id-adam"
+        assert registry.get_by_id("id-adam")["name"] == "Adam"
+        assert registry.get_by_id("unknown") is None
+
+    def test_reload_on_mtime_change(self, registry):
+        """Editing the file is picked up without a restart"""
+        write_presets(registry.path, {"bro": {"id": "id-bro", "name": "Bro"}}, mtime=1_000_100)
+        assert registry.get("adam") is None
+        assert registry.get_by_id("id-bro")["name"] == "Bro"
+
+    def test_broken_file_keeps_last_good_copy(self, registry):
+        """A half-written file does not wipe the voices"""
+        registry.path.write_text('{"preset_voices": {')
+        os.utime(registry.path, (1_000_200, 1_000_200))
+        assert registry.get("adam")["id"] == "id-adam"
+
+    def test_etag_and_not_modified(self, registry):
+        """The endpoint returns an ETag and answers a matching If-None-Match with 304"""
+        response = client.get("/api/preset-voices")
+        assert response.status_code == 200
+        assert response.json()["preset_voices"] == [
+            {"key": "adam", "id": "id-adam", "name": "Adam", "description": ""}
+        ]
+        etag = response.headers["etag"]
+
+        cached = client.get("/api/preset-voices", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        write_presets(registry.path, {"bro": {"id": "id-bro", "name": "Bro"}}, mtime=1_000_300)
+        changed = client.get("/api/preset-voices", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeFishAudio
+from routers import practice
+from schemas.tts import TTSRequest
+from services import prewarm
+from services.admission import admission_pools
+from services.prewarm import MAX_CONSECUTIVE_FAILURES, PhraseCounter, PrewarmJob, observed_phrases
+from utils.preset_voices import PRESET_VOICES_PATH, PresetVoiceRegistry
+
+PHRASES = {"es": ["Hola, ¿cómo estás?", "Muchas gracias."], "fr": ["Merci beaucoup."]}
+VOICES = {"adam": {"id": "voice-adam", "name": "Adam"}, "kane": {"id": "voice-kane", "name": "Kane"}}
+
+
+@pytest.fixture
+def make_job(tmp_path, monkeypatch):
+    """A warm-up job over PHRASES and two preset voices"""
+    phrases_path = tmp_path / "prewarm_phrases.json"
+    phrases_path.write_text(json.dumps(PHRASES), encoding="utf-8")
+    voices_path = tmp_path / "preset_voices.json"
+    voices_path.write_text(json.dumps({"preset_voices": VOICES}))
+    monkeypatch.setattr(prewarm, "preset_voice_registry", PresetVoiceRegistry(voices_path))
+    monkeypatch.setattr(prewarm, "IDLE_POLL_SECONDS", 0.01)
+
+    def make(**options):
+        settings = dict(enabled=True, phrases_path=phrases_path, languages=[], voices=[], formats=["wav"],
+                        delay_seconds=0, interval_seconds=0, concurrency=1, observed_top=10, observed_min_count=2)
+        settings.update(options)
+        return PrewarmJob(**settings)
+
+    return make
+
+
+class TestPrewarm:
+    """Test suite for the background TTS cache warm-up"""
+
+    def test_run_caches_every_phrase_for_every_voice(self, make_job, vendor_clients):
+        """A run synthesizes phrases x voices once; the next run finds them all cached"""
+        fish = FakeFishAudio()
+        vendor_clients.fish_audio = fish
+        job = make_job()
+
+        first = asyncio.run(job.run_once())
+        assert first["total"] == 6
+        assert first["synthesized"] == 6
+        assert first["coverage"] == 1.0
+        assert first["coverage_by_voice"] == {"adam": 1.0, "kane": 1.0}
+        assert fish.calls == 6
+
+        second = asyncio.run(job.run_once())
+        assert second["cached_before"] == 6
+        assert second["synthesized"] == 0
+        assert fish.calls == 6
+        assert job.synthesized_total == 6
+
+        # A live request for a warmed phrase is a cache hit
+        request = TTSRequest(transcript="Muchas gracias.", model_id="voice-kane")
+        assert asyncio.run(practice.generate_speech(request)) == fish.audio
+        assert fish.calls == 6
+
+    def test_languages_and_voices_filter(self, make_job, vendor_clients):
+        """Only the configured languages and preset voices are planned"""
+        job = make_job(languages=["fr"], voices=["kane"], formats=["wav", "mp3"])
+        plan = job.plan()
+        assert [(item.transcript, item.model_id, item.audio_format) for item in plan] == [
+            ("Merci beaucoup.", "voice-kane", "wav"),
+            ("Merci beaucoup.", "voice-kane", "mp3"),
+        ]
+
+    def test_observed_phrases_are_warmed_first(self, make_job, vendor_clients):
+        """Phrases live requests asked for often enough lead the plan; the job's own calls aren't counted"""
+        vendor_clients.fish_audio = FakeFishAudio()
+
+        async def scenario():
+            for _ in range(3):
+                await practice.generate_speech(TTSRequest(transcript="¡Muy  bien!", model_id="someone"))
+            await practice.generate_speech(TTSRequest(transcript="Una vez", model_id="someone"))
+            return await make_job().run_once()
+
+        status = asyncio.run(scenario())
+        assert status["total"] == 8
+        assert observed_phrases.top(10) == ["¡Muy bien!", "Una vez"]
+        assert make_job().plan()[0].transcript == "¡Muy bien!"
+
+    def test_phrase_counter_is_bounded(self):
+        """Past max_entries the counts are halved, so one-off phrases drop out and frequent ones stay"""
+        counter = PhraseCounter(max_entries=3, max_chars=20)
+        for _ in range(4):
+            counter.observe("Hola")
+        counter.observe("uno")
+        counter.observe("dos")
+        counter.observe("tres")
+        counter.observe("A sentence far too long to be a common phrase")
+        assert counter.top(10) == ["Hola", "tres"]
+        assert len(counter) == 2
+
+    def test_waits_for_live_traffic(self, make_job, vendor_clients):
+        """Nothing is synthesized while a voice request holds an admission slot"""
+        fish = FakeFishAudio()
+        vendor_clients.fish_audio = fish
+        job = make_job()
+        pool = admission_pools["practice"]
+
+        async def scenario():
+            pool.active += 1
+            try:
+                run = asyncio.create_task(job.run_once())
+                await asyncio.sleep(0.1)
+                assert job.state == prewarm.WAITING
+                assert fish.calls == 0
+            finally:
+                pool.active -= 1
+            return await run
+
+        assert asyncio.run(scenario())["synthesized"] == 6
+
+    def test_stops_after_repeated_failures(self, make_job, vendor_clients):
+        """A vendor that keeps failing ends the run early with the error reported"""
+        vendor_clients.fish_audio = FakeFishAudio(error_rate=1.0)
+        job = make_job(phrases_path=Path(__file__).parent.parent / "prewarm_phrases.json")
+
+        status = asyncio.run(job.run_once())
+        assert status["state"] == prewarm.FAILED
+        assert status["failed"] == MAX_CONSECUTIVE_FAILURES
+        assert status["coverage"] == 0.0
+        # By then the vendor's circuit breaker has opened and calls fail fast
+        assert "Fish Audio is unavailable" in status["last_error"]
+
+    def test_shipped_presets_are_planned(self, vendor_clients):
+        """The preset voices file that ships with the frontend is found, and every voice is warmed"""
+        shipped_path = Path(__file__).parent.parent.parent / "frontend" / "preset_voices.json"
+        shipped = json.loads(shipped_path.read_text(encoding="utf-8"))["preset_voices"]
+        assert PRESET_VOICES_PATH.resolve() == shipped_path.resolve()
+        prewarm.preset_voice_registry.load()
+        assert set(prewarm.preset_voice_registry.voices()) == set(shipped)
+
+        job = PrewarmJob(enabled=True, phrases_path=Path(__file__).parent.parent / "prewarm_phrases.json",
+                         languages=["es"], voices=[], formats=["wav"], delay_seconds=0, interval_seconds=0,
+                         concurrency=1, observed_top=0, observed_min_count=1)
+        assert {item.model_id for item in job.plan()} == {voice["id"] for voice in shipped.values()}
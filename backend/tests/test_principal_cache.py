@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auth
+from auth import create_access_token
+from database import Base
+from models.user import User
+from routers import auth as auth_router
+from services.principal_cache import principal_cache
+
+app = FastAPI()
+app.include_router(auth_router.router)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """A throwaway database; returns the list of sessions opened against it"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    # TestClient runs each request on its own event loop, so don't pool connections
+    async_factory = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}", poolclass=NullPool)
+    )
+    opened = []
+
+    def counting_session():
+        opened.append(1)
+        return async_factory()
+
+    monkeypatch.setattr(auth, "AsyncSessionLocal", counting_session)
+    with factory() as db:
+        db.add(User(email="ana@example.com", name="Ana", google_id="g-1"))
+        db.commit()
+    return factory, opened
+
+
+def auth_header(user_id: int = 1):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+class TestPrincipalCache:
+    """Test suite for the authenticated principal cache"""
+
+    def test_repeat_requests_skip_database(self, sessions):
+        """Only the first /auth/me for a user touches the database"""
+        _, opened = sessions
+        headers = auth_header()
+
+        for _ in range(3):
+            response = client.get("/auth/me", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["email"] == "ana@example.com"
+
+        assert len(opened) == 1
+        assert principal_cache.stats()["hits"] == 2
+
+    def test_invalidate_reloads_user(self, sessions):
+        """After invalidation a deactivated user is refused"""
+        factory, opened = sessions
+        headers = auth_header()
+        assert client.get("/auth/me", headers=headers).status_code == 200
+
+        with factory() as db:
+            db.query(User).filter(User.id == 1).update({"is_active": False})
+            db.commit()
+        principal_cache.invalidate(1)
+
+        assert client.get("/auth/me", headers=headers).status_code == 403
+        assert len(opened) == 2
+
+    def test_invalid_tokens(self, sessions):
+        """Bad signatures and unknown users are still a 401"""
+        assert client.get("/auth/me", headers={"Authorization": "Bearer nope"}).status_code == 401
+        assert client.get("/auth/me", headers=auth_header(user_id=99)).status_code == 401
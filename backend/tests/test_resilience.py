@@ -0,0 +1,227 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services import resilience
+from services.resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    DeadlineBudget,
+    VendorTimeout,
+    call_stats,
+    call_vendor,
+    request_deadline,
+    stream_vendor,
+)
+from services.vendor_pool import DEEPGRAM, FISH_AUDIO, GEMINI, shutdown_vendor_pools
+
+
+@pytest.fixture(autouse=True)
+def reset_pools():
+    yield
+    shutdown_vendor_pools(wait=False)
+
+
+class VendorError(Exception):
+    """A vendor SDK error carrying the HTTP status of the response"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Flaky:
+    """A blocking vendor call whose Nth invocation sleeps or fails (with a 503) as scripted"""
+
+    def __init__(self, delays=(), failures=()):
+        self.delays = dict(delays)
+        self.failures = set(failures)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value="ok"):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delays.get(call, 0.0))
+        if call in self.failures:
+            raise VendorError(503, f"call {call} failed")
+        return f"{value} from call {call}"
+
+
+class TestResilience:
+    """Test suite for vendor call deadlines, hedging, retries and circuit breakers"""
+
+    def test_budget_split_by_stage_weight(self):
+        """Each stage gets its weighted share of what is left; later calls of a stage share its window"""
+        budget = DeadlineBudget(4.0, {"stt": 1, "llm": 1, "tts": 2})
+        assert budget.timeout_for("stt") == pytest.approx(1.0, abs=0.01)
+        time.sleep(0.2)
+        assert budget.timeout_for("stt") == pytest.approx(0.8, abs=0.05)
+        assert budget.timeout_for("llm") == pytest.approx(3.8 / 3, abs=0.05)
+        assert budget.timeout_for("tts") == pytest.approx(3.8, abs=0.05)
+        assert budget.timeout_for("tts") == pytest.approx(3.8, abs=0.05)
+
+    def test_deadline_bounds_a_hanging_call(self):
+        """A call past its stage's share of the budget fails with a 504 instead of waiting"""
+        hanging = Flaky(delays={1: 1.0})
+
+        async def scenario():
+            with request_deadline(0.4, {"stt": 1}):
+                return await call_vendor(DEEPGRAM, "stt", hanging, idempotent=False)
+
+        started = time.perf_counter()
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(scenario())
+        assert error.value.status_code == 504
+        assert time.perf_counter() - started < 0.9
+        assert call_stats[DEEPGRAM].timeouts == 1
+
+    def test_slow_call_is_hedged(self):
+        """Past the recent p95 an idempotent call gets a duplicate, and the faster answer wins"""
+        vendor = Flaky(delays={21: 1.0})
+
+        async def scenario():
+            for _ in range(20):
+                await call_vendor(GEMINI, "llm", vendor)
+            return await call_vendor(GEMINI, "llm", vendor)
+
+        started = time.perf_counter()
+        assert asyncio.run(scenario()) == "ok from call 22"
+        assert time.perf_counter() - started < 0.9
+        assert call_stats[GEMINI].hedges == 1
+        assert call_stats[GEMINI].hedge_wins == 1
+
+    def test_unhedged_call_waits(self):
+        """hedge=False keeps a slow call from being duplicated, or from moving the hedge delay"""
+        vendor = Flaky(delays={21: 0.3})
+
+        async def scenario():
+            for _ in range(20):
+                await call_vendor(GEMINI, "llm", vendor)
+            await call_vendor(GEMINI, "llm", vendor, hedge=False)
+
+        asyncio.run(scenario())
+        assert vendor.calls == 21
+        assert call_stats[GEMINI].hedges == 0
+        assert resilience._latencies[(GEMINI, "llm")].percentile(0.95) < 0.1
+
+    def test_failed_call_is_retried(self):
+        """An idempotent call that fails is retried once; other calls are not"""
+        vendor = Flaky(failures={1, 3})
+
+        assert asyncio.run(call_vendor(FISH_AUDIO, "tts", vendor)) == "ok from call 2"
+        assert call_stats[FISH_AUDIO].retries == 1
+        with pytest.raises(VendorError):
+            asyncio.run(call_vendor(FISH_AUDIO, "tts", vendor, idempotent=False))
+        assert vendor.calls == 3
+
+    def test_breaker_fails_fast_then_recovers(self, monkeypatch):
+        """After repeated failures calls are rejected with a 503; one good trial closes the breaker"""
+        breaker = CircuitBreaker(FISH_AUDIO, failure_threshold=2, reset_seconds=0.2)
+        monkeypatch.setitem(resilience.breakers, FISH_AUDIO, breaker)
+        vendor = Flaky(failures={1, 2})
+
+        with pytest.raises(VendorError):
+            asyncio.run(call_vendor(FISH_AUDIO, "tts", vendor))
+        assert breaker.state == OPEN
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(call_vendor(FISH_AUDIO, "tts", vendor))
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+        assert vendor.calls == 2
+        assert call_stats[FISH_AUDIO].rejected == 1
+
+        time.sleep(0.25)
+        assert asyncio.run(call_vendor(FISH_AUDIO, "tts", vendor)) == "ok from call 3"
+        assert breaker.state == CLOSED
+
+    def test_client_errors_pass_through(self, monkeypatch):
+        """A request the vendor turns down is neither retried nor counted against the vendor"""
+        breaker = CircuitBreaker(FISH_AUDIO, failure_threshold=2, reset_seconds=30)
+        monkeypatch.setitem(resilience.breakers, FISH_AUDIO, breaker)
+        calls = []
+
+        def unknown_voice():
+            calls.append("unknown_voice")
+            raise VendorError(404, "reference_id not found")
+
+        def rejected_here():
+            calls.append("rejected_here")
+            raise HTTPException(status_code=500, detail="Unexpected audio format from Fish Audio")
+
+        def open_unknown_voice():
+            calls.append("stream")
+            raise VendorError(400, "reference_id not found")
+
+        async def collect():
+            return [chunk async for chunk in stream_vendor(FISH_AUDIO, "tts", open_unknown_voice)]
+
+        for _ in range(3):
+            with pytest.raises(VendorError):
+                asyncio.run(call_vendor(FISH_AUDIO, "tts", unknown_voice))
+            with pytest.raises(HTTPException):
+                asyncio.run(call_vendor(FISH_AUDIO, "tts", rejected_here))
+            with pytest.raises(VendorError):
+                asyncio.run(collect())
+        assert calls == ["unknown_voice", "rejected_here", "stream"] * 3
+        assert breaker.state == CLOSED
+        assert call_stats[FISH_AUDIO].failures == 0
+        assert asyncio.run(call_vendor(FISH_AUDIO, "tts", Flaky())) == "ok from call 1"
+
+        # Throttling is the vendor's doing, though
+        def rate_limited():
+            raise VendorError(429, "too many requests")
+
+        for _ in range(2):
+            with pytest.raises(VendorError):
+                asyncio.run(call_vendor(FISH_AUDIO, "tts", rate_limited, idempotent=False))
+        assert breaker.state == OPEN
+
+    def test_stream_deadline_covers_the_first_item(self):
+        """A stream that doesn't start within the stage's budget fails with a 504"""
+        def open_stream(delay):
+            time.sleep(delay)
+            return iter([b"a", b"b"])
+
+        async def collect(delay):
+            with request_deadline(0.3, {"tts": 1}):
+                return [chunk async for chunk in stream_vendor(FISH_AUDIO, "tts", open_stream, delay)]
+
+        assert asyncio.run(collect(0)) == [b"a", b"b"]
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(collect(1.0))
+        assert error.value.status_code == 504
+
+    def test_slow_generator_stream_times_out_cleanly(self):
+        """A generator whose first item misses the deadline gives a counted 504 and is closed once it returns"""
+        closed = threading.Event()
+
+        def open_stream():
+            try:
+                time.sleep(0.5)
+                yield b"a"
+                yield b"b"
+            finally:
+                closed.set()
+
+        async def collect():
+            with request_deadline(0.2, {"llm": 1}):
+                return [chunk async for chunk in stream_vendor(GEMINI, "llm", open_stream)]
+
+        with pytest.raises(VendorTimeout) as error:
+            asyncio.run(collect())
+        assert error.value.status_code == 504
+        assert call_stats[GEMINI].timeouts == 1
+        assert call_stats[GEMINI].failures == 0
+        assert closed.wait(1.0)
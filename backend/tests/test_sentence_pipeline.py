@@ -0,0 +1,106 @@
+import asyncio
+import io
+import sys
+import time
+import wave
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import make_wav
+from services.audio import concat_wav
+from services.sentence_pipeline import SentenceSplitter, synthesize_sentences
+
+
+async def stream_of(*deltas, delay=0.0):
+    for delta in deltas:
+        await asyncio.sleep(delay)
+        yield delta
+
+
+class TestSentenceSplitter:
+    """Test suite for incremental sentence splitting"""
+
+    def test_waits_for_whitespace_after_terminator(self):
+        """A sentence is only emitted once the text after its terminator has started"""
+        splitter = SentenceSplitter(min_chars=5)
+        assert splitter.feed("Me gusta mucho.") == []
+        assert splitter.feed(" ¿Y a ti") == ["Me gusta mucho."]
+        assert splitter.flush() == "¿Y a ti"
+
+    def test_merges_short_sentences(self):
+        """Fragments shorter than min_chars ride along with the next sentence"""
+        splitter = SentenceSplitter(min_chars=20)
+        assert splitter.feed("¡Hola! ¿Qué tal estás hoy, amigo? Bien. ") == ["¡Hola! ¿Qué tal estás hoy, amigo?"]
+        assert splitter.flush() == "Bien."
+
+    def test_decimal_numbers_are_not_boundaries(self):
+        """A period inside a number is not a sentence end"""
+        splitter = SentenceSplitter(min_chars=5)
+        assert splitter.feed("Cuesta 3.50 euros. Vale") == ["Cuesta 3.50 euros."]
+
+
+class TestSynthesizeSentences:
+    """Test suite for the overlapped LLM + TTS pipeline"""
+
+    def test_audio_in_order_with_overlap(self):
+        """Segments come back in sentence order even when later ones finish first"""
+        started = []
+
+        async def synthesize(sentence):
+            started.append(sentence)
+            # The first sentence is the slowest to synthesize
+            await asyncio.sleep(0.2 if sentence.startswith("Primera") else 0.01)
+            return sentence.encode()
+
+        async def scenario():
+            begin = time.perf_counter()
+            results = [pair async for pair in synthesize_sentences(
+                stream_of("Primera frase larga. ", "Segunda frase larga. ", "Tercera frase larga.", delay=0.05),
+                synthesize, min_chars=5)]
+            return results, time.perf_counter() - begin
+
+        results, elapsed = asyncio.run(scenario())
+        assert [sentence for sentence, _ in results] == [
+            "Primera frase larga.", "Segunda frase larga.", "Tercera frase larga."
+        ]
+        assert all(audio == sentence.encode() for sentence, audio in results)
+        # Sequential would be 3 * 0.05 of generation plus 0.22 of synthesis
+        assert elapsed < 0.33
+
+    def test_text_stream_error_propagates(self):
+        """A failure in the LLM stream reaches the consumer"""
+        async def broken_stream():
+            yield "Una frase completa aquí. "
+            raise RuntimeError("stream broke")
+
+        async def synthesize(sentence):
+            return b"audio"
+
+        async def scenario():
+            return [pair async for pair in synthesize_sentences(broken_stream(), synthesize, min_chars=5)]
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(scenario())
+
+
+class TestConcatWav:
+    """Test suite for joining per-sentence WAV segments"""
+
+    def test_joined_wav_is_valid(self):
+        """The joined file has one header and the combined duration"""
+        joined = concat_wav([make_wav(duration=0.25), make_wav(duration=0.5)])
+        with wave.open(io.BytesIO(joined)) as wav:
+            assert wav.getnframes() == int(0.75 * 16000)
+
+    def test_streamed_placeholder_sizes(self):
+        """Segments whose headers carry placeholder sizes are still joined"""
+        segment = bytearray(make_wav(duration=0.25))
+        segment[4:8] = b"\xff\xff\xff\xff"
+        segment[40:44] = b"\xff\xff\xff\xff"
+        joined = concat_wav([bytes(segment), bytes(segment)])
+        with wave.open(io.BytesIO(joined)) as wav:
+            assert wav.getnframes() == int(0.5 * 16000)
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeFishAudio, FakeVendorError, FakeGenAIClient, make_wav
+from routers import practice
+from schemas.tts import TTSRequest
+from services.single_flight import SingleFlight, speech_flights
+
+CONCURRENT_REQUESTS = 20
+
+
+class TestSingleFlight:
+    """Test suite for coalescing identical in-flight vendor calls"""
+
+    def test_identical_speech_requests_share_one_call(self, vendor_clients):
+        """N concurrent identical TTS requests make one Fish Audio call and all get its audio"""
+        fish = FakeFishAudio(latency=0.1, audio=make_wav(duration=0.2))
+        vendor_clients.fish_audio = fish
+        request = TTSRequest(transcript="Buenos días", model_id="voice")
+
+        async def scenario():
+            return await asyncio.gather(*[
+                practice.generate_speech(request=request) for _ in range(CONCURRENT_REQUESTS)
+            ])
+
+        results = asyncio.run(scenario())
+        assert fish.calls == 1
+        assert all(audio == fish.audio for audio in results)
+        assert speech_flights.stats() == {"calls": 1, "coalesced": CONCURRENT_REQUESTS - 1, "in_flight": 0}
+
+    def test_identical_corrections_share_one_call(self, vendor_clients):
+        """N concurrent identical corrections make one Gemini call"""
+        gemini = FakeGenAIClient(latency=0.1)
+        vendor_clients.gemini = gemini
+
+        async def scenario():
+            return await asyncio.gather(*[
+                practice.get_correction("Yo es estudiante", "es") for _ in range(CONCURRENT_REQUESTS)
+            ] + [practice.get_correction("Yo es estudiante", "pt")])
+
+        results = asyncio.run(scenario())
+        assert gemini.calls == 2
+        assert all(result == {"corrected_text": gemini.corrected_text} for result in results)
+        assert len({id(result) for result in results}) == len(results)
+
+    def test_failure_reaches_every_waiter(self, vendor_clients):
+        """An upstream error is raised to every request that shared the call"""
+        fish = FakeFishAudio(latency=0.05)
+
+        def broken_convert(**kwargs):
+            fish.calls += 1
+            raise FakeVendorError("vendor down")
+
+        fish.tts.convert = broken_convert
+        vendor_clients.fish_audio = fish
+        request = TTSRequest(transcript="Buenas noches", model_id="voice")
+
+        async def scenario():
+            return await asyncio.gather(*[
+                practice.generate_speech(request=request) for _ in range(5)
+            ], return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        # One shared call, plus its one retry
+        assert fish.calls == 2
+        assert all(isinstance(result, HTTPException) and result.status_code == 500 for result in results)
+        assert all("vendor down" in result.detail for result in results)
+
+    def test_cancelled_waiter_does_not_cancel_the_call(self):
+        """The first caller giving up leaves the call running for the others"""
+        flights = SingleFlight("test")
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def scenario():
+            first = asyncio.ensure_future(flights.run("key", call))
+            second = asyncio.ensure_future(flights.run("key", call))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(scenario()) == "done"
+        assert len(calls) == 1
+        assert flights.in_flight() == 0
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DEFAULT_SECRET_KEY, Settings
+
+BACKEND = Path(__file__).parent.parent
+
+IMPORT_CHECK = """
+import sys
+import main
+print(",".join(name for name in ("deepgram", "google.genai", "fishaudio", "authlib", "numpy") if name in sys.modules))
+"""
+
+
+class TestStartup:
+    """Test suite for a lazy, side-effect-free app import"""
+
+    def test_import_loads_no_vendor_sdk_and_prints_nothing(self, tmp_path):
+        """`import main` in a fresh interpreter loads no SDK, prints nothing and creates no database"""
+        database = tmp_path / "startup.db"
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+        result = subprocess.run([sys.executable, "-c", IMPORT_CHECK], cwd=BACKEND, env=env,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == ""
+        assert not database.exists()
+
+    def test_validate_reports_missing_keys(self):
+        """validate() names each missing vendor key and the development secret, never a key value"""
+        settings = Settings()
+        settings.DEEPGRAM_API_KEY = ""
+        settings.GOOGLE_API_KEY = "secret-google-key"
+        settings.SECRET_KEY = DEFAULT_SECRET_KEY
+        problems = settings.validate()
+        assert "DEEPGRAM_API_KEY is empty or not set" in problems
+        assert not any("GOOGLE_API_KEY" in problem for problem in problems)
+        assert any("SECRET_KEY" in problem for problem in problems)
+        assert not any("secret-google-key" in problem for problem in problems)
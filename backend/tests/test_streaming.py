@@ -0,0 +1,121 @@
+import base64
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeDeepgramClient, FakeFishAudio, FakeGenAIClient, make_wav
+from routers import conversation, practice
+from services.resilience import DeadlineMiddleware, call_stats
+from services.vendor_pool import GEMINI
+
+app = FastAPI()
+app.include_router(practice.router)
+app.include_router(conversation.router)
+
+client = TestClient(app)
+
+# /reply with a budget that leaves Gemini about 0.4 s for its first token
+deadline_client = TestClient(DeadlineMiddleware(app, routes={"/api/reply": 1.2, "/api/reply/stream": 1.2}))
+
+
+def parse_sse(body: str):
+    """Split a text/event-stream body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def fish(vendor_clients):
+    fake_fish = FakeFishAudio(audio=make_wav(duration=0.5), chunk_size=4096)
+    vendor_clients.deepgram = FakeDeepgramClient()
+    vendor_clients.gemini = FakeGenAIClient()
+    vendor_clients.fish_audio = fake_fish
+    return fake_fish
+
+
+def upload():
+    return {"file": ("audio.wav", make_wav(duration=0.2), "audio/wav")}
+
+
+class TestStreamingEndpoints:
+    """Test suite for the server-sent events variants of /practice and /reply"""
+
+    def test_practice_stream_event_order(self, fish):
+        """Transcript and correction arrive before audio, audio chunks reassemble to the full file"""
+        response = client.post("/api/practice/stream", files=upload(),
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_sse(response.text)
+        names = [name for name, _ in events]
+        assert names[:2] == ["transcript", "correction"]
+        assert names[-1] == "done"
+        assert set(names[2:-1]) == {"audio"}
+
+        chunks = [data for name, data in events if name == "audio"]
+        assert [c["seq"] for c in chunks] == list(range(len(chunks)))
+        assert len(chunks) > 1
+        audio = b"".join(base64.b64decode(c["audio_base64"]) for c in chunks)
+        assert audio == fish.audio
+        assert events[-1][1]["chunks"] == len(chunks)
+
+    def test_reply_stream(self, fish):
+        """The reply stream sends the user message, then each sentence ahead of its audio"""
+        history = json.dumps([{"role": "user", "content": "Hola"}])
+        response = client.post("/api/reply/stream", files=upload(),
+                               data={"target_lang": "es", "model_id": "voice", "chat_history": history})
+
+        events = parse_sse(response.text)
+        assert events[0] == ("transcript", {"user_message": "Yo es estudiante de español."})
+        assert events[1] == ("reply_sentence", {"segment": 0, "text": "¡Qué bien! ¿Cuánto tiempo llevas estudiando?"})
+        assert events[2][0] == "audio" and events[2][1]["segment"] == 0
+        assert events[-2] == ("reply", {"reply_text": "¡Qué bien! ¿Cuánto tiempo llevas estudiando?"})
+        assert events[-1][0] == "done" and events[-1][1]["segments"] == 1
+
+    def test_vendor_error_is_sent_in_band(self, fish, monkeypatch):
+        """A TTS failure after the stream has started becomes an error event"""
+        def broken_stream(**kwargs):
+            raise RuntimeError("fish is down")
+        monkeypatch.setattr(fish.tts, "stream", broken_stream)
+
+        response = client.post("/api/practice/stream", files=upload(),
+                               data={"target_lang": "es", "model_id": "voice"})
+
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["transcript", "correction", "error"]
+        assert events[-1][1]["status_code"] == 500
+
+    def test_late_first_token_is_a_timeout(self, fish, vendor_clients):
+        """A reply whose first token misses the deadline is a 504 from Gemini, not an internal error"""
+        vendor_clients.gemini = FakeGenAIClient(latency=1.0)
+        data = {"target_lang": "es", "model_id": "voice"}
+
+        response = deadline_client.post("/api/reply", files=upload(), data=data)
+        assert response.status_code == 504
+        assert response.json()["detail"].startswith("Gemini did not respond")
+
+        events = parse_sse(deadline_client.post("/api/reply/stream", files=upload(), data=data).text)
+        assert [name for name, _ in events] == ["transcript", "error"]
+        assert events[-1][1]["status_code"] == 504
+        assert call_stats[GEMINI].timeouts == 2
+        assert call_stats[GEMINI].failures == 0
+        assert fish.calls == 0
+
+    def test_small_upload_rejected_before_streaming(self, fish):
+        """Uploads that are too small are still a plain 400"""
+        response = client.post("/api/practice/stream",
+                               files={"file": ("audio.wav", b"tiny", "audio/wav")},
+                               data={"target_lang": "es", "model_id": "voice"})
+        assert response.status_code == 400
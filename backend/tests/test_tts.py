@@ -1,206 +1,121 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from fastapi.testclient import TestClient
-from fastapi import FastAPI
-import os
+from unittest.mock import MagicMock
+from fastapi import HTTPException
+from pydantic import ValidationError
 
-# Import the router and app
 import sys
 from pathlib import Path
 
 # Add parent directory to path to import modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from routers.practice import router
+from benchmarks.fake_vendors import FakeFishAudio, FakeVendorError
+from routers.practice import generate_speech
 from schemas.tts import TTSRequest
 
-# Create test app
-app = FastAPI()
-app.include_router(router)
 
-client = TestClient(app)
+def speak(**fields) -> bytes:
+    return asyncio.run(generate_speech(TTSRequest(**fields)))
 
 
-class TestTTSEndpoint:
-    """Test suite for the /api/tts endpoint"""
+class TestTTS:
+    """Test suite for speech synthesis (generate_speech, used by /api/practice and /api/reply)"""
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key_123"})
-    @patch('routers.practice.FishAudio')
-    def test_tts_success_with_bytes(self, mock_fish_audio_class):
+    def test_tts_success_with_bytes(self, vendor_clients):
         """Test successful TTS generation when SDK returns bytes"""
         # Mock the Fish Audio SDK
         mock_client = MagicMock()
-        mock_fish_audio_class.return_value = mock_client
-        
-        # Mock audio response as bytes
-        mock_audio = b"fake_audio_data_mp3_content"
+        mock_audio = b"fake_audio_data_wav_content"
         mock_client.tts.convert.return_value = mock_audio
+        vendor_clients.fish_audio = mock_client
         
-        # Make request
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Hello, this is a test",
-                "model_id": "test_model_id_123"
-            }
-        )
-        
-        # Assertions
-        assert response.status_code == 200
-        assert response.headers["content-type"] == "audio/mpeg"
-        assert response.headers["content-disposition"] == "attachment; filename=speech.mp3"
-        assert response.content == mock_audio
+        audio = speak(transcript="Hello, this is a test", model_id="test_model_id_123")
         
+        assert audio == mock_audio
         # Verify SDK was called correctly
-        mock_fish_audio_class.assert_called_once_with(api_key="test_api_key_123")
         mock_client.tts.convert.assert_called_once_with(
             text="Hello, this is a test",
-            reference_id="test_model_id_123"
+            reference_id="test_model_id_123",
+            format="wav",
+            latency="balanced"
         )
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key_123"})
-    @patch('routers.practice.FishAudio')
-    def test_tts_success_with_file_like_object(self, mock_fish_audio_class):
+    def test_tts_success_with_file_like_object(self, vendor_clients):
         """Test successful TTS generation when SDK returns file-like object"""
-        # Mock the Fish Audio SDK
         mock_client = MagicMock()
-        mock_fish_audio_class.return_value = mock_client
-        
-        # Mock audio response as file-like object
         mock_file = MagicMock()
         mock_file.read.return_value = b"fake_audio_from_file"
         mock_client.tts.convert.return_value = mock_file
+        vendor_clients.fish_audio = mock_client
         
-        # Make request
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Test transcript",
-                "model_id": "model_456"
-            }
-        )
-        
-        # Assertions
-        assert response.status_code == 200
-        assert response.content == b"fake_audio_from_file"
+        assert speak(transcript="Test transcript", model_id="model_456") == b"fake_audio_from_file"
         mock_file.read.assert_called_once()
     
-    @patch.dict(os.environ, {}, clear=True)
-    def test_tts_missing_api_key(self):
-        """Test that missing API key returns 500 error"""
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Hello",
-                "model_id": "test_model"
-            }
-        )
+    def test_tts_missing_api_key(self, vendor_clients):
+        """Test that a Fish Audio client without an API key returns 500 error"""
+        with pytest.raises(HTTPException) as error:
+            speak(transcript="Hello", model_id="test_model")
         
-        assert response.status_code == 500
-        assert "FISH_AUDIO_API_KEY" in response.json()["detail"]
+        assert error.value.status_code == 500
+        assert "fish_audio" in error.value.detail
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key"})
-    def test_tts_empty_transcript(self):
+    def test_tts_empty_transcript(self, vendor_clients):
         """Test that empty transcript returns 400 error"""
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "   ",  # Only whitespace
-                "model_id": "test_model"
-            }
-        )
+        vendor_clients.fish_audio = FakeFishAudio()
+        with pytest.raises(HTTPException) as error:
+            speak(transcript="   ", model_id="test_model")  # Only whitespace
         
-        assert response.status_code == 400
-        assert "empty" in response.json()["detail"].lower()
+        assert error.value.status_code == 400
+        assert "empty" in error.value.detail.lower()
+        assert vendor_clients.fish_audio.calls == 0
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key"})
-    def test_tts_empty_model_id(self):
+    def test_tts_empty_model_id(self, vendor_clients):
         """Test that empty model_id returns 400 error"""
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Hello world",
-                "model_id": "   "  # Only whitespace
-            }
-        )
+        vendor_clients.fish_audio = FakeFishAudio()
+        with pytest.raises(HTTPException) as error:
+            speak(transcript="Hello world", model_id="   ")  # Only whitespace
         
-        assert response.status_code == 400
-        assert "empty" in response.json()["detail"].lower()
+        assert error.value.status_code == 400
+        assert "empty" in error.value.detail.lower()
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key"})
     def test_tts_missing_transcript_field(self):
-        """Test that missing transcript field returns 422 validation error"""
-        response = client.post(
-            "/api/tts",
-            json={
-                "model_id": "test_model"
-            }
-        )
-        
-        assert response.status_code == 422  # Validation error
+        """Test that missing transcript field is a validation error"""
+        with pytest.raises(ValidationError):
+            TTSRequest(model_id="test_model")
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key"})
     def test_tts_missing_model_id_field(self):
-        """Test that missing model_id field returns 422 validation error"""
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Hello"
-            }
-        )
-        
-        assert response.status_code == 422  # Validation error
+        """Test that missing model_id field is a validation error"""
+        with pytest.raises(ValidationError):
+            TTSRequest(transcript="Hello")
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key_123"})
-    @patch('routers.practice.FishAudio')
-    def test_tts_sdk_exception(self, mock_fish_audio_class):
+    def test_tts_sdk_exception(self, vendor_clients):
         """Test handling of SDK exceptions"""
-        # Mock the Fish Audio SDK to raise an exception
-        mock_client = MagicMock()
-        mock_fish_audio_class.return_value = mock_client
-        mock_client.tts.convert.side_effect = Exception("SDK connection error")
+        # Every call to the fake vendor fails
+        vendor_clients.fish_audio = FakeFishAudio(error_rate=1.0)
         
-        # Make request
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "Hello",
-                "model_id": "test_model"
-            }
-        )
+        with pytest.raises(HTTPException) as error:
+            speak(transcript="Hello", model_id="test_model")
         
         # Should return 500 with error message
-        assert response.status_code == 500
-        assert "Error generating speech" in response.json()["detail"]
+        assert error.value.status_code == 500
+        assert "Error generating speech" in error.value.detail
+        assert isinstance(error.value.__context__, FakeVendorError)
     
-    @patch.dict(os.environ, {"FISH_AUDIO_API_KEY": "test_api_key_123"})
-    @patch('routers.practice.FishAudio')
-    def test_tts_with_cloned_model_id(self, mock_fish_audio_class):
+    def test_tts_with_cloned_model_id(self, vendor_clients):
         """Test that cloned model ID is correctly passed to SDK"""
-        # Mock the Fish Audio SDK
         mock_client = MagicMock()
-        mock_fish_audio_class.return_value = mock_client
         mock_client.tts.convert.return_value = b"audio_data"
+        vendor_clients.fish_audio = mock_client
         
         # Use a realistic cloned model ID
         cloned_model_id = "cloned_voice_model_abc123xyz"
         
-        response = client.post(
-            "/api/tts",
-            json={
-                "transcript": "This is my cloned voice speaking",
-                "model_id": cloned_model_id
-            }
-        )
-        
-        assert response.status_code == 200
+        assert speak(transcript="This is my cloned voice speaking", model_id=cloned_model_id) == b"audio_data"
         # Verify the cloned model ID was passed as reference_id
-        mock_client.tts.convert.assert_called_once_with(
-            text="This is my cloned voice speaking",
-            reference_id=cloned_model_id
-        )
+        assert mock_client.tts.convert.call_args.kwargs["reference_id"] == cloned_model_id
+        assert mock_client.tts.convert.call_args.kwargs["text"] == "This is my cloned voice speaking"
 
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
-
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import FakeFishAudio
+from routers import practice
+from schemas.tts import TTSRequest
+from services.tts_cache import TTSCache, tts_cache, tts_cache_key
+
+
+class TestTTSCache:
+    """Test suite for the two-tier TTS audio cache"""
+
+    def test_key_normalizes_transcript(self):
+        """Whitespace and unicode composition differences map to the same key"""
+        composed = tts_cache_key("Hola, ¿cómo estás?", "voice")
+        decomposed = tts_cache_key("  Hola,  ¿cómo estás?\n", "voice")
+        assert composed == decomposed
+
+    def test_key_includes_voice_format_and_latency(self):
+        """Voice, format and latency mode all change the key"""
+        base = tts_cache_key("Hola", "voice", "wav", "balanced")
+        assert base != tts_cache_key("Hola", "other-voice", "wav", "balanced")
+        assert base != tts_cache_key("Hola", "voice", "mp3", "balanced")
+        assert base != tts_cache_key("Hola", "voice", "wav", "normal")
+        assert tts_cache_key("Hola", "voice", "mp3", "balanced", 64) != tts_cache_key("Hola", "voice", "mp3", "balanced", 128)
+
+    def test_memory_lru_eviction(self):
+        """The least recently used entry is evicted once the byte budget is exceeded"""
+        cache = TTSCache(memory_max_bytes=250)
+
+        async def scenario():
+            await cache.put("a", b"a" * 100)
+            await cache.put("b", b"b" * 100)
+            await cache.get("a")
+            await cache.put("c", b"c" * 100)
+            return await cache.get("a"), await cache.get("b"), await cache.get("c")
+
+        a, b, c = asyncio.run(scenario())
+        assert a is not None and c is not None
+        assert b is None
+        assert cache.stats()["memory_hits"] == 3
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_tier_survives_memory_and_evicts_by_size(self, tmp_path):
+        """Disk hits are promoted to memory and the directory stays under its budget"""
+        cache = TTSCache(memory_max_bytes=1000, disk_dir=tmp_path, disk_max_bytes=250)
+
+        async def scenario():
+            await cache.put("a", b"a" * 100)
+            await cache.put("b", b"b" * 100)
+            fresh = TTSCache(memory_max_bytes=1000, disk_dir=tmp_path, disk_max_bytes=250)
+            hit = await fresh.get("a")
+            await fresh.put("c", b"c" * 100)
+            return fresh, hit
+
+        fresh, hit = asyncio.run(scenario())
+        assert hit == b"a" * 100
+        assert fresh.stats()["shared_hits"] == 1
+        assert sum(p.stat().st_size for p in tmp_path.glob("*.audio")) <= 250
+
+    def test_generate_speech_synthesizes_once(self, vendor_clients):
+        """Repeated phrases for the same voice only hit Fish Audio once"""
+        fish = FakeFishAudio()
+        vendor_clients.fish_audio = fish
+
+        async def scenario():
+            first = await practice.generate_speech(TTSRequest(transcript="Hola, ¿cómo estás?", model_id="adam"))
+            second = await practice.generate_speech(TTSRequest(transcript="Hola,  ¿cómo estás? ", model_id="adam"))
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == fish.audio
+        assert fish.calls == 1
+        assert tts_cache.stats()["memory_hits"] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_vendors import make_wav
+from config import settings
+from services.audio_preprocess import prepare_for_stt
+from services.uploads import UploadLimitMiddleware, read_audio_upload
+
+LIMIT = 200_000
+
+app = FastAPI()
+app.add_middleware(UploadLimitMiddleware, routes={"/upload": LIMIT})
+received = []
+
+
+@app.post("/upload")
+async def upload(file: UploadFile = File(...)):
+    audio = await read_audio_upload(file)
+    received.append(audio)
+    return {"bytes": len(audio)}
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_received():
+    received.clear()
+
+
+class TestUploads:
+    """Test suite for size- and duration-bounded audio uploads"""
+
+    def test_recording_is_read_once_intact(self):
+        """A recording within the limits reaches the endpoint byte for byte"""
+        wav = make_wav(duration=1.0)
+        response = client.post("/upload", files={"file": ("clip.wav", wav, "audio/wav")})
+        assert response.status_code == 200
+        assert received == [wav]
+
+    def test_oversized_file_is_rejected(self, monkeypatch):
+        """A file over UPLOAD_MAX_MB gets a 413 before it is read into memory"""
+        monkeypatch.setattr(settings, "UPLOAD_MAX_MB", 0.01)
+        response = client.post("/upload", files={"file": ("clip.wav", make_wav(duration=1.0), "audio/wav")})
+        assert response.status_code == 413
+        assert received == []
+
+    def test_oversized_body_is_cut_off(self):
+        """Bodies past the route's limit get a 413, by Content-Length or, if chunked, as they arrive"""
+        wav = make_wav(duration=10.0)
+        assert client.post("/upload", files={"file": ("clip.wav", wav, "audio/wav")}).status_code == 413
+
+        # Straight through the ASGI interface, so the body arrives chunk by chunk
+        boundary = b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"clip.wav\"\r\n\r\n"
+        chunks = [boundary] + [wav[offset:offset + 16384] for offset in range(0, len(wav), 16384)]
+        pulled, sent = 0, []
+
+        async def receive():
+            nonlocal pulled
+            pulled += 1
+            return {"type": "http.request", "body": chunks[pulled - 1], "more_body": pulled < len(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/upload", "query_string": b"", "root_path": "",
+                 "headers": [(b"content-type", b"multipart/form-data; boundary=boundary")]}
+        asyncio.run(app(scope, receive, send))
+        assert sent[0]["status"] == 413
+        assert pulled < len(chunks)
+        assert received == []
+
+    def test_content_type_and_magic_bytes_are_checked(self):
+        """A declared non-audio type or unknown magic bytes get a 415; MediaRecorder's video/webm is fine"""
+        wav = make_wav(duration=0.2)
+        assert client.post("/upload", files={"file": ("a.txt", wav, "text/plain")}).status_code == 415
+        assert client.post("/upload", files={"file": ("a.wav", b"x" * 2000, "audio/wav")}).status_code == 415
+        assert client.post("/upload", files={"file": ("a.webm", wav, "video/webm")}).status_code == 200
+        assert client.post("/upload", files={"file": ("a.wav", wav[:500], "audio/wav")}).status_code == 400
+
+    def test_long_recording_is_rejected(self, monkeypatch):
+        """A WAV longer than UPLOAD_MAX_SECONDS gets a 413, from its header at upload and when decoded"""
+        monkeypatch.setattr(settings, "UPLOAD_MAX_SECONDS", 1.0)
+        wav = make_wav(duration=2.0)
+        response = client.post("/upload", files={"file": ("clip.wav", wav, "audio/wav")})
+        assert response.status_code == 413
+        assert "too long" in response.json()["detail"]
+
+        with pytest.raises(HTTPException) as error:
+            prepare_for_stt(wav, max_seconds=1.0)
+        assert error.value.status_code == 413
@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.vendor_pool import (
+    DEEPGRAM,
+    FISH_AUDIO,
+    configure_vendor_pools,
+    run_vendor_call,
+    shutdown_vendor_pools
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_pools():
+    yield
+    shutdown_vendor_pools()
+
+
+def blocking_call(delay):
+    time.sleep(delay)
+    return threading.current_thread().name
+
+
+class TestVendorPool:
+    """Test suite for the per-vendor thread pools"""
+
+    def test_call_runs_on_vendor_thread(self):
+        """Blocking calls run on the named vendor pool, not the event loop thread"""
+        thread_name = asyncio.run(run_vendor_call(FISH_AUDIO, blocking_call, 0))
+        assert thread_name.startswith("vendor-fish_audio")
+
+    def test_event_loop_not_blocked(self):
+        """The event loop keeps ticking while a vendor call sleeps"""
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await run_vendor_call(DEEPGRAM, blocking_call, 0.2)
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(scenario()) >= 10
+
+    def test_pool_size_bounds_concurrency(self):
+        """A pool of size 1 serializes calls, a larger pool runs them in parallel"""
+        async def run_four():
+            started = time.perf_counter()
+            await asyncio.gather(*(run_vendor_call(FISH_AUDIO, blocking_call, 0.1) for _ in range(4)))
+            return time.perf_counter() - started
+
+        configure_vendor_pools({FISH_AUDIO: 1})
+        assert asyncio.run(run_four()) >= 0.4
+
+        configure_vendor_pools({FISH_AUDIO: 4})
+        assert asyncio.run(run_four()) < 0.3
+
+    def test_unknown_vendor(self):
+        """Unknown vendor names are rejected"""
+        with pytest.raises(ValueError):
+            asyncio.run(run_vendor_call("openai", blocking_call, 0))
@@ -1,4 +1,6 @@
 from .preset_voices import (
+    PresetVoiceRegistry,
+    preset_voice_registry,
     load_preset_voices,
     get_preset_voice_id,
     is_preset_voice,
@@ -6,6 +8,8 @@ from .preset_voices import (
 )
 
 __all__ = [
+    "PresetVoiceRegistry",
+    "preset_voice_registry",
     "load_preset_voices",
     "get_preset_voice_id",
     "is_preset_voice",
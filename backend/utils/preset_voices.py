@@ -1,38 +1,121 @@
+import hashlib
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
-# Path to preset voices JSON file
-PRESET_VOICES_PATH = Path(__file__).parent.parent / "preset_voices.json"
+from config import settings
+
+# Path to preset voices JSON file (frontend/preset_voices.json unless configured)
+PRESET_VOICES_PATH = Path(settings.PRESET_VOICES_PATH)
+
+class PresetVoiceRegistry:
+    """
+    Preset voices held in memory, indexed by key and by Fish Audio id.
+
+    The file is re-read only when its mtime or size changes, checked at most once
+    per `check_interval` seconds. The /api/preset-voices body and its ETag are
+    built once per load.
+    """
+
+    def __init__(self, path: Path, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = float("-inf")
+        self._by_key: Dict[str, dict] = {}
+        self._by_id: Dict[str, dict] = {}
+        self._response_body = b""
+        self._etag = ""
+        self._index({})
+
+    def load(self) -> None:
+        """Read the file now (called from the app lifespan on startup)"""
+        with self._lock:
+            self._checked_at = float("-inf")
+        self._refresh()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                signature = None
+            if signature == self._signature:
+                return
+
+            if signature is None:
+                presets = {}
+            else:
+                try:
+                    with open(self.path, 'r') as f:
+                        presets = json.load(f).get('preset_voices', {})
+                except json.JSONDecodeError:
+                    # Most likely caught mid-write; keep serving the last good copy
+                    # and look again on the next check
+                    return
+            self._signature = signature
+            self._index(presets)
+
+    def _index(self, presets: Dict[str, dict]) -> None:
+        self._by_key = presets
+        self._by_id = {voice.get('id'): voice for voice in presets.values() if voice.get('id')}
+        voices_list = [
+            {
+                "key": key,
+                "id": voice.get("id"),
+                "name": voice.get("name"),
+                "description": voice.get("description", "")
+            }
+            for key, voice in presets.items()
+        ]
+        self._response_body = json.dumps({"success": True, "preset_voices": voices_list}).encode('utf-8')
+        self._etag = '"' + hashlib.sha256(self._response_body).hexdigest()[:32] + '"'
+
+    def voices(self) -> Dict[str, dict]:
+        self._refresh()
+        return self._by_key
+
+    def get(self, voice_key: str) -> Optional[dict]:
+        self._refresh()
+        return self._by_key.get(voice_key)
+
+    def get_by_id(self, model_id: str) -> Optional[dict]:
+        self._refresh()
+        return self._by_id.get(model_id)
+
+    def response(self) -> Tuple[bytes, str]:
+        """The precomputed /api/preset-voices JSON body and its ETag"""
+        self._refresh()
+        return self._response_body, self._etag
+
+preset_voice_registry = PresetVoiceRegistry(PRESET_VOICES_PATH)
 
 def load_preset_voices() -> Dict:
     """Load preset voices from JSON file"""
-    try:
-        with open(PRESET_VOICES_PATH, 'r') as f:
-            data = json.load(f)
-            return data.get('preset_voices', {})
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
-        return {}
+    return preset_voice_registry.voices()
 
 def get_preset_voice_id(voice_key: str) -> Optional[str]:
     """Get preset voice ID by key (e.g., 'energetic_male', 'adam', 'bro')"""
-    presets = load_preset_voices()
-    voice = presets.get(voice_key)
+    voice = preset_voice_registry.get(voice_key)
     if voice:
         return voice.get('id')
     return None
 
 def is_preset_voice(model_id: str) -> bool:
     """Check if a model_id is a preset voice"""
-    presets = load_preset_voices()
-    for voice in presets.values():
-        if voice.get('id') == model_id:
-            return True
-    return False
+    return preset_voice_registry.get_by_id(model_id) is not None
 
 def get_all_preset_voices() -> Dict:
     """Get all preset voices with their details"""
-    return load_preset_voices()
-
+    return preset_voice_registry.voices()